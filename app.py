@@ -3,17 +3,48 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from datetime import datetime, timedelta
 import hashlib
 import json
+import logging
 import time
 from faker import Faker
 import warnings
 import random
+import io
 from io import BytesIO
 import base64
 import uuid
+import os
+import pickle
+import sqlite3
+import threading
+import gzip
+import zipfile
+import tempfile
+import unicodedata
+import bisect
+import heapq
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
 warnings.filterwarnings('ignore')
+logger = logging.getLogger(__name__)
+
+# Dépendances optionnelles
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pa_csv = pq = None
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
 
 # Configuration de la page
 st.set_page_config(
@@ -129,12 +160,156 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Journal d'audit segmenté par jour
+class AuditLogStore:
+    """Journal d'audit en ajout seul, un segment SQLite par jour"""
+
+    def __init__(self, directory=None):
+        # directory=None : segments en mémoire (stockage 'memory', tests)
+        self.directory = directory
+        self._connections = {}
+        self._lock = threading.RLock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, day):
+        return os.path.join(self.directory, f"audit-{day}.db")
+
+    def _connection(self, day, create=False):
+        with self._lock:
+            conn = self._connections.get(day)
+            if conn is None:
+                if self.directory is None:
+                    if not create:
+                        return None
+                    conn = sqlite3.connect(':memory:', check_same_thread=False)
+                else:
+                    if not create and not os.path.exists(self._path(day)):
+                        return None
+                    conn = sqlite3.connect(self._path(day), check_same_thread=False, timeout=30)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS log (timestamp TEXT, kind TEXT, user TEXT, "
+                    "action TEXT, details TEXT, ip TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS log_user ON log (kind, user)")
+                conn.execute("CREATE INDEX IF NOT EXISTS log_action ON log (kind, action)")
+                conn.execute("CREATE INDEX IF NOT EXISTS log_timestamp ON log (timestamp)")
+                conn.commit()
+                self._connections[day] = conn
+            return conn
+
+    def segments(self):
+        """Jours disposant d'un segment, dans l'ordre chronologique"""
+        with self._lock:
+            days = set(self._connections)
+            if self.directory:
+                days.update(name[len('audit-'):-len('.db')] for name in os.listdir(self.directory)
+                            if name.startswith('audit-') and name.endswith('.db'))
+            return sorted(days)
+
+    def append(self, kind, user, action, details="", ip=None, timestamp=None):
+        """Ajouter une entrée au segment du jour"""
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            conn = self._connection(timestamp[:10], create=True)
+            with conn:
+                conn.execute("INSERT INTO log VALUES (?, ?, ?, ?, ?, ?)",
+                             (timestamp, kind, user, action, details, ip))
+
+    def _where(self, kind, start, end, users, actions):
+        clauses, params = ["kind = ?"], [kind]
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(str(start))
+        if end:
+            clauses.append("timestamp <= ?")
+            params.append(f"{end} 23:59:59" if len(str(end)) == 10 else str(end))
+        for column, values in (('user', users), ('action', actions)):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        return " AND ".join(clauses), params
+
+    def _scan(self, sql, kind, start, end, users, actions):
+        """Exécuter la requête sur les seuls segments de la période [start, end]"""
+        where, params = self._where(kind, start, end, users, actions)
+        low, high = str(start)[:10] if start else None, str(end)[:10] if end else None
+        with self._lock:
+            for day in self.segments():
+                if (low and day < low) or (high and day > high):
+                    continue
+                conn = self._connection(day)
+                if conn is not None:
+                    yield from conn.execute(sql.format(where=where), params)
+
+    def query(self, kind='action', start=None, end=None, users=None, actions=None, limit=None):
+        """Entrées d'une période, filtrées par utilisateur et action, les plus récentes d'abord"""
+        rows = list(self._scan("SELECT timestamp, user, action, details, ip FROM log WHERE {where}",
+                               kind, start, end, users, actions))
+        df = pd.DataFrame(rows, columns=['timestamp', 'user', 'action', 'details', 'ip'])
+        df = df.sort_values('timestamp', ascending=False, kind='stable', ignore_index=True)
+        return df.head(limit) if limit else df
+
+    def counts(self, column, kind='action', start=None, end=None, users=None, actions=None):
+        """Nombre d'entrées par valeur de `column` ('user' ou 'action'), agrégé dans SQLite"""
+        totals = Counter()
+        for value, count in self._scan(f"SELECT {column}, COUNT(*) FROM log WHERE {{where}} GROUP BY {column}",
+                                       kind, start, end, users, actions):
+            totals[value] += count
+        return pd.Series(dict(totals.most_common()), dtype='int64')
+
+    def frame(self):
+        """Toutes les entrées, toutes natures confondues, dans l'ordre chronologique (sauvegardes)"""
+        rows = list(self._scan("SELECT timestamp, kind, user, action, details, ip FROM log WHERE {where}",
+                               'action', None, None, None, None))
+        rows += self._scan("SELECT timestamp, kind, user, action, details, ip FROM log WHERE {where}",
+                           'auth', None, None, None, None)
+        df = pd.DataFrame(rows, columns=['timestamp', 'kind', 'user', 'action', 'details', 'ip'])
+        return df.sort_values('timestamp', kind='stable', ignore_index=True)
+
+    def replace(self, df):
+        """Remplacer tout le journal par les entrées de `df` (restauration d'une sauvegarde)"""
+        with self._lock:
+            for day in self.segments():
+                self._drop(day)
+            for day, entries in df.groupby(df['timestamp'].str[:10], sort=True):
+                conn = self._connection(day, create=True)
+                with conn:
+                    conn.executemany("INSERT INTO log VALUES (?, ?, ?, ?, ?, ?)",
+                                     entries[['timestamp', 'kind', 'user', 'action', 'details', 'ip']]
+                                     .astype(object).where(entries.notna(), None).values.tolist())
+
+    def _drop(self, day):
+        """Fermer et supprimer un segment"""
+        conn = self._connections.pop(day, None)
+        if conn is not None:
+            conn.close()
+        if self.directory:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self._path(day) + suffix):
+                    os.remove(self._path(day) + suffix)
+
+    def purge(self, retention_days):
+        """Supprimer les segments expirés ; renvoie le nombre d'entrées supprimées"""
+        limit = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+        removed = 0
+        with self._lock:
+            for day in self.segments():
+                if day >= limit:
+                    break
+                conn = self._connection(day)
+                if conn is not None:
+                    removed += conn.execute("SELECT COUNT(*) FROM log").fetchone()[0]
+                self._drop(day)
+        return removed
+
 # Classe pour la gestion d'authentification avec rôles
 class AuthSystemPro:
     def __init__(self):
         self.users = self._load_users()
-        self.logs = []
-        self.actions_log = []
+        self.audit = AuditLogStore(None if STORAGE_BACKEND == 'memory' else os.path.join(DATA_DIR, 'audit'))
     
     def _load_users(self):
         # Utilisateurs par défaut avec tous les rôles
@@ -190,6 +365,16 @@ class AuthSystemPro:
             }
         }
     
+    @property
+    def logs(self):
+        """Connexions journalisées (réussies et échouées)"""
+        return self.audit.query('auth').to_dict('records')
+    
+    @property
+    def actions_log(self):
+        """Actions journalisées"""
+        return self.audit.query('action').to_dict('records')
+    
     def _hash_password(self, password):
         return hashlib.sha256(password.encode()).hexdigest()
     
@@ -197,12 +382,7 @@ class AuthSystemPro:
         if username in self.users:
             if self.users[username]["password"] == self._hash_password(password):
                 # Log de connexion
-                self.logs.append({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "username": username,
-                    "action": "login_success",
-                    "ip": "192.168.1.1"
-                })
+                self.audit.append('auth', username, "login_success", ip="192.168.1.1")
                 return {
                     "username": username,
                     "role": self.users[username]["role"],
@@ -211,33 +391,2138 @@ class AuthSystemPro:
                 }
         
         # Log d'échec
-        self.logs.append({
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "username": username,
-            "action": "login_failed",
-            "ip": "192.168.1.1"
-        })
+        self.audit.append('auth', username, "login_failed", ip="192.168.1.1")
         return None
     
     def log_action(self, user, action, details=""):
         """Journaliser les actions importantes"""
-        self.actions_log.append({
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "user": user,
-            "action": action,
-            "details": details
+        self.audit.append('action', user, action, details)
+
+# Référentiels communs
+MATIERES_PAR_SPECIALITE = {
+    'Informatique': ['Algorithme', 'Base de données', 'Réseaux', 'Web', 'IA', 'Sécurité', 'DevOps'],
+    'Mathématiques': ['Algèbre', 'Analyse', 'Probabilité', 'Statistique', 'Topologie', 'Calcul différentiel'],
+    'Physique': ['Mécanique', 'Electromagnétisme', 'Quantique', 'Thermodynamique', 'Optique', 'Astrophysique'],
+    'Chimie': ['Organique', 'Minérale', 'Analytique', 'Physico-chimie', 'Biochimie', 'Chimie verte'],
+    'Biologie': ['Génétique', 'Biologie cellulaire', 'Écologie', 'Physiologie', 'Microbiologie', 'Bioinformatique'],
+    'Économie': ['Microéconomie', 'Macroéconomie', 'Économétrie', 'Finance', 'Marketing', 'Stratégie'],
+    'Droit': ['Droit civil', 'Droit pénal', 'Droit commercial', 'Droit international', 'Droit administratif']
+}
+
+SALAIRES_BASE = {
+    'Secrétaire administratif': 2200,
+    'Assistant de direction': 2800,
+    'Accueil': 1900,
+    'Responsable administratif': 3500,
+    'Gestionnaire': 2700,
+    'Coordinateur': 3200,
+    'Comptable': 2800,
+    'Responsable financier': 4500,
+    'Assistant comptable': 2300,
+    'Bibliothécaire': 2400,
+    'Documentaliste': 2500,
+    'Assistant bibliothèque': 2000,
+    'Technicien informatique': 2600,
+    'Administrateur réseau': 3800,
+    'Support technique': 2300,
+    'Agent de surveillance': 2100,
+    'Responsable sécurité': 3200,
+    'Veilleur': 2000
+}
+
+POSTES_PAR_SERVICE = {
+    'Secrétariat': ['Secrétaire administratif', 'Assistant de direction', 'Accueil'],
+    'Administration': ['Responsable administratif', 'Gestionnaire', 'Coordinateur'],
+    'Comptabilité': ['Comptable', 'Responsable financier', 'Assistant comptable'],
+    'Bibliothèque': ['Bibliothécaire', 'Documentaliste', 'Assistant bibliothèque'],
+    'Technique / IT': ['Technicien informatique', 'Administrateur réseau', 'Support technique'],
+    'Surveillance': ['Agent de surveillance', 'Responsable sécurité', 'Veilleur']
+}
+
+# Coût annuel estimé d'un étudiant par spécialité (simulation)
+COUT_ETUDIANT_PAR_SPECIALITE = {
+    'Informatique': 8000,
+    'Mathématiques': 6000,
+    'Physique': 7500,
+    'Chimie': 7000,
+    'Biologie': 6500,
+    'Économie': 5500,
+    'Droit': 5000
+}
+
+# Crédits ECTS : un module validé (moyenne pondérée >= 10) rapporte 6 crédits
+CREDITS_PAR_MODULE = 6
+CREDITS_MAX = 180
+
+SALLES_INFO = {
+    'A101': {'Capacité': 30, 'Type': 'Salle de cours', 'Équipement': 'Vidéoprojecteur, Tableau'},
+    'A102': {'Capacité': 30, 'Type': 'Salle de cours', 'Équipement': 'Vidéoprojecteur, Tableau'},
+    'A201': {'Capacité': 50, 'Type': 'Amphithéâtre', 'Équipement': 'Vidéoprojecteur, Micro'},
+    'A202': {'Capacité': 50, 'Type': 'Amphithéâtre', 'Équipement': 'Vidéoprojecteur, Micro'},
+    'B101': {'Capacité': 20, 'Type': 'Salle TP', 'Équipement': 'Ordinateurs, Tableau'},
+    'B102': {'Capacité': 20, 'Type': 'Salle TP', 'Équipement': 'Ordinateurs, Tableau'}
+}
+
+# Configuration de la génération des données initiales
+# UNIVERSITY_GENERATOR=bulk active le générateur vectorisé (tests de charge)
+GENERATOR_MODE = os.environ.get('UNIVERSITY_GENERATOR', 'standard')
+GENERATOR_SEED = int(os.environ['UNIVERSITY_SEED']) if os.environ.get('UNIVERSITY_SEED') else None
+DATASET_SIZES = {
+    'students': int(os.environ.get('UNIVERSITY_N_STUDENTS', 50)),
+    'professors': int(os.environ.get('UNIVERSITY_N_PROFESSORS', 15)),
+    'employees': int(os.environ.get('UNIVERSITY_N_EMPLOYEES', 30)),
+    'timetable': int(os.environ.get('UNIVERSITY_N_SEANCES', 100))
+}
+
+# Configuration du stockage persistant
+STORAGE_BACKEND = os.environ.get('UNIVERSITY_STORAGE', 'sqlite')
+DATA_DIR = os.environ.get('UNIVERSITY_DATA_DIR', 'data')
+
+# Clé primaire de chaque table (les notes n'ont pas d'identifiant propre)
+TABLE_KEYS = {
+    'students': 'id',
+    'professors': 'id',
+    'employees': 'id',
+    'grades': None,
+    'timetable': 'id'
+}
+DATA_TABLES = list(TABLE_KEYS)
+
+# Champs couverts par la recherche plein texte des pages CRUD
+SEARCH_FIELDS = {
+    'students': ['nom', 'prenom', 'cne'],
+    'professors': ['nom', 'prenom', 'specialite'],
+    'employees': ['nom', 'prenom', 'poste']
+}
+
+# Les types numpy ne sont pas connus de sqlite3
+for _numpy_type, _python_type in [(np.int64, int), (np.int32, int), (np.float64, float), (np.bool_, bool)]:
+    sqlite3.register_adapter(_numpy_type, _python_type)
+
+# Classes pour le stockage persistant des données
+class StorageBackend:
+    """Interface commune des moteurs de stockage du DataManager"""
+    name = "abstract"
+
+    def has_table(self, table):
+        raise NotImplementedError
+
+    def load_table(self, table):
+        raise NotImplementedError
+
+    def write_table(self, table, df):
+        """Écrire une table complète (initialisation ou compaction)"""
+        raise NotImplementedError
+
+    def append_rows(self, table, df):
+        raise NotImplementedError
+
+    def upsert_rows(self, table, df):
+        """Insérer ou mettre à jour des lignes selon la clé de la table"""
+        raise NotImplementedError
+
+    def delete_rows(self, table, column, values):
+        raise NotImplementedError
+
+    def delete_keys(self, table, keys):
+        """Supprimer les lignes dont les colonnes de `keys` (DataFrame) valent l'une de ses lignes"""
+        raise NotImplementedError
+
+    def size_bytes(self):
+        return 0
+
+    def optimize(self, report=None):
+        """Compacter le stockage et rafraîchir ses statistiques"""
+
+    def reindex(self):
+        """Reconstruire les index propres au stockage"""
+
+    def check(self):
+        """Anomalies physiques détectées dans le stockage (liste de messages)"""
+        return []
+
+class MemoryStorage(StorageBackend):
+    """Stockage volatile en mémoire (aucune persistance entre redémarrages)"""
+    name = "memory"
+
+    def __init__(self):
+        self.tables = {}
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def load_table(self, table):
+        return self.tables[table]
+
+    def write_table(self, table, df):
+        self.tables[table] = df
+
+    def append_rows(self, table, df):
+        pass
+
+    def upsert_rows(self, table, df):
+        pass
+
+    def delete_rows(self, table, column, values):
+        pass
+
+    def delete_keys(self, table, keys):
+        pass
+
+class SQLiteStorage(StorageBackend):
+    """Stockage SQLite en mode WAL : écritures ligne par ligne, lectures non bloquantes"""
+    name = "sqlite"
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS _schema (tbl TEXT, col TEXT, dtype TEXT, PRIMARY KEY (tbl, col))"
+        )
+        self.conn.commit()
+
+    def _columns(self, table):
+        return [row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')]
+
+    def _ensure_columns(self, table, df):
+        """Ajouter les colonnes absentes du schéma (ex: commentaire des notes)"""
+        existing = self._columns(table)
+        for col in df.columns:
+            if col not in existing:
+                self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}"')
+                self.conn.execute("INSERT OR REPLACE INTO _schema VALUES (?, ?, ?)",
+                                  (table, col, str(df[col].dtype)))
+
+    def _rows(self, df):
+        return df.astype(object).where(pd.notna(df), None).values.tolist()
+
+    def has_table(self, table):
+        with self._lock:
+            return bool(self._columns(table))
+
+    def load_table(self, table):
+        with self._lock:
+            df = pd.read_sql_query(f'SELECT * FROM "{table}" ORDER BY rowid', self.conn)
+            dtypes = dict(self.conn.execute("SELECT col, dtype FROM _schema WHERE tbl = ?", (table,)).fetchall())
+
+        # Restaurer les booléens stockés comme entiers
+        for col, dtype in dtypes.items():
+            if dtype == 'bool' and col in df.columns and df[col].notna().all():
+                df[col] = df[col].astype(bool)
+        return df
+
+    def write_table(self, table, df):
+        with self._lock, self.conn:
+            df.to_sql(table, self.conn, if_exists='replace', index=False, chunksize=10000)
+            self.conn.execute("DELETE FROM _schema WHERE tbl = ?", (table,))
+            self.conn.executemany("INSERT INTO _schema VALUES (?, ?, ?)",
+                                  [(table, col, str(dtype)) for col, dtype in df.dtypes.items()])
+            key = TABLE_KEYS.get(table)
+            if key:
+                self.conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{table}_{key}" ON "{table}" ("{key}")')
+
+    def append_rows(self, table, df):
+        if df.empty:
+            return
+        with self._lock, self.conn:
+            self._ensure_columns(table, df)
+            cols = ', '.join(f'"{c}"' for c in df.columns)
+            params = ', '.join('?' for _ in df.columns)
+            self.conn.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({params})', self._rows(df))
+
+    def upsert_rows(self, table, df):
+        key = TABLE_KEYS[table]
+        with self._lock, self.conn:
+            self._ensure_columns(table, df)
+            cols = ', '.join(f'"{c}"' for c in df.columns)
+            params = ', '.join('?' for _ in df.columns)
+            updates = ', '.join(f'"{c}" = excluded."{c}"' for c in df.columns if c != key)
+            self.conn.executemany(
+                f'INSERT INTO "{table}" ({cols}) VALUES ({params}) '
+                f'ON CONFLICT("{key}") DO UPDATE SET {updates}',
+                self._rows(df)
+            )
+
+    def delete_rows(self, table, column, values):
+        values = list(values)
+        with self._lock, self.conn:
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                params = ', '.join('?' for _ in chunk)
+                self.conn.execute(f'DELETE FROM "{table}" WHERE "{column}" IN ({params})', chunk)
+
+    def delete_keys(self, table, keys):
+        # Une seule passe par lot de clés (valeurs de ligne SQLite) plutôt qu'une par clé
+        columns = ', '.join(f'"{c}"' for c in keys.columns)
+        row = f"({', '.join('?' for _ in keys.columns)})"
+        rows = self._rows(keys)
+        with self._lock, self.conn:
+            for start in range(0, len(rows), 250):
+                chunk = rows[start:start + 250]
+                self.conn.execute(f'DELETE FROM "{table}" WHERE ({columns}) IN (VALUES {", ".join([row] * len(chunk))})',
+                                  [value for values in chunk for value in values])
+
+    def size_bytes(self):
+        return sum(os.path.getsize(self.path + suffix)
+                   for suffix in ['', '-wal'] if os.path.exists(self.path + suffix))
+
+    def optimize(self, report=None):
+        steps = ["ANALYZE", "VACUUM", "PRAGMA optimize", "PRAGMA wal_checkpoint(TRUNCATE)"]
+        for step, statement in enumerate(steps, 1):
+            with self._lock:
+                self.conn.execute(statement)
+                self.conn.commit()
+            if report:
+                report(step / len(steps), statement)
+
+    def reindex(self):
+        with self._lock:
+            self.conn.execute("REINDEX")
+            self.conn.commit()
+
+    def check(self):
+        with self._lock:
+            rows = self.conn.execute("PRAGMA quick_check").fetchall()
+        return [row[0] for row in rows if row[0] != 'ok']
+
+class ParquetStorage(StorageBackend):
+    """Stockage Parquet : un fichier de base et des segments delta par table"""
+    name = "parquet"
+    COMPACTION_THRESHOLD = 64
+
+    def __init__(self, directory):
+        if pa is None:
+            raise ImportError("pyarrow est requis pour le stockage Parquet")
+        self.directory = directory
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _table_dir(self, table):
+        return os.path.join(self.directory, table)
+
+    def _deltas(self, table):
+        table_dir = self._table_dir(table)
+        return sorted(f for f in os.listdir(table_dir) if f.startswith('delta-'))
+
+    def _write_delta(self, table, df, op, column=None):
+        with self._lock:
+            deltas = self._deltas(table)
+            sequence = int(deltas[-1].split('-')[1]) + 1 if deltas else 1
+            suffix = f"-{column}" if column else ""
+            path = os.path.join(self._table_dir(table), f"delta-{sequence:08d}-{op}{suffix}.parquet")
+            df.to_parquet(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+
+    def has_table(self, table):
+        return os.path.exists(os.path.join(self._table_dir(table), 'base.parquet'))
+
+    def load_table(self, table):
+        with self._lock:
+            table_dir = self._table_dir(table)
+            df = pd.read_parquet(os.path.join(table_dir, 'base.parquet'))
+            deltas = self._deltas(table)
+
+            for delta_file in deltas:
+                _, _, op, *column = delta_file[:-len('.parquet')].split('-', 3)
+                delta = pd.read_parquet(os.path.join(table_dir, delta_file))
+
+                if op == 'append':
+                    df = pd.concat([df, delta], ignore_index=True)
+                elif op == 'upsert':
+                    df = self._apply_upsert(df, delta, TABLE_KEYS[table])
+                elif op == 'delete':
+                    df = df[~df[column[0]].isin(delta[column[0]])].reset_index(drop=True)
+                elif op == 'deletekeys':
+                    keys = pd.MultiIndex.from_frame(delta)
+                    df = df[~pd.MultiIndex.from_frame(df[list(delta.columns)]).isin(keys)].reset_index(drop=True)
+
+            # Compaction : réécrire la base quand les segments s'accumulent
+            if len(deltas) >= self.COMPACTION_THRESHOLD:
+                self.write_table(table, df)
+        return df
+
+    def _apply_upsert(self, df, delta, key):
+        existing = delta[key].isin(df[key])
+        if existing.any():
+            updated = df.set_index(key)
+            changes = delta[existing].set_index(key)
+            for col in changes.columns:
+                if col not in updated.columns:
+                    updated[col] = None
+            updated.loc[changes.index, changes.columns] = changes
+            columns = list(df.columns) + [c for c in changes.columns if c not in df.columns]
+            df = updated.reset_index()[columns]
+        if existing.all():
+            return df
+        return pd.concat([df, delta[~existing]], ignore_index=True)
+
+    def write_table(self, table, df):
+        with self._lock:
+            table_dir = self._table_dir(table)
+            os.makedirs(table_dir, exist_ok=True)
+            base = os.path.join(table_dir, 'base.parquet')
+            df.to_parquet(base + '.tmp', index=False)
+            os.replace(base + '.tmp', base)
+            for delta_file in self._deltas(table):
+                os.remove(os.path.join(table_dir, delta_file))
+
+    def append_rows(self, table, df):
+        if not df.empty:
+            self._write_delta(table, df, 'append')
+
+    def upsert_rows(self, table, df):
+        self._write_delta(table, df, 'upsert')
+
+    def delete_rows(self, table, column, values):
+        self._write_delta(table, pd.DataFrame({column: list(values)}), 'delete', column)
+
+    def delete_keys(self, table, keys):
+        self._write_delta(table, keys.reset_index(drop=True), 'deletekeys')
+
+    def size_bytes(self):
+        return sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(self.directory) for f in files)
+
+    def optimize(self, report=None):
+        tables = [table for table in DATA_TABLES if self.has_table(table)]
+        for step, table in enumerate(tables, 1):
+            with self._lock:
+                if self._deltas(table):
+                    self.write_table(table, self.load_table(table))
+            if report:
+                report(step / len(tables), f"{table} compactée")
+
+    def check(self):
+        problems = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.parquet'):
+                    try:
+                        pq.ParquetFile(os.path.join(root, name)).metadata
+                    except Exception as error:
+                        problems.append(f"{name} : {error}")
+        return problems
+
+def create_storage_backend(kind=STORAGE_BACKEND, data_dir=DATA_DIR):
+    """Instancier le moteur de stockage configuré (UNIVERSITY_STORAGE)"""
+    if kind == 'parquet' and pa is not None:
+        return ParquetStorage(os.path.join(data_dir, 'parquet'))
+    if kind in ('sqlite', 'parquet'):
+        return SQLiteStorage(os.path.join(data_dir, 'university.db'))
+    return MemoryStorage()
+
+# Tampon d'ajout partagé par les tables du DataManager
+class AppendBuffer:
+    """Lignes ajoutées accumulées puis concaténées à la lecture suivante"""
+
+    def __init__(self, base):
+        self._base = base
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+
+    def append(self, rows):
+        """Ajouter un DataFrame ou une liste de dictionnaires"""
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if frame.empty:
+            return
+        with self._lock:
+            self._pending.append(frame)
+            self._pending_rows += len(frame)
+
+    def view(self):
+        """Vue matérialisée (une seule concaténation pour tous les ajouts en attente)"""
+        with self._lock:
+            if self._pending:
+                self._base = pd.concat([self._base] + self._pending, ignore_index=True)
+                self._pending = []
+                self._pending_rows = 0
+            return self._base
+
+    def replace(self, df):
+        """Remplacer la vue (après suppression ou réécriture)"""
+        with self._lock:
+            self._base = df
+            self._pending = []
+            self._pending_rows = 0
+
+    def __len__(self):
+        return len(self._base) + self._pending_rows
+
+# Index de requête (pagination, tri et filtres sans parcours complet)
+class TableIndex:
+    """Index d'une version de table : rang de tri et positions par valeur"""
+
+    def __init__(self, df):
+        self.df = df
+        self._rank = {}
+        self._order = {}
+        self._values = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def rank(self, column):
+        """Rang de chaque ligne dans l'ordre de tri de la colonne (valeurs manquantes en dernier)"""
+        if column not in self._rank:
+            rank = self.df[column].rank(method='first', na_option='bottom').to_numpy(dtype=np.int64) - 1
+            order = np.empty_like(rank)
+            order[rank] = np.arange(len(rank))
+            self._rank[column], self._order[column] = rank, order
+        return self._rank[column]
+
+    def order(self, column):
+        """Positions des lignes triées selon la colonne"""
+        self.rank(column)
+        return self._order[column]
+
+    def values(self, column):
+        """Positions (triées) de chaque valeur distincte de la colonne"""
+        if column not in self._values:
+            self._values[column] = self.df.groupby(column, sort=False).indices
+        return self._values[column]
+
+    def _range(self, column, low, high):
+        order = self.order(column)
+        sorted_values = self.df[column].to_numpy()[order]
+        n_valid = int(self.df[column].notna().sum())
+        start = 0 if low is None else np.searchsorted(sorted_values[:n_valid], low, side='left')
+        stop = n_valid if high is None else np.searchsorted(sorted_values[:n_valid], high, side='right')
+        return np.sort(order[start:stop])
+
+    def select(self, filters=None, within=None):
+        """Positions des lignes retenues (None : toutes les lignes)"""
+        selections = []
+        for column, condition in (filters or {}).items():
+            if isinstance(condition, tuple):
+                selections.append(self._range(column, *condition))
+            elif condition:
+                index = self.values(column)
+                parts = [index[value] for value in condition if value in index]
+                selections.append(np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64))
+        if within is not None:
+            within = np.asarray(within, dtype=np.int64)
+            for other in selections:
+                within = within[np.isin(within, other)]
+            return within
+        if not selections:
+            return None
+        selections.sort(key=len)
+        positions = selections[0]
+        for other in selections[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def query(self, filters=None, sort_by=None, ascending=True, within=None, start=0, stop=None):
+        """Lignes filtrées et triées, restreintes à la fenêtre [start, stop), et leur nombre total"""
+        positions = self.select(filters, within)
+        total = len(self.df) if positions is None else len(positions)
+        if sort_by is not None:
+            if positions is None:
+                positions = self.order(sort_by)
+            else:
+                positions = positions[np.argsort(self.rank(sort_by)[positions], kind='stable')]
+            if not ascending:
+                positions = positions[::-1]
+        elif positions is None:
+            positions = np.arange(total)
+        return self.df.iloc[positions[start:stop]], total
+
+# Pipeline de filtres partagé par les pages
+class FilterPipeline:
+    """Filtres vectorisés combinés en un masque, recherches textuelles ensuite"""
+
+    def __init__(self, df):
+        self.df = df
+        self._mask = None
+        self._text_filters = []
+        self._positions = None
+
+    def where(self, mask):
+        """Ajouter une condition quelconque (Series ou tableau booléen aligné sur la table)"""
+        mask = np.asarray(mask, dtype=bool)
+        if self._mask is None:
+            self._mask = mask.copy()
+        else:
+            self._mask &= mask
+        self._positions = None
+        return self
+
+    def isin(self, column, values):
+        """Valeur parmi une sélection (filtre ignoré si la sélection est vide)"""
+        if values:
+            self.where(self.df[column].isin(values))
+        return self
+
+    def equals(self, column, value, all_value=None):
+        """Égalité, sauf si la valeur est l'option « Tous »"""
+        if value != all_value:
+            self.where((self.df[column] == value).to_numpy(dtype=bool, na_value=False))
+        return self
+
+    def between(self, column, low=None, high=None):
+        """Intervalle (bornes incluses, None pour une borne ouverte)"""
+        values = self.df[column]
+        if low is not None:
+            self.where((values >= low).to_numpy(dtype=bool, na_value=False))
+        if high is not None:
+            self.where((values <= high).to_numpy(dtype=bool, na_value=False))
+        return self
+
+    def contains(self, columns, term):
+        """Sous-chaîne (insensible à la casse) dans au moins une des colonnes"""
+        if term:
+            self._text_filters.append((columns, term))
+            self._positions = None
+        return self
+
+    def positions(self):
+        """Positions des lignes retenues (None : toutes les lignes)"""
+        if self._positions is None:
+            if self._mask is None and not self._text_filters:
+                return None
+            positions = np.arange(len(self.df)) if self._mask is None else np.flatnonzero(self._mask)
+            for columns, term in self._text_filters:
+                found = np.zeros(len(positions), dtype=bool)
+                for column in columns:
+                    found |= self.df[column].iloc[positions].str.contains(
+                        term, case=False, regex=False, na=False).to_numpy()
+                positions = positions[found]
+            self._positions = positions
+        return self._positions
+
+    def count(self):
+        positions = self.positions()
+        return len(self.df) if positions is None else len(positions)
+
+    def apply(self, columns=None):
+        """Matérialiser la vue filtrée (uniquement les colonnes demandées)"""
+        df = self.df if columns is None else self.df[columns]
+        positions = self.positions()
+        return df if positions is None else df.iloc[positions]
+
+# Index de recherche plein texte (trigrammes, insensible aux accents)
+def normalize_text(text):
+    """Minuscules sans accents ('Émilie' -> 'emilie')"""
+    text = str(text).lower()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+class SearchIndex:
+    """Index trigrammes sur les valeurs distinctes des champs de recherche"""
+
+    def __init__(self, fields, df=None):
+        self.fields = fields
+        self.grams = defaultdict(set)          # trigramme -> {(champ, valeur)}
+        self.postings = defaultdict(set)       # (champ, valeur) -> {id}
+        self.record_keys = {}                  # id -> [(champ, valeur)]
+        if df is not None:
+            self._build(df)
+
+    def _build(self, df):
+        """Construction initiale : chaque valeur distincte n'est normalisée et découpée qu'une fois"""
+        ids = df['id'].to_numpy(dtype=object)
+        record_keys = []
+        for field in self.fields:
+            codes, uniques = pd.factorize(df[field].astype(object))
+            keys = [(field, normalize_text(value)) if isinstance(value, str) and value else None
+                    for value in uniques]
+            for code, positions in pd.Series(codes).groupby(codes).indices.items():
+                key = keys[code] if code >= 0 else None
+                if key is None:
+                    continue
+                if not self.postings[key]:
+                    for gram in self._trigrams(key[1]):
+                        self.grams[gram].add(key)
+                self.postings[key].update(ids[positions])
+            record_keys.append([keys[code] if code >= 0 else None for code in codes])
+        for record_id, keys in zip(ids, zip(*record_keys)):
+            self.record_keys[record_id] = [key for key in keys if key is not None]
+
+    @staticmethod
+    def _trigrams(value):
+        return {value[i:i + 3] for i in range(len(value) - 2)}
+
+    def _index(self, record_id, values):
+        keys = [(field, normalize_text(value)) for field, value in zip(self.fields, values)
+                if isinstance(value, str) and value]
+        self.record_keys[record_id] = keys
+        for key in keys:
+            if not self.postings[key]:
+                for gram in self._trigrams(key[1]):
+                    self.grams[gram].add(key)
+            self.postings[key].add(record_id)
+
+    def add(self, record):
+        self.remove(record['id'])
+        self._index(record['id'], [record.get(field) for field in self.fields])
+
+    def update(self, previous, current):
+        """Réindexer les lignes mises à jour dont un champ de recherche a changé"""
+        changed = np.zeros(len(current), dtype=bool)
+        for field in self.fields:
+            changed |= previous[field].to_numpy(dtype=object) != current[field].to_numpy(dtype=object)
+        for record in current.loc[changed, ['id'] + list(self.fields)].to_dict('records'):
+            self.add(record)
+
+    def remove(self, record_id):
+        for key in self.record_keys.pop(record_id, []):
+            ids = self.postings[key]
+            ids.discard(record_id)
+            if not ids:
+                del self.postings[key]
+                for gram in self._trigrams(key[1]):
+                    self.grams[gram].discard(key)
+
+    def _match(self, term, fields):
+        """Scores des enregistrements pour un terme (0 exact, 1 préfixe, 2 début de mot, 3 sous-chaîne)"""
+        if len(term) >= 3:
+            grams = sorted((self.grams.get(g, set()) for g in self._trigrams(term)), key=len)
+            candidates = set.intersection(*grams) if grams[0] else set()
+        else:
+            candidates = self.postings.keys()
+        scores = {}
+        for key in candidates:
+            field, value = key
+            if field not in fields or term not in value:
+                continue
+            if value == term:
+                score = 0
+            elif value.startswith(term):
+                score = 1
+            elif f" {term}" in value or f"-{term}" in value:
+                score = 2
+            else:
+                score = 3
+            for record_id in self.postings[key]:
+                if score < scores.get(record_id, 4):
+                    scores[record_id] = score
+        return scores
+
+    def search(self, query, fields=None, limit=None):
+        """Identifiants correspondant à tous les mots de la requête, les meilleurs d'abord"""
+        fields = set(fields or self.fields)
+        scores = None
+        for term in normalize_text(query).split():
+            term_scores = self._match(term, fields)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        ranked = sorted(scores, key=lambda record_id: (scores[record_id], record_id))
+        return ranked[:limit] if limit else ranked
+
+# Indicateurs des tableaux de bord maintenus par deltas
+KPI_SPECS = {
+    'students': {
+        'sums': ['moyenne_generale', 'taux_absence', 'valide'],
+        'counts': ['statut'],
+        'ranked': ['moyenne_generale']
+    },
+    'professors': {
+        'sums': ['heures_semaine', 'experience', 'taux_presence', 'derniere_evaluation'],
+        'counts': ['statut'],
+        'ranked': []
+    },
+    'employees': {
+        'sums': ['salaire', 'experience', 'taux_presence', 'evaluation'],
+        'counts': ['statut'],
+        'ranked': []
+    }
+}
+
+
+class TableKPIs:
+    """Agrégats d'une table mis à jour par delta à chaque mutation"""
+
+    # Au-delà de ce nombre de lignes, les listes triées sont fusionnées ou filtrées en
+    # une passe plutôt que modifiées entrée par entrée
+    BISECT_MAX = 64
+
+    def __init__(self, spec, df):
+        self.spec = spec
+        self.columns = set(spec['sums']) | set(spec['counts']) | set(spec['ranked'])
+        self.count = len(df)
+        self.sums = {col: float(df[col].sum()) for col in spec['sums']}
+        self.non_null = {col: int(df[col].notna().sum()) for col in spec['sums']}
+        self.value_counts = {col: Counter(df[col].value_counts().to_dict()) for col in spec['counts']}
+        # Listes triées de (valeur, id) : maximum et top-k en lecture directe
+        self.ranked = {
+            col: sorted(zip(df[col].to_numpy()[df[col].notna().to_numpy()].tolist(),
+                            df.loc[df[col].notna(), 'id'].tolist()))
+            for col in spec['ranked']
+        }
+
+    def _apply(self, record, sign):
+        self.count += sign
+        for col in self.spec['sums']:
+            value = record.get(col)
+            if not pd.isna(value):
+                self.sums[col] += sign * float(value)
+                self.non_null[col] += sign
+        for col in self.spec['counts']:
+            self.value_counts[col][record.get(col)] += sign
+        for col in self.spec['ranked']:
+            value = record.get(col)
+            if not pd.isna(value):
+                self._rank(col, (float(value), record['id']), sign)
+
+    def _rank(self, col, entry, sign):
+        ranked = self.ranked[col]
+        if sign > 0:
+            bisect.insort(ranked, entry)
+        else:
+            pos = bisect.bisect_left(ranked, entry)
+            if pos < len(ranked) and ranked[pos] == entry:
+                del ranked[pos]
+
+    def _apply_frame(self, df, sign):
+        self.count += sign * len(df)
+        for col in self.spec['sums']:
+            values = pd.to_numeric(df[col], errors='coerce')
+            self.sums[col] += sign * float(values.sum())
+            self.non_null[col] += sign * int(values.notna().sum())
+        for col in self.spec['counts']:
+            for value, n in df[col].value_counts().items():
+                self.value_counts[col][value] += sign * int(n)
+        for col in self.spec['ranked']:
+            present = df[col].notna().to_numpy()
+            entries = sorted(zip(df[col].to_numpy(dtype=float)[present].tolist(),
+                                 df['id'].to_numpy()[present].tolist()))
+            ranked = self.ranked[col]
+            if len(entries) <= self.BISECT_MAX:
+                for entry in entries:
+                    self._rank(col, entry, sign)
+            elif sign > 0:
+                self.ranked[col] = list(heapq.merge(ranked, entries))
+            else:
+                removed = Counter(entries)
+                kept = []
+                for entry in ranked:
+                    if removed[entry]:
+                        removed[entry] -= 1
+                    else:
+                        kept.append(entry)
+                self.ranked[col] = kept
+
+    def add(self, record):
+        self._apply(record, 1)
+
+    def remove(self, record):
+        self._apply(record, -1)
+
+    def add_frame(self, df):
+        """Ajouter un lot de lignes (sommes et comptages vectorisés)"""
+        self._apply_frame(df, 1)
+
+    def remove_frame(self, df):
+        """Retirer un lot de lignes"""
+        self._apply_frame(df, -1)
+
+    def total(self, column):
+        return self.sums[column]
+
+    def mean(self, column):
+        return self.sums[column] / self.non_null[column] if self.non_null[column] else float('nan')
+
+    def count_of(self, column, value):
+        return self.value_counts[column][value]
+
+    def max(self, column):
+        ranked = self.ranked[column]
+        return ranked[-1][0] if ranked else float('nan')
+
+    def top(self, column, k=10):
+        """Identifiants des k meilleures valeurs, dans l'ordre décroissant"""
+        return [record_id for _, record_id in reversed(self.ranked[column][-k:])]
+
+# Moteur de calcul des moyennes
+class GradeEngine:
+    """Moyennes pondérées par étudiant, module, classe et spécialité"""
+
+    SUMS = ['points', 'coefficients', 'notes', 'somme_notes', 'somme_carres', 'valides']
+
+    def __init__(self, grades, students):
+        detail = self.sums(grades)
+        lookup = students.drop_duplicates('id', keep='last').set_index('id')
+        for column in ['classe', 'specialite', 'nom', 'prenom']:
+            detail[column] = detail['student_id'].map(lookup[column])
+        self.detail = detail
+
+    @staticmethod
+    def sums(grades):
+        """Sommes par (étudiant, module)"""
+        note = pd.to_numeric(grades['note'], errors='coerce').to_numpy(dtype=float)
+        coefficient = pd.to_numeric(grades['coefficient'], errors='coerce').fillna(1).to_numpy(dtype=float)
+        valide = grades['valide'].fillna(False).to_numpy(dtype=bool)
+        # Clé entière (étudiant, module) puis sommes par np.bincount
+        student_codes, student_ids = pd.factorize(grades['student_id'])
+        module_codes, modules = pd.factorize(grades['module'])
+        width = max(len(modules), 1)
+        keys, inverse = np.unique(student_codes.astype(np.int64) * width + module_codes, return_inverse=True)
+        note_filled = np.nan_to_num(note)
+        weights = {
+            'points': note_filled * coefficient,
+            'coefficients': coefficient,
+            'notes': None,
+            'somme_notes': note_filled,
+            'somme_carres': note_filled ** 2,
+            'valides': valide
+        }
+        detail = pd.DataFrame({
+            'student_id': student_ids.take(keys // width),
+            'module': modules.take(keys % width)
+        })
+        for column, values in weights.items():
+            detail[column] = np.bincount(inverse, weights=values, minlength=len(keys))
+        detail['notes'] = detail['notes'].astype(int)
+        return detail
+
+    def _scope(self, classe=None, specialite=None, student_id=None):
+        detail = self.detail
+        if classe is not None:
+            detail = detail[detail['classe'] == classe]
+        if specialite is not None:
+            detail = detail[detail['specialite'] == specialite]
+        if student_id is not None:
+            detail = detail[detail['student_id'] == student_id]
+        return detail
+
+    @staticmethod
+    def _summarize(sums):
+        result = sums[[]].copy()
+        result['moyenne_ponderee'] = (sums['points'] / sums['coefficients']).round(2)
+        result['moyenne'] = (sums['somme_notes'] / sums['notes']).round(2)
+        variance = (sums['somme_carres'] - sums['somme_notes'] ** 2 / sums['notes']) / (sums['notes'] - 1)
+        result['ecart_type'] = np.sqrt(variance.clip(lower=0)).where(sums['notes'] > 1).round(2)
+        result['notes'] = sums['notes']
+        result['coefficients'] = sums['coefficients']
+        result['taux_validation'] = (sums['valides'] / sums['notes'] * 100).round(1)
+        return result
+
+    def averages(self, level, classe=None, specialite=None, student_id=None):
+        """Moyennes pondérées par 'student_id', 'module', 'classe' ou 'specialite'"""
+        sums = self._scope(classe, specialite, student_id).groupby(level, sort=True)[self.SUMS].sum()
+        return self._summarize(sums)
+
+    @staticmethod
+    def dense_rank(values, ascending=False):
+        """Classement dense : les ex aequo partagent un rang, sans trou après eux"""
+        return values.rank(method='dense', ascending=ascending).astype(int)
+
+    def ranking(self, classe=None, specialite=None):
+        """Classement des étudiants d'une classe ou d'une spécialité par moyenne pondérée"""
+        scope = self._scope(classe, specialite)
+        ranking = self._summarize(scope.groupby('student_id', sort=False)[self.SUMS].sum())
+        names = scope.drop_duplicates('student_id').set_index('student_id')[['nom', 'prenom']]
+        ranking = ranking.join(names)
+        ranking['classement'] = self.dense_rank(ranking['moyenne_ponderee'])
+        return ranking.sort_values(['classement', 'nom']).reset_index()
+
+# Champs dérivés des étudiants (moyenne générale, validation, crédits)
+class DerivedStudentFields:
+    """Sommes courantes des notes par étudiant et par (étudiant, module)"""
+
+    def __init__(self, grades):
+        sums = GradeEngine.sums(grades)
+        keys = zip(sums['student_id'].tolist(), sums['module'].tolist())
+        self.modules = {key: [points, coefficients] for key, points, coefficients
+                        in zip(keys, sums['points'].tolist(), sums['coefficients'].tolist())}
+        totals = sums.groupby('student_id', sort=False)[['points', 'coefficients']].sum()
+        self.students = defaultdict(lambda: [0.0, 0.0], {
+            student_id: [points, coefficients] for student_id, points, coefficients
+            in zip(totals.index.tolist(), totals['points'].tolist(), totals['coefficients'].tolist())
         })
+        # Moyenne et crédits de départ de chaque étudiant ayant des notes (indexés par id)
+        validated = (sums['points'] / sums['coefficients'].where(sums['coefficients'] > 0) >= 10)
+        self.initial_fields = pd.DataFrame({
+            'moyenne': (totals['points'] / totals['coefficients'].where(totals['coefficients'] > 1e-9)).round(2),
+            'credits': validated.groupby(sums['student_id'], sort=False).sum().reindex(totals.index) * CREDITS_PAR_MODULE
+        })
+
+    @staticmethod
+    def _validated(sums):
+        return sums is not None and sums[1] > 0 and sums[0] / sums[1] >= 10
+
+    def apply(self, grades, sign=1):
+        """Ajouter (sign=1) ou retirer (sign=-1) des notes ; renvoie les étudiants touchés"""
+        changes = {}
+        sums = GradeEngine.sums(grades)
+        for student_id, module, points, coefficients in sums[['student_id', 'module', 'points', 'coefficients']].itertuples(index=False):
+            key = (student_id, module)
+            before = self._validated(self.modules.get(key))
+            module_sums = self.modules.setdefault(key, [0.0, 0.0])
+            module_sums[0] += sign * points
+            module_sums[1] += sign * coefficients
+            if module_sums[1] <= 1e-9:
+                del self.modules[key]
+            after = self._validated(self.modules.get(key))
+            totals = self.students[student_id]
+            totals[0] += sign * points
+            totals[1] += sign * coefficients
+            changes[student_id] = changes.get(student_id, 0) + CREDITS_PAR_MODULE * (int(after) - int(before))
+        return {student_id: (self.average(student_id), credits) for student_id, credits in changes.items()}
+
+    def average(self, student_id):
+        """Moyenne générale pondérée courante d'un étudiant"""
+        points, coefficients = self.students.get(student_id, (0.0, 0.0))
+        return round(points / coefficients, 2) if coefficients > 1e-9 else None
+
+# Intégrité référentielle
+# Relations : (table enfant, colonne) -> (table parente, colonnes de la clé, suppression du parent)
+# 'cascade' supprime les lignes enfants, 'tombstone' les conserve en remplaçant la
+# référence par TOMBSTONE : les séances d'un professeur supprimé restent à réaffecter
+# (valeur ignorée par le moteur de conflits, comme les autres séances « À définir »)
+RELATIONS = {
+    ('grades', 'student_id'): ('students', ['id'], 'cascade'),
+    ('timetable', 'professeur'): ('professors', ['prenom', 'nom'], 'tombstone')
+}
+TOMBSTONE = "À définir"
+# Essais de réparation lorsque les tables changent pendant le calcul des corrections
+INTEGRITY_REPAIR_ATTEMPTS = 3
+
+# Clés devant être uniques : les doublons des clés 'repair' sont supprimés par la
+# réparation (dernière occurrence conservée : la plus récente, comme une note ressaisie),
+# les autres sont seulement signalés
+# Une note par (étudiant, module, examen) : une nouvelle saisie remplace la précédente
+GRADE_KEY = ['student_id', 'module', 'examen']
+UNIQUE_KEYS = {
+    'students': {'repair': [['id']], 'report': [['cne']]},
+    'professors': {'repair': [['id']], 'report': [['email']]},
+    'employees': {'repair': [['id']], 'report': [['email']]},
+    'grades': {'repair': [GRADE_KEY], 'report': []},
+    'timetable': {'repair': [['id']], 'report': []}
+}
+
+class IntegrityEngine:
+    """Contrôles d'intégrité vectorisés : orphelins et clés en double"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    @staticmethod
+    def parent_keys(df, columns):
+        """Valeurs de la clé parente (colonnes jointes par un espace)"""
+        keys = df[columns[0]].astype(str)
+        for col in columns[1:]:
+            keys = keys.str.cat(df[col].astype(str), sep=' ')
+        return keys
+
+    @staticmethod
+    def isin(values, keys):
+        """Appartenance de chaque valeur à l'ensemble des clés"""
+        keys = keys.unique()
+        if pc is not None:
+            try:
+                return pc.is_in(pa.array(values, from_pandas=True),
+                                value_set=pa.array(keys, from_pandas=True)).to_numpy(zero_copy_only=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                pass
+        return pd.Index(keys).get_indexer(values) >= 0
+
+    def orphan_mask(self, child, column):
+        """Lignes enfants dont la référence n'existe pas dans la table parente (anti-jointure)"""
+        parent, columns, _ = RELATIONS[(child, column)]
+        values = self.tables[child][column]
+        keys = self.parent_keys(self.tables[parent], columns)
+        return (values.notna() & (values != TOMBSTONE)).to_numpy() & ~self.isin(values, keys)
+
+    def orphans(self):
+        """{(table enfant, colonne): masque des orphelins}"""
+        return {relation: self.orphan_mask(*relation) for relation in RELATIONS}
+
+    def duplicate_mask(self, table, columns):
+        """Occurrences en double d'une clé (sauf la dernière)"""
+        df = self.tables[table]
+        codes = [pd.factorize(df[col])[0] + 1 for col in columns]
+        sizes = [int(c.max()) + 1 if len(c) else 1 for c in codes]
+        if np.prod(sizes, dtype=float) < 2 ** 63:
+            combined = pd.Series(np.ravel_multi_index(codes, sizes) if len(codes) > 1 else codes[0])
+            return combined.duplicated(keep='last').to_numpy()
+        return pd.DataFrame(codes).T.duplicated(keep='last').to_numpy()
+
+    def duplicates(self, kind=None):
+        """{(table, colonnes, 'repair' ou 'report'): masque des doublons}"""
+        return {(table, tuple(columns), group): self.duplicate_mask(table, columns)
+                for table, keys in UNIQUE_KEYS.items() for group, key_sets in keys.items()
+                if kind in (None, group) for columns in key_sets}
+
+    def report(self):
+        """Une ligne par contrôle : anomalies trouvées et exemples"""
+        rows = []
+        for (child, column), mask in self.orphans().items():
+            parent = RELATIONS[(child, column)][0]
+            examples = self.tables[child][column][mask].unique()[:3]
+            rows.append({'controle': f"{child}.{column} → {parent}", 'type': 'orphelins',
+                         'anomalies': int(mask.sum()), 'exemples': ', '.join(map(str, examples))})
+        for (table, columns, group), mask in self.duplicates().items():
+            examples = self.tables[table].loc[mask, list(columns)].head(3).astype(str).agg(' / '.join, axis=1) \
+                if mask.any() else []
+            rows.append({'controle': f"{table} ({', '.join(columns)})",
+                         'type': 'doublons' if group == 'repair' else 'doublons (signalés)',
+                         'anomalies': int(mask.sum()), 'exemples': ', '.join(examples)})
+        return pd.DataFrame(rows, columns=['controle', 'type', 'anomalies', 'exemples'])
+
+# Analyse par spécialité (une agrégation par table)
+def compute_specialite_analytics(students, professors):
+    """Effectifs, validation, moyennes, ratio et coûts par spécialité"""
+    student_stats = students.groupby('specialite').agg(
+        etudiants=('id', 'size'),
+        valides=('valide', 'sum'),
+        moyenne_etudiants=('moyenne_generale', 'mean')
+    )
+    professor_stats = professors.groupby('specialite').agg(
+        professeurs=('id', 'size'),
+        experience_profs=('experience', 'mean')
+    )
+    stats = student_stats.join(professor_stats, how='outer')
+    stats[['etudiants', 'valides', 'professeurs']] = stats[['etudiants', 'valides', 'professeurs']].fillna(0).astype(int)
+    stats['ratio'] = np.where(stats['professeurs'] > 0, stats['etudiants'] / stats['professeurs'].where(stats['professeurs'] > 0), 0.0)
+    stats['taux_validation'] = (stats['valides'] / stats['etudiants'].where(stats['etudiants'] > 0) * 100).round(1)
+    stats['cout_etudiant'] = stats.index.map(lambda specialite: COUT_ETUDIANT_PAR_SPECIALITE.get(specialite, 6000)).astype(float)
+    stats['cout_total'] = stats['etudiants'] * stats['cout_etudiant']
+    return stats.rename_axis('specialite').reset_index()
+
+# Import en flux (CSV / Excel)
+IMPORT_COLUMNS = {
+    'students': ['cne', 'nom', 'prenom', 'sexe', 'date_naissance',
+                 'ville', 'email', 'telephone', 'specialite', 'classe',
+                 'niveau', 'annee_universitaire', 'statut'],
+    'professors': ['nom', 'prenom', 'sexe', 'specialite', 'matieres',
+                   'experience', 'email', 'telephone', 'ville', 'statut'],
+    'employees': ['nom', 'prenom', 'sexe', 'poste', 'service',
+                  'date_recrutement', 'salaire', 'email', 'telephone', 'statut']
+}
+IMPORT_NUMERIC_COLUMNS = {'experience', 'salaire', 'annee_universitaire'}
+IMPORT_DEFAULTS = {
+    'students': {'moyenne_generale': 10.0, 'taux_absence': 0.0, 'credits_obtenus': 0,
+                 'credits_totaux': CREDITS_MAX, 'valide': True}
+}
+IMPORT_CHUNK_SIZE = 20_000
+# Taille des blocs d'octets lus par pyarrow (les blocs de lignes sont recoupés ensuite)
+IMPORT_BLOCK_BYTES = 4 * 1024 * 1024
+# Clé naturelle utilisée pour rapprocher un import des enregistrements existants
+NATURAL_KEYS = {'students': 'cne', 'professors': 'email', 'employees': 'email'}
+
+class ChunkedImporter:
+    """Lecture d'un fichier importé par blocs de `chunk_size` lignes"""
+
+    def __init__(self, source, filename, chunk_size=IMPORT_CHUNK_SIZE):
+        self.source = source
+        self.extension = os.path.splitext(filename)[1].lower()
+        self.chunk_size = chunk_size
+        self.size = getattr(source, 'size', None)
+        self.rows_read = 0
+        self.progress = 0.0
+
+    def preview(self, n=5):
+        """Premières lignes du fichier (seul le premier bloc est lu)"""
+        for chunk in self._read(min(self.chunk_size, max(n, 1))):
+            return chunk.head(n)
+        return pd.DataFrame()
+
+    def chunks(self):
+        """Blocs successifs du fichier, sous forme de DataFrames"""
+        self.rows_read = 0
+        for chunk in self._read(self.chunk_size):
+            self.rows_read += len(chunk)
+            yield chunk
+
+    def _read(self, chunk_size):
+        self.source.seek(0)
+        if self.extension == '.csv':
+            return self._read_csv(chunk_size)
+        if self.extension == '.xlsx' and openpyxl is not None:
+            return self._read_xlsx(chunk_size)
+        return self._read_excel()
+
+    def _read_csv(self, chunk_size):
+        if pa_csv is not None:
+            # Colonnes lues comme texte : pas d'inférence de type divergente d'un bloc à l'autre
+            header = pa_csv.open_csv(self.source).schema.names
+            self.source.seek(0)
+            reader = pa_csv.open_csv(
+                self.source,
+                read_options=pa_csv.ReadOptions(block_size=IMPORT_BLOCK_BYTES),
+                convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in header},
+                                                      strings_can_be_null=True)
+            )
+            # pyarrow découpe le fichier en blocs d'octets : les lots sont regroupés
+            # puis recoupés pour produire des blocs de `chunk_size` lignes exactement
+            pending, rows = [], 0
+            for batch in reader:
+                self._track_position()
+                pending.append(batch)
+                rows += batch.num_rows
+                if rows < chunk_size:
+                    continue
+                table = pa.Table.from_batches(pending)
+                for start in range(0, rows - chunk_size + 1, chunk_size):
+                    yield table.slice(start, chunk_size).to_pandas()
+                rest = table.slice(rows - rows % chunk_size)
+                pending, rows = rest.to_batches(), rest.num_rows
+            if rows:
+                yield pa.Table.from_batches(pending).to_pandas()
+        else:
+            # Fermeture explicite du lecteur : le fichier source reste ouvert pour la relecture
+            with pd.read_csv(self.source, chunksize=chunk_size, dtype=str) as reader:
+                for chunk in reader:
+                    self._track_position()
+                    yield chunk
+
+    def _read_xlsx(self, chunk_size):
+        workbook = openpyxl.load_workbook(self.source, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(value) if value is not None else f"Colonne {i + 1}" for i, value in enumerate(next(rows, ()))]
+            total = max((sheet.max_row or 0) - 1, 1)
+            buffer, read = [], 0
+            for row in rows:
+                buffer.append(row[:len(header)])
+                if len(buffer) == chunk_size:
+                    read += len(buffer)
+                    self.progress = min(read / total, 1.0)
+                    yield pd.DataFrame(buffer, columns=header)
+                    buffer = []
+            if buffer:
+                self.progress = 1.0
+                yield pd.DataFrame(buffer, columns=header)
+        finally:
+            workbook.close()
+
+    def _read_excel(self):
+        # Ancien format .xls : pas de lecture en flux possible
+        self.progress = 1.0
+        yield pd.read_excel(self.source)
+
+    def _track_position(self):
+        if self.size:
+            self.progress = min(self.source.tell() / self.size, 1.0)
+
+    @staticmethod
+    def map_chunk(chunk, data_type, mapping):
+        """Appliquer le mapping de colonnes et les valeurs par défaut à un bloc entier"""
+        records = pd.DataFrame(index=range(len(chunk)))
+        for target, source in mapping.items():
+            values = chunk[source].reset_index(drop=True) if source in chunk.columns else None
+            if values is not None and target in IMPORT_NUMERIC_COLUMNS:
+                values = pd.to_numeric(values, errors='coerce')
+            elif values is not None:
+                # Texte nettoyé une fois : la comparaison de fusion et l'écriture voient la même valeur
+                stripped = values.str.strip() if values.dtype == object or pd.api.types.is_string_dtype(values) else values
+                values = stripped.where(stripped.notna(), values)
+            records[target] = values
+        # uuid4 complets (122 bits aléatoires) : pas de collision avec l'index unique sur
+        # `id`, même pour des imports de plusieurs centaines de milliers de lignes
+        records.insert(0, 'id', [uuid.uuid4().hex for _ in range(len(chunk))])
+        for column, value in IMPORT_DEFAULTS.get(data_type, {}).items():
+            records[column] = value
+        if data_type == 'students':
+            records['date_inscription'] = datetime.now().strftime('%Y-%m-%d')
+        return records
+
+class UpsertMerger:
+    """Fusion d'un import avec une table existante sur sa clé naturelle"""
+
+    def __init__(self, existing, data_type, columns):
+        self.key = NATURAL_KEYS[data_type]
+        self.columns = [column for column in columns if column != self.key and column in existing.columns]
+        self.existing = existing
+        keys = self._normalize(existing[self.key])
+        duplicated = keys.duplicated(keep=False).to_numpy()
+        self.ambiguous = set(keys[duplicated].dropna())
+        self.index = pd.Index(keys[~duplicated])
+        self.positions = np.flatnonzero(~duplicated)
+        self.seen = set()
+        self.inserts, self.updates, self.diffs, self.conflicts = [], [], [], []
+        self.unchanged = 0
+        self.rows = 0
+
+    @staticmethod
+    def _normalize(values):
+        return values.astype('string').str.strip().str.lower().replace('', pd.NA)
+
+    def add(self, records):
+        """Classer un bloc d'enregistrements déjà mappés (ChunkedImporter.map_chunk)"""
+        records = records.reset_index(drop=True)
+        offset, self.rows = self.rows, self.rows + len(records)
+        keys = self._normalize(records[self.key])
+        motif = pd.Series(None, index=records.index, dtype=object)
+        motif[keys.isna().to_numpy()] = "Clé manquante"
+        duplicate = (keys.duplicated() | keys.isin(self.seen)).to_numpy(dtype=bool, na_value=False)
+        motif[duplicate & motif.isna().to_numpy()] = "Doublon dans le fichier"
+        ambiguous = keys.isin(self.ambiguous).to_numpy(dtype=bool, na_value=False)
+        motif[ambiguous & motif.isna().to_numpy()] = "Clé présente plusieurs fois dans la base"
+        valid = motif.isna().to_numpy()
+        self.seen.update(keys[valid])
+        if not valid.all():
+            self.conflicts.append(pd.DataFrame({
+                'Ligne': np.flatnonzero(~valid) + offset + 2,
+                'Clé': records.loc[~valid, self.key].to_numpy(),
+                'Motif': motif[~valid].to_numpy()
+            }))
+
+        matched = self.index.get_indexer(keys.fillna(''))
+        new = valid & (matched < 0)
+        hit = valid & (matched >= 0)
+        if new.any():
+            self.inserts.append(records[new])
+        if hit.any():
+            self._compare(records[hit].reset_index(drop=True), self.positions[matched[hit]])
+
+    def _compare(self, incoming, positions):
+        current = self.existing.iloc[positions].reset_index(drop=True)
+        changed_any = np.zeros(len(incoming), dtype=bool)
+        changes = []
+        for column in self.columns:
+            new_values, old_values = incoming[column], current[column]
+            if column in IMPORT_NUMERIC_COLUMNS:
+                differs = new_values.notna() & (pd.to_numeric(old_values, errors='coerce') != new_values)
+            else:
+                differs = new_values.notna() & (new_values.astype(str) != old_values.astype(str))
+            differs = differs.to_numpy(dtype=bool, na_value=False)
+            if differs.any():
+                changed_any |= differs
+                changes.append(pd.DataFrame({
+                    'id': current.loc[differs, 'id'].to_numpy(),
+                    'Clé': current.loc[differs, self.key].to_numpy(),
+                    'Colonne': column,
+                    'Ancienne valeur': old_values[differs].astype(str).to_numpy(),
+                    'Nouvelle valeur': new_values[differs].to_numpy()
+                }))
+        self.unchanged += int((~changed_any).sum())
+        if changes:
+            diff = pd.concat(changes, ignore_index=True)
+            self.diffs.append(diff.drop(columns='id'))
+            updates = defaultdict(dict)
+            for record_id, column, value in diff[['id', 'Colonne', 'Nouvelle valeur']].itertuples(index=False):
+                updates[record_id][column] = value
+            self.updates.extend(updates.items())
+
+    def summary(self):
+        """Nombre de lignes par issue de la fusion"""
+        return {
+            'insertions': sum(len(df) for df in self.inserts),
+            'mises_a_jour': len(self.updates),
+            'inchanges': self.unchanged,
+            'conflits': sum(len(df) for df in self.conflicts)
+        }
+
+    def diff(self):
+        return pd.concat(self.diffs, ignore_index=True) if self.diffs else pd.DataFrame(columns=['Clé', 'Colonne', 'Ancienne valeur', 'Nouvelle valeur'])
+
+    def conflict_report(self):
+        return pd.concat(self.conflicts, ignore_index=True) if self.conflicts else pd.DataFrame(columns=['Ligne', 'Clé', 'Motif'])
+
+# Export en flux (CSV, Excel, Parquet, Feather)
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'Feather': ('.feather', 'application/vnd.apache.arrow.file')
+}
+EXPORT_COMPRESSIONS = {'Aucune': None, 'gzip': ('.gz', 'application/gzip'), 'zip': ('.zip', 'application/zip')}
+EXPORT_CHUNK_SIZE = 50_000
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+class StreamingWorkbook:
+    """Classeur xlsx écrit en mode écriture seule d'openpyxl"""
+
+    INVALID_TITLE_CHARS = str.maketrans({c: '_' for c in '[]:*?/\\'})
+
+    def __init__(self, chunk_size=EXPORT_CHUNK_SIZE):
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.chunk_size = chunk_size
+        self.titles = set()
+        self.header_font = openpyxl.styles.Font(bold=True, color='FFFFFF')
+        self.header_fill = openpyxl.styles.PatternFill('solid', fgColor='1E3A8A')
+
+    def _title(self, title):
+        # Titres Excel : 31 caractères au plus, uniques, sans []:*?/\
+        base = str(title).translate(self.INVALID_TITLE_CHARS)[:31] or 'Feuille'
+        title, suffix = base, 1
+        while title.lower() in self.titles:
+            suffix += 1
+            title = f"{base[:31 - len(str(suffix)) - 1]}_{suffix}"
+        self.titles.add(title.lower())
+        return title
+
+    def _column_formats(self, df):
+        formats = []
+        for column in df.columns:
+            dtype = df[column].dtype
+            if pd.api.types.is_float_dtype(dtype):
+                formats.append('0.00')
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                formats.append('yyyy-mm-dd')
+            else:
+                formats.append(None)
+        return formats
+
+    def add_sheet(self, title, df):
+        """Ajouter une feuille contenant le DataFrame (en-tête stylé, volets figés)"""
+        sheet = self.workbook.create_sheet(self._title(title))
+        sheet.freeze_panes = 'A2'
+        sample = df.head(100)
+        for i, column in enumerate(df.columns, start=1):
+            width = max([len(str(column))] + [len(str(value)) for value in sample[column]])
+            sheet.column_dimensions[openpyxl.utils.get_column_letter(i)].width = min(width + 2, 50)
+
+        header = []
+        for column in df.columns:
+            cell = openpyxl.cell.WriteOnlyCell(sheet, value=str(column))
+            cell.font = self.header_font
+            cell.fill = self.header_fill
+            header.append(cell)
+        sheet.append(header)
+
+        formats = self._column_formats(df)
+        styled = [i for i, number_format in enumerate(formats) if number_format]
+        for start in range(0, len(df), self.chunk_size):
+            chunk = df.iloc[start:start + self.chunk_size]
+            # Valeurs manquantes converties en cellules vides pour tout le bloc
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                if styled:
+                    row = list(row)
+                    for i in styled:
+                        if row[i] is not None:
+                            cell = openpyxl.cell.WriteOnlyCell(sheet, value=row[i])
+                            cell.number_format = formats[i]
+                            row[i] = cell
+                sheet.append(row)
+        return sheet
+
+    def save(self, target):
+        self.workbook.save(target)
+
+def timetable_workbook(timetable, split_column=None):
+    """Classeur de l'emploi du temps : une feuille par valeur de `split_column`"""
+    columns = ['jour', 'heure', 'salle', 'module', 'professeur', 'classe']
+    workbook = StreamingWorkbook()
+    if split_column:
+        groups = timetable.groupby(split_column, sort=True)
+        summary = groups.agg(
+            Séances=('id', 'size'),
+            Classes=('classe', 'nunique'),
+            Professeurs=('professeur', 'nunique'),
+            Salles=('salle', 'nunique')
+        ).reset_index().rename(columns={split_column: split_column.capitalize()})
+        workbook.add_sheet('Résumé', summary)
+        for value, group in groups:
+            workbook.add_sheet(value, group[columns])
+    else:
+        summary = pd.DataFrame({
+            'Statistique': ['Nombre de séances', 'Nombre de classes', 'Nombre de professeurs'],
+            'Valeur': [len(timetable), timetable['classe'].nunique(), timetable['professeur'].nunique()]
+        })
+        workbook.add_sheet('Emploi du temps', timetable)
+        workbook.add_sheet('Résumé', summary)
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+class DataExporter:
+    """Export écrit bloc par bloc dans un fichier temporaire"""
+
+    def __init__(self, fmt='CSV', compression='Aucune', chunk_size=EXPORT_CHUNK_SIZE, sheet_name='Données'):
+        self.fmt = fmt
+        # Un classeur xlsx est déjà une archive zip : pas de seconde compression
+        self.compression = None if fmt == 'Excel' else EXPORT_COMPRESSIONS[compression]
+        self.chunk_size = chunk_size
+        self.sheet_name = sheet_name
+
+    @staticmethod
+    def available_formats():
+        """Formats d'export utilisables dans l'environnement courant"""
+        optional = {'Excel': openpyxl, 'Parquet': pa, 'Feather': pa}
+        return [fmt for fmt in EXPORT_FORMATS if optional.get(fmt, True) is not None]
+
+    def file_name(self, base):
+        name = f"{base}{EXPORT_FORMATS[self.fmt][0]}"
+        return name + self.compression[0] if self.compression else name
+
+    @property
+    def mime(self):
+        return self.compression[1] if self.compression else EXPORT_FORMATS[self.fmt][1]
+
+    def _chunks(self, df):
+        for start in range(0, max(len(df), 1), self.chunk_size):
+            yield df.iloc[start:start + self.chunk_size]
+
+    def write(self, df, base='export'):
+        """Écrire l'export dans un fichier temporaire, renvoyé rembobiné"""
+        spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+        if self.compression is None:
+            self._write(df, spool)
+        elif self.compression[0] == '.gz':
+            with gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=6) as target:
+                self._write(df, target)
+        else:
+            with zipfile.ZipFile(spool, 'w', zipfile.ZIP_DEFLATED) as archive:
+                with archive.open(f"{base}{EXPORT_FORMATS[self.fmt][0]}", 'w') as target:
+                    self._write(df, target)
+        spool.seek(0)
+        return spool
+
+    def to_bytes(self, df, base='export'):
+        """Contenu complet de l'export en mémoire (pour st.download_button)"""
+        with self.write(df, base) as spool:
+            return spool.read()
+
+    def _write(self, df, target):
+        if self.fmt == 'CSV':
+            text = io.TextIOWrapper(target, encoding='utf-8', newline='', write_through=True)
+            for i, chunk in enumerate(self._chunks(df)):
+                chunk.to_csv(text, index=False, header=(i == 0))
+            text.detach()
+        elif self.fmt == 'Excel':
+            workbook = StreamingWorkbook(self.chunk_size)
+            workbook.add_sheet(self.sheet_name, df)
+            workbook.save(target)
+        else:
+            schema = pa.Schema.from_pandas(df.head(self.chunk_size), preserve_index=False)
+            if self.fmt == 'Parquet':
+                writer = pq.ParquetWriter(target, schema, compression='snappy')
+            else:
+                codec = 'lz4' if pa.Codec.is_available('lz4') else None
+                writer = pa.ipc.new_file(target, schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+            with writer:
+                for chunk in self._chunks(df):
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+# Cache des figures Plotly
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+class CachedFigure(go.Figure):
+    """Figure servie depuis sa sérialisation JSON"""
+
+    def __init__(self, spec):
+        super().__init__()
+        self._spec = spec
+
+    def to_dict(self):
+        return json.loads(self._spec)
+
+class FigureCache:
+    """Cache LRU des figures sérialisées, plafonné en octets"""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def figure(self, key, build):
+        """Figure en cache pour la clé, construite par build() en cas d'absence"""
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return CachedFigure(spec)
+        spec = pio.to_json(build(), validate=False)
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries:
+                self._entries[key] = spec
+                self.size += len(spec)
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return CachedFigure(spec)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+# Densités (KDE gaussienne binnée)
+KDE_GRID_SIZE = 256
+
+def kernel_density(values, grid_size=KDE_GRID_SIZE):
+    """Courbe de densité gaussienne (x, densité) par binning et convolution FFT"""
+    values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype=float)
+    n = len(values)
+    bandwidth = values.std(ddof=1) * n ** (-1 / 5) if n > 1 else 0.0
+    if not bandwidth > 0:
+        return np.array([]), np.array([])
+    low, high = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    grid = np.linspace(low, high, grid_size)
+    step = grid[1] - grid[0]
+    # Binning linéaire : chaque valeur est répartie entre ses deux points de grille voisins
+    position = (values - low) / step
+    left = np.clip(np.floor(position).astype(np.int64), 0, grid_size - 2)
+    right_weight = position - left
+    weights = (np.bincount(left, weights=1 - right_weight, minlength=grid_size)
+               + np.bincount(left + 1, weights=right_weight, minlength=grid_size))
+    offsets = np.arange(-(grid_size - 1), grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 1 << int(np.ceil(np.log2(3 * grid_size - 2)))
+    convolution = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size)
+    density = convolution[grid_size - 1:2 * grid_size - 1] / n
+    return grid, np.clip(density, 0, None)
+
+# Graphiques pour grands volumes : la taille envoyée au navigateur reste bornée
+CHART_WEBGL_THRESHOLD = int(os.environ.get('UNIVERSITY_CHART_WEBGL', 5_000))
+CHART_DENSITY_THRESHOLD = int(os.environ.get('UNIVERSITY_CHART_DENSITY', 50_000))
+CHART_DENSITY_BINS = 80
+
+def scatter_chart(df, x, y, title=None, labels=None, **kwargs):
+    """Nuage de points : SVG, WebGL ou densité 2D selon le volume"""
+    if len(df) <= CHART_WEBGL_THRESHOLD:
+        return px.scatter(df, x=x, y=y, title=title, labels=labels, **kwargs)
+    if len(df) <= CHART_DENSITY_THRESHOLD:
+        return px.scatter(df, x=x, y=y, title=title, labels=labels, render_mode='webgl', **kwargs)
+    return density_chart(df, x, y, title, labels)
+
+def density_chart(df, x, y, title=None, labels=None, bins=CHART_DENSITY_BINS):
+    """Carte de densité calculée côté serveur"""
+    labels = labels or {}
+    data = df[[x, y]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(data[x].to_numpy(dtype=float), data[y].to_numpy(dtype=float), bins=bins)
+    counts = np.where(counts > 0, counts, np.nan).T
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts,
+        colorscale='Blues',
+        colorbar=dict(title='Effectif'),
+        hovertemplate=f"{labels.get(x, x)}: %{{x:.2f}}<br>{labels.get(y, y)}: %{{y:.2f}}<br>Effectif: %{{z}}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"{title} (densité, {len(data)} points)" if title else None,
+        xaxis_title=labels.get(x, x),
+        yaxis_title=labels.get(y, y)
+    )
+    return fig
+
+def histogram_chart(values, nbins=20, title=None, color=None, label=None):
+    """Histogramme dont les classes sont calculées côté serveur"""
+    values = pd.to_numeric(pd.Series(values), errors='coerce').dropna()
+    counts, edges = np.histogram(values.to_numpy(dtype=float), bins=nbins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color=color,
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="%{customdata[0]:.2f} – %{customdata[1]:.2f}<br>Effectif: %{y}<extra></extra>"
+    ))
+    fig.update_layout(title=title, bargap=0, xaxis_title=label or values.name, yaxis_title="count")
+    return fig
 
 # Classe pour la gestion des données CRUD
 class DataManager:
-    def __init__(self):
+    def __init__(self, storage=None):
         self.fake = Faker('fr_FR')
-        self.students = self._load_initial_students()
-        self.professors = self._load_initial_professors()
-        self.employees = self._load_initial_employees()
-        self.grades = self._generate_grades(self.students)
-        self.timetable = self._generate_timetable(self.professors)
-    
+        self.storage = storage if storage is not None else create_storage_backend()
+        self.versions = {table: 0 for table in DATA_TABLES}
+        self._tables = {}
+        self._lock = threading.RLock()
+        self._conflict_engine = None
+        self._indexes = {}
+        self._search_indexes = {}
+        self._kpis = {}
+        self._analytics = {}
+        self._derived_fields = None
+
+        # Le jeu de données n'est généré qu'au premier démarrage ; ensuite les
+        # tables sont lues depuis le stockage, à la demande.
+        if not all(self.storage.has_table(table) for table in DATA_TABLES):
+            self._seed_storage()
+        # Champs dérivés des étudiants alignés sur les notes dès le démarrage
+        self._student_fields()
+
+    # Tables chargées paresseusement depuis le stockage
+    @property
+    def students(self):
+        return self._get_table('students')
+
+    @property
+    def professors(self):
+        return self._get_table('professors')
+
+    @property
+    def employees(self):
+        return self._get_table('employees')
+
+    @property
+    def grades(self):
+        return self._get_table('grades')
+
+    @property
+    def timetable(self):
+        return self._get_table('timetable')
+
+    def _get_table(self, table):
+        with self._lock:
+            if table not in self._tables:
+                self._tables[table] = AppendBuffer(self.storage.load_table(table))
+            return self._tables[table].view()
+
+    def _seed_storage(self):
+        """Générer le jeu de données initial et le persister"""
+        if GENERATOR_MODE == 'bulk':
+            tables = SyntheticDataGenerator(seed=GENERATOR_SEED).generate(**{
+                f"n_{table}": size for table, size in DATASET_SIZES.items()
+            })
+        else:
+            students = self._load_initial_students()
+            professors = self._load_initial_professors()
+            tables = {
+                'students': students,
+                'professors': professors,
+                'employees': self._load_initial_employees(),
+                'grades': self._generate_grades(students),
+                'timetable': self._generate_timetable(professors)
+            }
+        for table, df in tables.items():
+            self.storage.write_table(table, df)
+            self._tables[table] = AppendBuffer(df)
+
+    def _touch(self, table):
+        self.versions[table] += 1
+
+    def table_index(self, table):
+        """Index de requête de la version courante d'une table"""
+        with self._lock:
+            frame = self._get_table(table)
+            version, index = self._indexes.get(table, (None, None))
+            if version != self.versions[table] or index.df is not frame:
+                index = TableIndex(frame)
+                self._indexes[table] = (self.versions[table], index)
+            return index
+
+    def query_page(self, table, page=1, page_size=25, sort_by=None, ascending=True, filters=None, within=None):
+        """Une page de la table filtrée et triée, avec le nombre total de lignes retenues"""
+        start = (max(page, 1) - 1) * page_size
+        return self.table_index(table).query(filters, sort_by, ascending, within, start, start + page_size)
+
+    def query(self, table, filters=None, sort_by=None, ascending=True, within=None):
+        """Toutes les lignes retenues (exports et rapports)"""
+        return self.table_index(table).query(filters, sort_by, ascending, within)[0]
+
+    def distinct_values(self, table, column):
+        """Valeurs distinctes d'une colonne, lues depuis l'index"""
+        return list(self.table_index(table).values(column))
+
+    def search(self, table, query, fields=None):
+        """Positions des lignes correspondant à la recherche (None si elle est vide)"""
+        if not query or not query.strip():
+            return None
+        with self._lock:
+            if table not in self._search_indexes:
+                self._search_indexes[table] = SearchIndex(SEARCH_FIELDS[table], self._get_table(table))
+            ids = self._search_indexes[table].search(query, fields)
+            id_positions = self.table_index(table).values('id')
+            return np.array([id_positions[i][0] for i in ids if i in id_positions], dtype=np.int64)
+
+    def kpis(self, table):
+        """Indicateurs agrégés d'une table, tenus à jour à chaque mutation"""
+        with self._lock:
+            if table not in self._kpis:
+                self._kpis[table] = TableKPIs(KPI_SPECS[table], self._get_table(table))
+            return self._kpis[table]
+
+    def specialite_analytics(self):
+        """Agrégats par spécialité, recalculés seulement si étudiants ou professeurs ont changé"""
+        with self._lock:
+            key = (self.versions['students'], self.versions['professors'])
+            if self._analytics.get('specialites', (None,))[0] != key:
+                self._analytics['specialites'] = (key, compute_specialite_analytics(self.students, self.professors))
+            return self._analytics['specialites'][1]
+
+    def grade_engine(self):
+        """Moteur de moyennes, reconstruit seulement si les notes ou les étudiants ont changé"""
+        with self._lock:
+            key = (self.versions['grades'], self.versions['students'])
+            if self._analytics.get('grades', (None,))[0] != key:
+                self._analytics['grades'] = (key, GradeEngine(self.grades, self.students))
+            return self._analytics['grades'][1]
+
+    def density(self, table, column, by=None):
+        """Courbe de densité d'une colonne numérique"""
+        with self._lock:
+            key = ('densite', table, column, by)
+            if self._analytics.get(key, (None,))[0] != self.versions[table]:
+                values = self._get_table(table)[column]
+                if by is None:
+                    result = kernel_density(values)
+                else:
+                    result = {group: kernel_density(values.iloc[positions])
+                              for group, positions in self.table_index(table).values(by).items()}
+                self._analytics[key] = (self.versions[table], result)
+            return self._analytics[key][1]
+
+    def clear_caches(self):
+        """Oublier les structures dérivées (index, indicateurs, agrégats), reconstruites à la demande"""
+        with self._lock:
+            self._indexes.clear()
+            self._search_indexes.clear()
+            self._kpis.clear()
+            self._analytics.clear()
+            self._conflict_engine = None
+
+    def rebuild_indexes(self, report=None):
+        """Reconstruire les index de requête et de recherche hors verrou"""
+        rebuilt = 0
+        for step, table in enumerate(DATA_TABLES, 1):
+            with self._lock:
+                version, frame = self.versions[table], self._get_table(table)
+            index = TableIndex(frame)
+            if TABLE_KEYS[table]:
+                index.values(TABLE_KEYS[table])
+            search = SearchIndex(SEARCH_FIELDS[table], frame) if table in SEARCH_FIELDS else None
+            with self._lock:
+                if self.versions[table] == version and self._get_table(table) is frame:
+                    self._indexes[table] = (version, index)
+                    if search is not None:
+                        self._search_indexes[table] = search
+                    rebuilt += 1
+            if report:
+                report(step / len(DATA_TABLES), f"Index {table} reconstruits")
+        return rebuilt
+
+    def snapshot_tables(self):
+        """Instantané cohérent de toutes les tables"""
+        with self._lock:
+            return {table: self._get_table(table).copy(deep=False) for table in DATA_TABLES}
+
+    def integrity(self):
+        """Moteur d'intégrité sur un instantané des tables"""
+        return IntegrityEngine(self.snapshot_tables())
+
+    def repair_integrity(self, report=None):
+        """Réparer les doublons et les orphelins ; renvoie les lignes corrigées par contrôle"""
+        for attempt in range(INTEGRITY_REPAIR_ATTEMPTS):
+            with self._lock:
+                versions = dict(self.versions)
+                tables = self.snapshot_tables()
+            drops, detaches, fixed = self._integrity_plan(tables)
+            if report:
+                report(0.5, "Corrections calculées")
+            with self._lock:
+                if self.versions == versions:
+                    for table, mask in drops:
+                        self._drop_rows(table, mask)
+                    for child, column, values, policy in detaches:
+                        self._detach(child, column, values, policy)
+                    return fixed
+            if report:
+                report(0.0, f"Tables modifiées pendant le contrôle, nouvel essai ({attempt + 2}/{INTEGRITY_REPAIR_ATTEMPTS})")
+        raise RuntimeError("Tables modifiées en continu pendant la réparation : réessayer plus tard")
+
+    @staticmethod
+    def _integrity_plan(tables):
+        """Corrections d'un instantané : doublons puis orphelins"""
+        engine = IntegrityEngine(tables)
+        drops, detaches, fixed = [], [], {}
+        for table, keys in UNIQUE_KEYS.items():
+            for columns in keys['repair']:
+                mask = engine.duplicate_mask(table, columns)
+                if mask.any():
+                    drops.append((table, mask))
+                    engine.tables[table] = engine.tables[table][~mask]
+                    fixed[f"{table} ({', '.join(columns)})"] = int(mask.sum())
+        for (child, column), (parent, _, policy) in RELATIONS.items():
+            mask = engine.orphan_mask(child, column)
+            if mask.any():
+                detaches.append((child, column, engine.tables[child][column][mask].unique(), policy))
+                fixed[f"{child}.{column} → {parent}"] = int(mask.sum())
+        return drops, detaches, fixed
+
+    def _drop_rows(self, table, mask):
+        """Supprimer des lignes par position (doublons de clé) : la table est réécrite"""
+        if table == 'grades':
+            self._student_fields()
+        frame = self._get_table(table)
+        self.storage.write_table(table, frame[~mask])
+        self._tables[table].replace(frame[~mask])
+        # Les structures indexées par clé sont reconstruites plutôt que mises à jour
+        self._search_indexes.pop(table, None)
+        if table == 'timetable':
+            self._conflict_engine = None
+        self._on_delete(table, frame[mask])
+        self._touch(table)
+
+    def _detach(self, child, column, values, policy):
+        """Appliquer la politique de suppression aux lignes enfants qui référencent `values`"""
+        if policy == 'cascade':
+            return self.delete_records(child, column, values)
+        key = TABLE_KEYS[child]
+        if key is None:
+            raise ValueError(f"Suppression 'tombstone' impossible : la table {child} n'a pas de clé")
+        frame = self._get_table(child)
+        ids = frame.loc[frame[column].isin(values), key]
+        return {child: self.update_records(child, [(record_id, {column: TOMBSTONE}) for record_id in ids])}
+
+    def records(self, table, ids):
+        """Lignes correspondant à une liste d'identifiants, dans l'ordre donné"""
+        id_positions = self.table_index(table).values('id')
+        positions = [id_positions[i][0] for i in ids if i in id_positions]
+        return self._get_table(table).iloc[positions]
+
+    def _student_fields(self):
+        """Sommes courantes des champs dérivés, construites avant la première mutation des notes"""
+        with self._lock:
+            if self._derived_fields is None:
+                self._derived_fields = DerivedStudentFields(self.grades)
+                self._reconcile_students(self._derived_fields.initial_fields)
+                self._derived_fields.initial_fields = None
+            return self._derived_fields
+
+    def _reconcile_students(self, fields):
+        """Aligner moyenne_generale, valide et credits_obtenus sur les notes"""
+        current = self._get_table('students')[['id', 'moyenne_generale', 'valide', 'credits_obtenus']]
+        current = current.drop_duplicates('id', keep='last').set_index('id')
+        moyenne = fields['moyenne'].reindex(current.index).astype(float).fillna(current['moyenne_generale'])
+        credits = fields['credits'].reindex(current.index).fillna(0).clip(0, CREDITS_MAX).astype(int)
+        valide = moyenne >= 10
+        changed = ~((moyenne == current['moyenne_generale']) | (moyenne.isna() & current['moyenne_generale'].isna())) \
+            | (credits != current['credits_obtenus']) | (valide != current['valide'].astype(bool))
+        self.update_records('students', [
+            (student_id, {'moyenne_generale': m, 'valide': bool(v), 'credits_obtenus': int(c)})
+            for student_id, m, v, c in zip(current.index[changed], moyenne[changed], valide[changed], credits[changed])
+        ])
+
+    def _refresh_students(self, changes):
+        """Répercuter sur les étudiants touchés leur moyenne, leur validation et leurs crédits"""
+        students = self._get_table('students')
+        # Lignes touchées seulement : pas de reconstruction de l'index complet des étudiants
+        found = IntegrityEngine.isin(students['id'], pd.Series(list(changes), dtype=object))
+        current_rows = students.loc[found, ['id', 'moyenne_generale', 'credits_obtenus']].drop_duplicates('id', keep='last').set_index('id')
+        updates = []
+        for student_id, (moyenne, credits) in changes.items():
+            if student_id not in current_rows.index:
+                continue
+            current = current_rows.loc[student_id]
+            if moyenne is None:
+                moyenne = current['moyenne_generale']
+            updates.append((student_id, {
+                'moyenne_generale': moyenne,
+                'valide': bool(moyenne >= 10),
+                'credits_obtenus': int(np.clip(current['credits_obtenus'] + credits, 0, CREDITS_MAX))
+            }))
+        self.update_records('students', updates)
+
+    @property
+    def conflict_engine(self):
+        """Moteur de conflits de l'emploi du temps, construit à la première utilisation"""
+        with self._lock:
+            if self._conflict_engine is None:
+                self._conflict_engine = TimetableConflictEngine(self.timetable)
+            return self._conflict_engine
+
+    # Maintenance incrémentale des structures dérivées
+    def _on_append(self, table, df):
+        if table == 'grades' and self._derived_fields is not None:
+            self._refresh_students(self._derived_fields.apply(df))
+        if table == 'timetable' and self._conflict_engine is not None:
+            for seance in df.to_dict('records'):
+                self._conflict_engine.add(seance)
+        if table in self._search_indexes or table in self._kpis:
+            for record in df.to_dict('records'):
+                if table in self._search_indexes:
+                    self._search_indexes[table].add(record)
+                if table in self._kpis:
+                    self._kpis[table].add(record)
+
+    def _on_update(self, table, previous, current, columns):
+        """Lignes avant et après un lot de mises à jour (mêmes étiquettes), colonnes modifiées"""
+        if table in self._kpis and columns & self._kpis[table].columns:
+            self._kpis[table].remove_frame(previous)
+            self._kpis[table].add_frame(current)
+        if table == 'timetable' and self._conflict_engine is not None:
+            for seance in current.to_dict('records'):
+                self._conflict_engine.remove(seance['id'])
+                self._conflict_engine.add(seance)
+        if table in self._search_indexes and columns & set(self._search_indexes[table].fields):
+            self._search_indexes[table].update(previous, current)
+
+    def _on_delete(self, table, removed):
+        if table == 'grades' and self._derived_fields is not None:
+            self._refresh_students(self._derived_fields.apply(removed, sign=-1))
+        if table == 'timetable' and self._conflict_engine is not None:
+            for seance_id in removed['id']:
+                self._conflict_engine.remove(seance_id)
+        if table in self._search_indexes:
+            for record_id in removed['id']:
+                self._search_indexes[table].remove(record_id)
+        if table in self._kpis:
+            for record in removed.to_dict('records'):
+                self._kpis[table].remove(record)
+
+    def replace_table(self, table, df, version=None):
+        """Réécrire entièrement une table ; renvoie False si `version` est dépassée"""
+        with self._lock:
+            if version is not None and self.versions[table] != version:
+                return False
+            self.storage.write_table(table, df)
+            self._tables[table] = AppendBuffer(df)
+            if table == 'timetable':
+                self._conflict_engine = None
+            if table == 'grades':
+                self._derived_fields = None
+            self._search_indexes.pop(table, None)
+            self._kpis.pop(table, None)
+            self._touch(table)
+            return True
+
+    # Mutations incrémentales : une seule ligne écrite dans le stockage
+    def add_record(self, table, record):
+        """Ajouter un enregistrement"""
+        self.append_records(table, pd.DataFrame([record]))
+
+    def append_records(self, table, rows):
+        """Ajouter un lot d'enregistrements"""
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if df.empty:
+            return
+        with self._lock:
+            self._get_table(table)
+            if table == 'grades':
+                self._student_fields()
+            self.storage.append_rows(table, df)
+            self._tables[table].append(df)
+            self._on_append(table, df)
+            self._touch(table)
+
+    def append_chunks(self, table, chunks):
+        """Ajouter des blocs d'enregistrements, annulés si un bloc échoue"""
+        key = TABLE_KEYS[table]
+        written, count = [], 0
+        try:
+            for chunk in chunks:
+                self.append_records(table, chunk)
+                written.append(chunk[key])
+                count += len(chunk)
+        except Exception:
+            if written:
+                self.delete_records(table, key, pd.concat(written, ignore_index=True))
+            raise
+        return count
+
+    def merge_records(self, table, inserts, updates, version):
+        """Appliquer un plan de fusion ; renvoie False si `version` est dépassée"""
+        with self._lock:
+            if self.versions[table] != version:
+                return False
+            self.append_records(table, inserts)
+            self.update_records(table, updates)
+            return True
+
+    def replace_records(self, table, columns, rows):
+        """Ajouter un lot en remplaçant les lignes de même clé ; renvoie leur nombre"""
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if df.empty:
+            return 0
+        keys = df[columns].drop_duplicates()
+        with self._lock:
+            if table == 'grades':
+                self._student_fields()
+            frame = self._get_table(table)
+            # Présélection sur la première colonne, puis comparaison des clés complètes
+            candidates = np.flatnonzero(IntegrityEngine.isin(frame[columns[0]], keys[columns[0]]))
+            hit = pd.MultiIndex.from_frame(frame.iloc[candidates][columns]).isin(pd.MultiIndex.from_frame(keys))
+            replaced = np.zeros(len(frame), dtype=bool)
+            replaced[candidates[hit]] = True
+            if replaced.any():
+                self.storage.delete_keys(table, frame.loc[replaced, columns].drop_duplicates())
+                self._tables[table].replace(frame[~replaced])
+                self._on_delete(table, frame[replaced])
+                self._touch(table)
+            self.append_records(table, df)
+            return int(replaced.sum())
+
+    def update_record(self, table, record_id, values):
+        """Mettre à jour un enregistrement identifié par sa clé"""
+        return self.update_records(table, [(record_id, values)]) == 1
+
+    def update_records(self, table, updates):
+        """Mettre à jour un lot [(clé, valeurs), ...] ; renvoie le nombre trouvé"""
+        key = TABLE_KEYS[table]
+        # Un lot par jeu de colonnes modifiées : aucune colonne absente n'est écrasée
+        by_columns = defaultdict(list)
+        for record_id, values in updates:
+            by_columns[tuple(values)].append({**values, key: record_id})
+        with self._lock:
+            frame = self._get_table(table)
+            found = IntegrityEngine.isin(frame[key], pd.Series([record_id for record_id, _ in updates], dtype=object))
+            # Clé -> étiquette de ligne (la dernière ligne en cas de clé dupliquée)
+            located = frame.loc[found, key]
+            located = located[~located.duplicated(keep='last')]
+            lookup = pd.Index(located.to_numpy())
+            batches, count = [], 0
+            for columns, rows in by_columns.items():
+                batch = pd.DataFrame(rows)
+                hit = lookup.get_indexer(batch[key]) >= 0
+                count += int(hit.sum())
+                # Plusieurs mises à jour d'une même clé : la dernière l'emporte
+                batch = batch[hit].drop_duplicates(key, keep='last')
+                if not batch.empty:
+                    batches.append((list(columns), batch, located.index[lookup.get_indexer(batch[key])]))
+            if batches:
+                touched = pd.Index(np.concatenate([labels for _, _, labels in batches])).unique()
+                modified = {column for columns, _, _ in batches for column in columns}
+                # Nouvelle table substituée à l'ancienne : les sessions qui lisent la table
+                # courante sans verrou ne voient jamais un lot à moitié appliqué. Seules les
+                # colonnes modifiées sont recopiées.
+                updated = frame.copy(deep=False)
+                for column in modified & set(frame.columns):
+                    updated[column] = frame[column].copy()
+                for columns, batch, labels in batches:
+                    updated.loc[labels, columns] = batch[columns].set_axis(labels)
+                    self.storage.upsert_rows(table, batch)
+                self._tables[table].replace(updated)
+                self._on_update(table, frame.loc[touched], updated.loc[touched], modified)
+                self._touch(table)
+            return count
+
+    def delete_record(self, table, record_id, on_delete=None):
+        """Supprimer un enregistrement identifié par sa clé"""
+        return self.delete_records(table, TABLE_KEYS[table], [record_id], on_delete)
+
+    def delete_records(self, table, column, values, on_delete=None):
+        """Supprimer des enregistrements et leurs dépendances ; renvoie les lignes par table"""
+        with self._lock:
+            if table == 'grades':
+                self._student_fields()
+            frame = self._get_table(table)
+            removed = frame[column].isin(values)
+            self._tables[table].replace(frame[~removed])
+            self.storage.delete_rows(table, column, values)
+            self._on_delete(table, frame[removed])
+            self._touch(table)
+
+            counts = Counter({table: int(removed.sum())})
+            for (child, child_column), (parent, columns, policy) in RELATIONS.items():
+                if parent != table or not removed.any():
+                    continue
+                # Clés disparues : un homonyme encore présent garde ses lignes dépendantes
+                lost = IntegrityEngine.parent_keys(frame[removed], columns)
+                lost = lost[~IntegrityEngine.isin(lost, IntegrityEngine.parent_keys(frame[~removed], columns))].unique()
+                if len(lost):
+                    counts.update(self._detach(child, child_column, lost, on_delete or policy))
+            return dict(counts)
+
     def _load_initial_students(self):
         """Charger les étudiants initiaux"""
         students = []
@@ -247,7 +2532,7 @@ class DataManager:
         sexes = ['M', 'F']
         statuts = ['Actif', 'Suspendu', 'Diplômé']
         
-        for i in range(50):
+        for i in range(DATASET_SIZES['students']):
             sexe = np.random.choice(sexes, p=[0.55, 0.45])
             if sexe == 'M':
                 prenom = self.fake.first_name_male()
@@ -289,7 +2574,7 @@ class DataManager:
         statuts = ['Permanent', 'Vacataire']
         villes = ['Paris', 'Lyon', 'Marseille', 'Toulouse']
         
-        for i in range(15):
+        for i in range(DATASET_SIZES['professors']):
             sexe = np.random.choice(['M', 'F'], p=[0.6, 0.4])
             if sexe == 'M':
                 prenom = self.fake.first_name_male()
@@ -324,19 +2609,12 @@ class DataManager:
     def _load_initial_employees(self):
         """Charger les employés initiaux"""
         employees = []
-        services = ['Secrétariat', 'Administration', 'Comptabilité', 'Bibliothèque', 'Technique / IT', 'Surveillance']
-        postes = {
-            'Secrétariat': ['Secrétaire administratif', 'Assistant de direction', 'Accueil'],
-            'Administration': ['Responsable administratif', 'Gestionnaire', 'Coordinateur'],
-            'Comptabilité': ['Comptable', 'Responsable financier', 'Assistant comptable'],
-            'Bibliothèque': ['Bibliothécaire', 'Documentaliste', 'Assistant bibliothèque'],
-            'Technique / IT': ['Technicien informatique', 'Administrateur réseau', 'Support technique'],
-            'Surveillance': ['Agent de surveillance', 'Responsable sécurité', 'Veilleur']
-        }
+        services = list(POSTES_PAR_SERVICE)
+        postes = POSTES_PAR_SERVICE
         statuts = ['Actif', 'Congé', 'Retraité']
         villes = ['Paris', 'Lyon', 'Marseille', 'Toulouse']
         
-        for i in range(30):
+        for i in range(DATASET_SIZES['employees']):
             sexe = np.random.choice(['M', 'F'], p=[0.5, 0.5])
             if sexe == 'M':
                 prenom = self.fake.first_name_male()
@@ -347,26 +2625,7 @@ class DataManager:
             poste = np.random.choice(postes[service])
             
             # Générer un salaire réaliste selon le poste
-            salaire_base = {
-                'Secrétaire administratif': 2200,
-                'Assistant de direction': 2800,
-                'Accueil': 1900,
-                'Responsable administratif': 3500,
-                'Gestionnaire': 2700,
-                'Coordinateur': 3200,
-                'Comptable': 2800,
-                'Responsable financier': 4500,
-                'Assistant comptable': 2300,
-                'Bibliothécaire': 2400,
-                'Documentaliste': 2500,
-                'Assistant bibliothèque': 2000,
-                'Technicien informatique': 2600,
-                'Administrateur réseau': 3800,
-                'Support technique': 2300,
-                'Agent de surveillance': 2100,
-                'Responsable sécurité': 3200,
-                'Veilleur': 2000
-            }.get(poste, 2500)
+            salaire_base = SALAIRES_BASE.get(poste, 2500)
             
             # Ajouter de la variation
             salaire = salaire_base + np.random.randint(-200, 200)
@@ -393,16 +2652,7 @@ class DataManager:
         return pd.DataFrame(employees)
     
     def _get_matieres_by_specialite(self, specialite):
-        matieres_dict = {
-            'Informatique': ['Algorithme', 'Base de données', 'Réseaux', 'Web', 'IA', 'Sécurité', 'DevOps'],
-            'Mathématiques': ['Algèbre', 'Analyse', 'Probabilité', 'Statistique', 'Topologie', 'Calcul différentiel'],
-            'Physique': ['Mécanique', 'Electromagnétisme', 'Quantique', 'Thermodynamique', 'Optique', 'Astrophysique'],
-            'Chimie': ['Organique', 'Minérale', 'Analytique', 'Physico-chimie', 'Biochimie', 'Chimie verte'],
-            'Biologie': ['Génétique', 'Biologie cellulaire', 'Écologie', 'Physiologie', 'Microbiologie', 'Bioinformatique'],
-            'Économie': ['Microéconomie', 'Macroéconomie', 'Économétrie', 'Finance', 'Marketing', 'Stratégie'],
-            'Droit': ['Droit civil', 'Droit pénal', 'Droit commercial', 'Droit international', 'Droit administratif']
-        }
-        return matieres_dict.get(specialite, ['Mathématiques', 'Sciences'])
+        return MATIERES_PAR_SPECIALITE.get(specialite, ['Mathématiques', 'Sciences'])
     
     def _generate_grades(self, students_df):
         """Générer des notes"""
@@ -443,7 +2693,7 @@ class DataManager:
         timetable = []
         prof_names = list(professors_df['prenom'] + ' ' + professors_df['nom'])
         
-        for _ in range(100):
+        for _ in range(DATASET_SIZES['timetable']):
             prof = np.random.choice(prof_names)
             
             seance = {
@@ -465,25 +2715,1028 @@ class DataManager:
         
         return pd.DataFrame(timetable)
 
+# Générateur vectorisé de données synthétiques (tests de charge)
+class SyntheticDataGenerator:
+    """Génération en masse de données de test reproductibles"""
+
+    SPECIALITES = list(MATIERES_PAR_SPECIALITE)
+    VILLES = ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Nice', 'Nantes', 'Strasbourg']
+    NIVEAUX = ['Licence 1', 'Licence 2', 'Licence 3', 'Master 1', 'Master 2']
+    JOURS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi']
+    HEURES = ['08:00-10:00', '10:15-12:15', '14:00-16:00', '16:15-18:15']
+    SALLES = ['A101', 'A102', 'A201', 'A202', 'B101', 'B102']
+
+    def __init__(self, seed=None, pool_size=1000, reference_date=None):
+        self.rng = np.random.default_rng(seed)
+        self.today = np.datetime64(reference_date or datetime.now().date(), 'D')
+
+        fake = Faker('fr_FR')
+        fake.seed_instance(seed)
+        self.pools = {
+            'male': np.array([fake.first_name_male() for _ in range(pool_size)], dtype=object),
+            'female': np.array([fake.first_name_female() for _ in range(pool_size)], dtype=object),
+            'last': np.array([fake.last_name() for _ in range(pool_size)], dtype=object),
+            'full': np.array([fake.name() for _ in range(pool_size)], dtype=object),
+            'phone': np.array([fake.phone_number() for _ in range(pool_size)], dtype=object),
+            'user': np.array([fake.user_name() for _ in range(pool_size)], dtype=object),
+            'domain': np.array([fake.free_email_domain() for _ in range(20)], dtype=object)
+        }
+
+    def _pick(self, values, n, p=None):
+        return np.asarray(values, dtype=object)[self.rng.choice(len(values), size=n, p=p)]
+
+    def _pool(self, name, n):
+        return self.pools[name][self.rng.integers(0, len(self.pools[name]), size=n)]
+
+    def _ids(self, n):
+        """Identifiants hexadécimaux à 8 caractères, uniques"""
+        values = self.rng.choice(16 ** 8, size=n, replace=False)
+        return pd.Series(values).map('{:08x}'.format).to_numpy(dtype=object)
+
+    def _dates(self, n, days_min, days_max):
+        """Dates 'YYYY-MM-DD' tirées entre aujourd'hui - days_max et aujourd'hui - days_min"""
+        offsets = self.rng.integers(days_min, days_max + 1, size=n)
+        return np.datetime_as_string(self.today - offsets, unit='D').astype(object)
+
+    def _first_names(self, sexe):
+        return np.where(sexe == 'M', self._pool('male', len(sexe)), self._pool('female', len(sexe)))
+
+    def students(self, n):
+        """Étudiants (schéma de _load_initial_students)"""
+        sexe = self._pick(['M', 'F'], n, p=[0.55, 0.45])
+        specialite = self._pick(self.SPECIALITES, n, p=[0.25, 0.15, 0.15, 0.1, 0.1, 0.15, 0.1])
+        numero = pd.Series(np.arange(n) + 1000).astype(str)
+
+        return pd.DataFrame({
+            'id': self._ids(n),
+            'cne': ('CNE' + numero.str.zfill(6)).to_numpy(dtype=object),
+            'nom': self._pool('last', n),
+            'prenom': self._first_names(sexe),
+            'sexe': sexe,
+            'date_naissance': self._dates(n, 18 * 365, 26 * 365 - 1),
+            'ville': self._pick(self.VILLES, n),
+            'email': (pd.Series(self._pool('user', n)) + numero + '@' + self._pool('domain', n)).to_numpy(dtype=object),
+            'telephone': self._pool('phone', n),
+            'specialite': specialite,
+            'classe': (pd.Series(specialite).str[:3] + '-' +
+                       pd.Series(self.rng.integers(1, 6, size=n)).astype(str)).to_numpy(dtype=object),
+            'niveau': self._pick(self.NIVEAUX, n),
+            'annee_universitaire': self.rng.integers(2019, 2024, size=n),
+            'statut': self._pick(['Actif', 'Suspendu', 'Diplômé'], n, p=[0.85, 0.1, 0.05]),
+            'moyenne_generale': np.round(self.rng.uniform(8, 18, size=n), 2),
+            'taux_absence': np.round(self.rng.uniform(0, 35, size=n), 1),
+            'credits_obtenus': self.rng.integers(0, 180, size=n),
+            'credits_totaux': np.full(n, 180),
+            'date_inscription': self._dates(n, 0, 4 * 365),
+            'valide': self.rng.random(size=n) > 0.3
+        })
+
+    def professors(self, n):
+        """Professeurs (schéma de _load_initial_professors)"""
+        sexe = self._pick(['M', 'F'], n, p=[0.6, 0.4])
+        prenom = self._first_names(sexe)
+        specialite = self._pick(self.SPECIALITES, n)
+        matieres = {spec: ', '.join(mods[:3]) for spec, mods in MATIERES_PAR_SPECIALITE.items()}
+
+        return pd.DataFrame({
+            'id': self._ids(n),
+            'nom': self._pool('last', n),
+            'prenom': prenom,
+            'sexe': sexe,
+            'specialite': specialite,
+            'matieres': pd.Series(specialite).map(matieres).to_numpy(dtype=object),
+            'experience': self.rng.integers(2, 30, size=n),
+            'email': (pd.Series(prenom).str.lower() + '.' + pd.Series(self._pool('last', n)).str.lower() +
+                      '@university.edu').to_numpy(dtype=object),
+            'telephone': self._pool('phone', n),
+            'ville': self._pick(self.VILLES[:4], n),
+            'statut': self._pick(['Permanent', 'Vacataire'], n, p=[0.7, 0.3]),
+            'heures_semaine': self.rng.integers(12, 25, size=n),
+            'classes_assigned': self.rng.integers(2, 6, size=n),
+            'date_embauche': self._dates(n, 365, 20 * 365),
+            'salaire_grade': self._pick(['A', 'B', 'C', 'D'], n, p=[0.2, 0.4, 0.3, 0.1]),
+            'taux_presence': np.round(self.rng.uniform(85, 100, size=n), 1),
+            'derniere_evaluation': np.round(self.rng.uniform(3, 5, size=n), 1)
+        })
+
+    def employees(self, n):
+        """Employés (schéma de _load_initial_employees)"""
+        sexe = self._pick(['M', 'F'], n, p=[0.5, 0.5])
+        prenom = self._first_names(sexe)
+        services = list(POSTES_PAR_SERVICE)
+        postes = np.array([POSTES_PAR_SERVICE[s] for s in services], dtype=object)
+        service_idx = self.rng.integers(0, len(services), size=n)
+        poste = postes[service_idx, self.rng.integers(0, postes.shape[1], size=n)]
+        salaire_base = pd.Series(poste).map(SALAIRES_BASE).fillna(2500).astype(int).to_numpy()
+
+        return pd.DataFrame({
+            'id': self._ids(n),
+            'nom': self._pool('last', n),
+            'prenom': prenom,
+            'sexe': sexe,
+            'poste': poste,
+            'service': np.asarray(services, dtype=object)[service_idx],
+            'date_recrutement': self._dates(n, 30, 15 * 365),
+            'salaire': salaire_base + self.rng.integers(-200, 200, size=n),
+            'email': (pd.Series(prenom).str.lower() + '.' + pd.Series(self._pool('last', n)).str.lower() +
+                      '@university.edu').to_numpy(dtype=object),
+            'telephone': self._pool('phone', n),
+            'ville': self._pick(self.VILLES[:4], n),
+            'statut': self._pick(['Actif', 'Congé', 'Retraité'], n, p=[0.85, 0.1, 0.05]),
+            'experience': self.rng.integers(1, 20, size=n),
+            'evaluation': np.round(self.rng.uniform(3, 5, size=n), 1),
+            'taux_presence': np.round(self.rng.uniform(90, 100, size=n), 1)
+        })
+
+    def grades(self, students_df):
+        """Notes : 4 modules x 3 examens par étudiant (schéma de _generate_grades)"""
+        examens = np.array(['Contrôle 1', 'Contrôle 2', 'Examen Final'], dtype=object)
+        modules = np.array([(MATIERES_PAR_SPECIALITE[s] + ['Sciences'] * 4)[:4] for s in self.SPECIALITES],
+                           dtype=object)
+        spec_idx = pd.Categorical(students_df['specialite'], categories=self.SPECIALITES).codes
+        spec_idx = np.where(spec_idx < 0, 0, spec_idx)
+
+        per_student = 4 * len(examens)
+        rows = np.repeat(np.arange(len(students_df)), per_student)
+        module_pos = np.tile(np.repeat(np.arange(4), len(examens)), len(students_df))
+        exam_pos = np.tile(np.arange(len(examens)), 4 * len(students_df))
+        n = len(rows)
+
+        base = students_df['moyenne_generale'].to_numpy(dtype=float)[rows]
+        note = np.clip(np.round(base + self.rng.uniform(-3, 3, size=n), 2), 0, 20)
+
+        return pd.DataFrame({
+            'student_id': students_df['id'].to_numpy()[rows],
+            'cne': students_df['cne'].to_numpy()[rows],
+            'nom': students_df['nom'].to_numpy()[rows],
+            'prenom': students_df['prenom'].to_numpy()[rows],
+            'module': modules[spec_idx[rows], module_pos],
+            'examen': examens[exam_pos],
+            'note': note,
+            'coefficient': np.where(exam_pos == 2, 2, 1),
+            'date': self._dates(n, 0, 182),
+            'professeur': self._pool('full', n),
+            'valide': note >= 10
+        })
+
+    def timetable(self, professors_df, n):
+        """Séances (schéma de _generate_timetable)"""
+        prof_names = (professors_df['prenom'] + ' ' + professors_df['nom']).to_numpy(dtype=object)
+        effectif = self.rng.integers(20, 40, size=n)
+        presence = self.rng.integers(15, 35, size=n)
+
+        return pd.DataFrame({
+            'id': pd.Series(np.arange(n)).map('SE{:04d}'.format).to_numpy(dtype=object),
+            'jour': self._pick(self.JOURS, n),
+            'heure': self._pick(self.HEURES, n),
+            'salle': self._pick(self.SALLES, n),
+            'module': self._pick(['Algorithme', 'Base de données', 'Réseaux', 'Mathématiques', 'Physique'], n),
+            'professeur': self._pick(prof_names, n),
+            'classe': ('Classe ' + pd.Series(self.rng.integers(1, 10, size=n)).astype(str)).to_numpy(dtype=object),
+            'groupe': ('Groupe ' + pd.Series(self._pick(['A', 'B', 'C'], n))).to_numpy(dtype=object),
+            'type_cours': self._pick(['Cours', 'TD', 'TP'], n, p=[0.4, 0.3, 0.3]),
+            'semestre': self._pick(['S1', 'S2', 'S3', 'S4'], n),
+            'effectif': effectif,
+            'presence_reelle': presence,
+            'taux_presence': np.round(presence / effectif * 100, 1)
+        })
+
+    def generate(self, n_students=50, n_professors=15, n_employees=30, n_timetable=100):
+        """Générer toutes les tables du DataManager"""
+        students = self.students(n_students)
+        professors = self.professors(n_professors)
+        return {
+            'students': students,
+            'professors': professors,
+            'employees': self.employees(n_employees),
+            'grades': self.grades(students),
+            'timetable': self.timetable(professors, n_timetable)
+        }
+
+# Moteur de détection des conflits d'emploi du temps
+@lru_cache(maxsize=1024)
+def parse_time_slot(slot):
+    """Convertir un créneau 'HH:MM-HH:MM' en intervalle de minutes (début, fin)"""
+    try:
+        debut, fin = str(slot).split('-')
+        h1, m1 = debut.strip().split(':')
+        h2, m2 = fin.strip().split(':')
+        start, end = int(h1) * 60 + int(m1), int(h2) * 60 + int(m2)
+    except ValueError:
+        return None
+    return (start, end) if start < end else None
+
+
+class SlotIntervals:
+    """Intervalles d'une ressource sur une journée, triés par début"""
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.ids = [seance_id for _, _, seance_id in intervals]
+        self.max_ends = []
+        self._refresh(0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _refresh(self, pos):
+        """Recalculer le maximum cumulé des fins à partir d'une position"""
+        previous = self.max_ends[pos - 1] if pos else -1
+        del self.max_ends[pos:]
+        for end in self.ends[pos:]:
+            previous = max(previous, end)
+            self.max_ends.append(previous)
+
+    def add(self, start, end, seance_id):
+        pos = bisect.bisect_right(self.starts, start)
+        self.starts.insert(pos, start)
+        self.ends.insert(pos, end)
+        self.ids.insert(pos, seance_id)
+        self._refresh(pos)
+
+    def remove(self, seance_id):
+        if seance_id not in self.ids:
+            return
+        pos = self.ids.index(seance_id)
+        del self.starts[pos], self.ends[pos], self.ids[pos]
+        self._refresh(pos)
+
+    def is_free(self, start, end):
+        """Aucun intervalle ne chevauche [start, end)"""
+        pos = bisect.bisect_left(self.starts, end)
+        return pos == 0 or self.max_ends[pos - 1] <= start
+
+    def overlapping(self, start, end, exclude=None):
+        """Identifiants des intervalles qui chevauchent [start, end)"""
+        found = []
+        i = bisect.bisect_left(self.starts, end) - 1
+        # max_ends est croissant : on s'arrête dès qu'aucune fin antérieure ne dépasse start
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start and self.ids[i] != exclude:
+                found.append(self.ids[i])
+            i -= 1
+        return found[::-1]
+
+    def clusters(self):
+        """Groupes de séances qui se chevauchent (balayage dans l'ordre des débuts)"""
+        groups, current, current_end = [], [], -1
+        for start, end, seance_id in zip(self.starts, self.ends, self.ids):
+            if current and start < current_end:
+                current.append(seance_id)
+                current_end = max(current_end, end)
+            else:
+                if len(current) > 1:
+                    groups.append(current)
+                current, current_end = [seance_id], end
+        if len(current) > 1:
+            groups.append(current)
+        return groups
+
+
+class TimetableConflictEngine:
+    """Index des séances par ressource et par jour"""
+
+    INDEX_KEYS = {
+        'Salle double': ('salle', 'jour'),
+        'Professeur double': ('professeur', 'jour'),
+        'Groupe double': ('classe', 'groupe', 'jour')
+    }
+    SEVERITE = {'Salle double': 'Haute', 'Professeur double': 'Moyenne', 'Groupe double': 'Haute'}
+    # Valeurs qui ne désignent pas une ressource réelle (ex: réservations sans classe)
+    PLACEHOLDERS = {'', 'À définir'}
+    FIELDS = ['id', 'jour', 'heure', 'salle', 'module', 'professeur', 'classe', 'groupe']
+
+    def __init__(self, timetable=None):
+        self.seances = {}
+        self.indexes = {conflict_type: {} for conflict_type in self.INDEX_KEYS}
+        if timetable is not None:
+            self.rebuild(timetable)
+
+    def rebuild(self, timetable):
+        """Reconstruire tous les index (créneaux analysés une seule fois, tri par groupe)"""
+        df = timetable.reindex(columns=self.FIELDS).fillna('').astype(str)
+        bornes = df['heure'].str.extract(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$').astype(float)
+        df['_start'] = bornes[0] * 60 + bornes[1]
+        df['_end'] = bornes[2] * 60 + bornes[3]
+        self.seances = dict(zip(df['id'], df[self.FIELDS].to_dict('records')))
+        valid = df[df['_start'] < df['_end']]
+        intervals = list(zip(valid['_start'].astype(int), valid['_end'].astype(int), valid['id']))
+        for conflict_type, keys in self.INDEX_KEYS.items():
+            index = {}
+            for key, positions in valid.groupby(list(keys), sort=False).indices.items():
+                if not self._is_placeholder(key):
+                    index[key] = SlotIntervals(intervals[pos] for pos in positions)
+            self.indexes[conflict_type] = index
+
+    def _is_placeholder(self, key):
+        return any(value in self.PLACEHOLDERS for value in key)
+
+    def _key(self, conflict_type, seance):
+        return tuple(str(seance.get(col, '')) for col in self.INDEX_KEYS[conflict_type])
+
+    def is_free(self, conflict_type, key, start, end):
+        """Disponibilité d'une ressource entre deux instants (minutes depuis minuit)"""
+        intervals = self.indexes[conflict_type].get(tuple(key))
+        return intervals is None or intervals.is_free(start, end)
+
+    def find_conflicts(self, seance):
+        """Séances existantes en conflit avec une séance (ajoutée ou non)"""
+        found = {}
+        slot = parse_time_slot(seance.get('heure', ''))
+        if slot is None:
+            return found
+        for conflict_type in self.INDEX_KEYS:
+            key = self._key(conflict_type, seance)
+            intervals = self.indexes[conflict_type].get(key)
+            if intervals is None or self._is_placeholder(key):
+                continue
+            others = intervals.overlapping(*slot, exclude=seance.get('id'))
+            if others:
+                found[conflict_type] = [self.seances[i] for i in others]
+        return found
+
+    def add(self, seance):
+        """Indexer une nouvelle séance (mise à jour incrémentale)"""
+        record = {col: str(seance.get(col, '')) for col in self.FIELDS}
+        self.seances[record['id']] = record
+        slot = parse_time_slot(record['heure'])
+        if slot is None:
+            return
+        for conflict_type in self.INDEX_KEYS:
+            key = self._key(conflict_type, record)
+            if not self._is_placeholder(key):
+                self.indexes[conflict_type].setdefault(key, SlotIntervals()).add(*slot, record['id'])
+
+    def remove(self, seance_id):
+        record = self.seances.pop(seance_id, None)
+        if record is None:
+            return
+        for conflict_type in self.INDEX_KEYS:
+            intervals = self.indexes[conflict_type].get(self._key(conflict_type, record))
+            if intervals is not None:
+                intervals.remove(seance_id)
+
+    def conflicts(self):
+        """Tous les conflits, regroupés par ressource et plage de chevauchement"""
+        rows = []
+        for conflict_type in self.INDEX_KEYS:
+            for key, intervals in self.indexes[conflict_type].items():
+                for ids in intervals.clusters():
+                    seances = [self.seances[i] for i in ids]
+                    jour = key[-1]
+                    heures = " / ".join(dict.fromkeys(s['heure'] for s in seances))
+                    if conflict_type == 'Salle double':
+                        conflit = " et ".join(sorted({s['professeur'] for s in seances}))
+                        details = f"Salle {key[0]} - {jour} {heures}"
+                    elif conflict_type == 'Professeur double':
+                        conflit = key[0]
+                        details = f"{len(ids)} cours qui se chevauchent ({jour} {heures}): " + \
+                                  " et ".join(s['module'] for s in seances)
+                    else:
+                        conflit = f"{key[0]} - {key[1]}"
+                        details = f"{len(ids)} séances qui se chevauchent ({jour} {heures}): " + \
+                                  " et ".join(s['module'] for s in seances)
+                    rows.append({
+                        'Type': conflict_type,
+                        'Conflit': conflit,
+                        'Détails': details,
+                        'Sévérité': self.SEVERITE[conflict_type],
+                        'Séances': ", ".join(ids)
+                    })
+        return pd.DataFrame(rows, columns=['Type', 'Conflit', 'Détails', 'Sévérité', 'Séances'])
+
+# Solveur d'emploi du temps sans conflit
+def next_seance_id(timetable):
+    """Identifiant de séance suivant le plus grand numéro SE existant"""
+    numbers = pd.to_numeric(timetable['id'].astype(str).str.extract(r'^SE(\d+)$')[0], errors='coerce')
+    return f"SE{int(numbers.max()) + 1 if numbers.notna().any() else 0:04d}"
+
+def _solve_timetable_worker(args):
+    """Point d'entrée des processus de calcul (une graine par processus)"""
+    seances, professors, salles_info, seed, time_budget = args
+    return TimetableSolver(salles_info, seed=seed).solve(seances, professors, time_budget)
+
+
+class TimetableSolver:
+    """Placement des séances sans conflit"""
+
+    JOURS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi']
+    HEURES = ['08:00-10:00', '10:15-12:15', '14:00-16:00', '16:15-18:15']
+    SESSION_HOURS = 2
+
+    def __init__(self, salles_info=SALLES_INFO, jours=None, heures=None, seed=None):
+        self.salles_info = salles_info
+        self.jours = jours or self.JOURS
+        self.heures = heures or self.HEURES
+        self.slots = [(jour, heure) for jour in self.jours for heure in self.heures]
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Salles triées par capacité : la plus petite salle suffisante s'obtient par bisect
+        rooms = sorted(salles_info.items(), key=lambda item: item[1]['Capacité'])
+        self.room_names = [name for name, _ in rooms]
+        self.room_caps = [info['Capacité'] for _, info in rooms]
+        self.room_index = {name: r for r, name in enumerate(self.room_names)}
+
+    # État du placement
+    def _reset(self, seances, professors):
+        n_slots = len(self.slots)
+        self.free_rooms = [list(range(len(self.room_names))) for _ in range(n_slots)]
+        self.room_owner = [{} for _ in range(n_slots)]
+        self.prof_slots = defaultdict(dict)
+        self.group_slots = defaultdict(dict)
+        self.prof_day_load = defaultdict(lambda: [0] * len(self.jours))
+        self.assignment = {}
+
+        self.prof = seances['professeur'].fillna('').astype(str).tolist()
+        groups = seances['classe'].fillna('').astype(str) + '|' + seances['groupe'].fillna('').astype(str)
+        self.group = [None if classe in ('', 'À définir') else g
+                      for classe, g in zip(seances['classe'].fillna('').astype(str), groups)]
+        effectif = pd.to_numeric(seances['effectif'], errors='coerce').fillna(0).astype(int).tolist()
+        self.min_room = [bisect.bisect_left(self.room_caps, eff) for eff in effectif]
+
+        # Charge cible par jour d'après heures_semaine
+        self.day_cap = {}
+        if professors is not None and not professors.empty:
+            names = (professors['prenom'] + ' ' + professors['nom']).tolist()
+            heures = pd.to_numeric(professors['heures_semaine'], errors='coerce').fillna(0).tolist()
+            per_day = self.SESSION_HOURS * len(self.jours)
+            self.day_cap = {name: max(1, -(-int(h) // per_day)) for name, h in zip(names, heures)}
+
+    def _room_for(self, i, t):
+        """Plus petite salle libre et suffisante au créneau t (ou None)"""
+        if self.prof[i] and t in self.prof_slots[self.prof[i]]:
+            return None
+        if self.group[i] is not None and t in self.group_slots[self.group[i]]:
+            return None
+        free = self.free_rooms[t]
+        pos = bisect.bisect_left(free, self.min_room[i])
+        return free[pos] if pos < len(free) else None
+
+    def _place(self, i, t, r):
+        free = self.free_rooms[t]
+        del free[bisect.bisect_left(free, r)]
+        self.room_owner[t][r] = i
+        if self.prof[i]:
+            self.prof_slots[self.prof[i]][t] = i
+            self.prof_day_load[self.prof[i]][t // len(self.heures)] += 1
+        if self.group[i] is not None:
+            self.group_slots[self.group[i]][t] = i
+        self.assignment[i] = (t, r)
+
+    def _unplace(self, i):
+        t, r = self.assignment.pop(i)
+        bisect.insort(self.free_rooms[t], r)
+        del self.room_owner[t][r]
+        if self.prof[i]:
+            del self.prof_slots[self.prof[i]][t]
+            self.prof_day_load[self.prof[i]][t // len(self.heures)] -= 1
+        if self.group[i] is not None:
+            del self.group_slots[self.group[i]][t]
+
+    def _slot_cost(self, i, t):
+        """Pénalité de répartition : jours déjà chargés pour le professeur"""
+        if not self.prof[i]:
+            return 0
+        load = self.prof_day_load[self.prof[i]][t // len(self.heures)]
+        return load + 10 * max(0, load + 1 - self.day_cap.get(self.prof[i], len(self.heures)))
+
+    def _try_place(self, i, exclude=None):
+        """Placer la séance i sur le meilleur créneau disponible"""
+        best = None
+        for t in self.rng.sample(range(len(self.slots)), len(self.slots)):
+            if t == exclude:
+                continue
+            r = self._room_for(i, t)
+            if r is not None:
+                cost = self._slot_cost(i, t)
+                if best is None or cost < best[0]:
+                    best = (cost, t, r)
+                    if cost == 0:
+                        break
+        if best is None:
+            return False
+        self._place(i, best[1], best[2])
+        return True
+
+    def _blockers(self, i, t):
+        """Séances à déloger pour libérer le créneau t pour la séance i"""
+        blockers = set()
+        if self.prof[i] and t in self.prof_slots[self.prof[i]]:
+            blockers.add(self.prof_slots[self.prof[i]][t])
+        if self.group[i] is not None and t in self.group_slots[self.group[i]]:
+            blockers.add(self.group_slots[self.group[i]][t])
+        free = self.free_rooms[t]
+        pos = bisect.bisect_left(free, self.min_room[i])
+        if pos == len(free):
+            rooms = range(self.min_room[i], len(self.room_names))
+            owners = [self.room_owner[t][r] for r in rooms if r in self.room_owner[t]]
+            if not owners:
+                return None
+            blockers.add(self.rng.choice(owners))
+        return blockers
+
+    def _eject(self, i):
+        """Placer i en délogeant au plus deux séances qui doivent se replacer ailleurs"""
+        for t in self.rng.sample(range(len(self.slots)), len(self.slots)):
+            blockers = self._blockers(i, t)
+            if not blockers or len(blockers) > 2:
+                continue
+            previous = {j: self.assignment[j] for j in blockers}
+            for j in blockers:
+                self._unplace(j)
+            r = self._room_for(i, t)
+            if r is not None:
+                self._place(i, t, r)
+                moved = []
+                for j in blockers:
+                    if not self._try_place(j, exclude=t):
+                        break
+                    moved.append(j)
+                else:
+                    return True
+                for j in moved:
+                    self._unplace(j)
+                self._unplace(i)
+            for j, (tj, rj) in previous.items():
+                self._place(j, tj, rj)
+        return False
+
+    def solve(self, seances, professors=None, time_budget=5.0, progress=None):
+        """Calculer un emploi du temps ; renvoie (séances replacées, rapport)"""
+        start = time.time()
+        seances = seances.reset_index(drop=True)
+        best = None
+        iterations = 0
+        while True:
+            self._reset(seances, professors)
+            # Les séances les plus contraintes d'abord (grands effectifs, professeurs chargés)
+            prof_counts = pd.Series(self.prof).map(pd.Series(self.prof).value_counts())
+            keys = [(-self.min_room[i], -prof_counts[i], self.rng.random()) for i in range(len(seances))]
+            order = sorted(range(len(seances)), key=keys.__getitem__)
+            unplaced = [i for i in order if not self._try_place(i)]
+
+            improved = True
+            while unplaced and improved and time.time() - start < time_budget:
+                improved = False
+                remaining = []
+                for i in unplaced:
+                    if self._eject(i):
+                        improved = True
+                    else:
+                        remaining.append(i)
+                unplaced = remaining
+                iterations += 1
+                if progress:
+                    progress(min(1.0, (time.time() - start) / time_budget),
+                             f"Itération {iterations} : {len(unplaced)} séance(s) non placée(s)")
+
+            if best is None or len(unplaced) < len(best[1]):
+                best = (dict(self.assignment), unplaced)
+            if not best[1] or time.time() - start >= time_budget:
+                break
+            # Redémarrage avec un autre ordre aléatoire
+            iterations += 1
+
+        assignment, unplaced = best
+        result = seances.copy()
+        for i, (t, r) in assignment.items():
+            jour, heure = self.slots[t]
+            result.at[i, 'jour'] = jour
+            result.at[i, 'heure'] = heure
+            result.at[i, 'salle'] = self.room_names[r]
+
+        prof_hours = pd.Series(self.prof).value_counts() * self.SESSION_HOURS
+        heures_max = {}
+        if professors is not None and not professors.empty:
+            heures_max = dict(zip(professors['prenom'] + ' ' + professors['nom'], professors['heures_semaine']))
+        report = {
+            'placees': len(assignment),
+            'non_placees': result.loc[unplaced, 'id'].tolist(),
+            'iterations': iterations,
+            'duree': round(time.time() - start, 2),
+            'graine': self.seed,
+            'surcharges': {prof: int(h) for prof, h in prof_hours.items()
+                           if prof in heures_max and h > heures_max[prof]}
+        }
+        if progress:
+            progress(1.0, f"{report['placees']} séance(s) placée(s) en {report['duree']} s")
+        return result, report
+
+    def solve_parallel(self, seances, professors=None, time_budget=5.0, workers=2, progress=None):
+        """Lancer plusieurs graines en parallèle et garder la meilleure solution"""
+        base_seed = self.seed if self.seed is not None else random.randrange(2 ** 31)
+        jobs = [(seances, professors, self.salles_info, base_seed + k, time_budget) for k in range(workers)]
+        results = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for k, result in enumerate(executor.map(_solve_timetable_worker, jobs), start=1):
+                    results.append(result)
+                    if progress:
+                        progress(k / workers, f"Processus {k}/{workers} terminé")
+        except (BrokenProcessPool, pickle.PicklingError, OSError) as error:
+            # Processus indisponibles (ex: fonction non sérialisable sous Streamlit) : calcul séquentiel
+            logger.warning("Calcul parallèle de l'emploi du temps impossible (%s) : calcul séquentiel", error)
+            if progress:
+                progress(0.0, "Processus indisponibles : calcul séquentiel")
+            results = [TimetableSolver(self.salles_info, seed=job[3]).solve(
+                seances, professors, time_budget / workers, progress) for job in jobs]
+        return min(results, key=lambda result: len(result[1]['non_placees']))
+
+    def relocate(self, timetable, seance_id, professors=None):
+        """Nouveau créneau et salle pour une séance, les autres restant fixes (ou None)"""
+        timetable = timetable.reset_index(drop=True)
+        self._reset(timetable, professors)
+        target = None
+        for i, seance in enumerate(timetable[['id', 'heure', 'salle']].itertuples(index=False)):
+            if seance.id == seance_id:
+                target = i
+                continue
+            slot = parse_time_slot(seance.heure)
+            if slot is None:
+                continue
+            r = self.room_index.get(seance.salle)
+            jour = timetable.at[i, 'jour']
+            # Une séance hors grille occupe tous les créneaux qu'elle chevauche
+            for t, (jour_t, heure_t) in enumerate(self.slots):
+                bornes = parse_time_slot(heure_t)
+                if jour_t != jour or bornes[0] >= slot[1] or bornes[1] <= slot[0]:
+                    continue
+                if r is not None and r in self.free_rooms[t]:
+                    self.free_rooms[t].remove(r)
+                    self.room_owner[t][r] = i
+                if self.prof[i]:
+                    self.prof_slots[self.prof[i]][t] = i
+                if self.group[i] is not None:
+                    self.group_slots[self.group[i]][t] = i
+        if target is None or not self._try_place(target):
+            return None
+        t, r = self.assignment[target]
+        jour, heure = self.slots[t]
+        return {'jour': jour, 'heure': heure, 'salle': self.room_names[r]}
+
+# Sauvegardes incrémentales par blocs adressés par contenu
+SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshots')
+SNAPSHOT_BLOCK_ROWS = 32768
+SNAPSHOT_KEEP = int(os.environ.get('UNIVERSITY_SNAPSHOT_KEEP', 30))
+
+class SnapshotStore:
+    """Sauvegardes compressées en blocs de lignes adressés par leur contenu"""
+
+    def __init__(self, directory=SNAPSHOT_DIR, block_rows=SNAPSHOT_BLOCK_ROWS):
+        self.directory = directory
+        self.block_rows = block_rows
+        self.extension = '.parquet' if pq is not None else '.csv.gz'
+        self._lock = threading.RLock()
+        os.makedirs(os.path.join(directory, 'manifests'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'blocks'), exist_ok=True)
+
+    def _block_path(self, digest):
+        return os.path.join(self.directory, 'blocks', digest[:2], digest + self.extension)
+
+    @staticmethod
+    def row_hashes(df):
+        """Hachage 64 bits de chaque ligne"""
+        hashes = np.zeros(len(df), dtype=np.uint64)
+        for col in df.columns:
+            values = df[col]
+            if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufmM':
+                column_hashes = pd.util.hash_array(values.to_numpy())
+            else:
+                codes, uniques = pd.factorize(values, use_na_sentinel=False)
+                uniques = np.asarray(uniques, dtype=object)
+                try:
+                    column_hashes = pd.util.hash_array(uniques)[codes]
+                except TypeError:
+                    # Valeurs non hachables (listes, dictionnaires) : hachage de leur représentation
+                    column_hashes = pd.util.hash_array(uniques.astype(str))[codes]
+            hashes = (hashes * np.uint64(1000003)) ^ column_hashes
+        return hashes
+
+    def _bounds(self, row_hashes):
+        """Frontières des blocs, selon le hachage des lignes"""
+        n = len(row_hashes)
+        cuts = np.flatnonzero(row_hashes % np.uint64(self.block_rows) == 0) + 1
+        edges = np.unique(np.concatenate(([0], cuts, [n])))
+        bounds = [start for lo, hi in zip(edges[:-1], edges[1:])
+                  for start in range(lo, hi, 4 * self.block_rows)]
+        return list(zip(bounds, bounds[1:] + [n])) if n else []
+
+    def _write_block(self, df, digest):
+        path = self._block_path(digest)
+        if os.path.exists(path):
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if pq is not None:
+            df.to_parquet(path + '.tmp', index=False, compression='zstd')
+        else:
+            df.to_csv(path + '.tmp', index=False, compression='gzip')
+        os.replace(path + '.tmp', path)
+        return os.path.getsize(path)
+
+    def create(self, tables, report=None):
+        """Sauvegarder {table: DataFrame} ; renvoie le résumé de la sauvegarde"""
+        with self._lock:
+            return self._create(tables, report)
+
+    def _create(self, tables, report):
+        created = datetime.now()
+        manifest = {'created': created.isoformat(timespec='seconds'), 'tables': {}}
+        written = blocks_total = blocks_new = 0
+        for step, (table, df) in enumerate(tables.items(), 1):
+            schema = [(str(col), str(dtype)) for col, dtype in df.dtypes.items()]
+            signature = json.dumps(schema).encode()
+            row_hashes = self.row_hashes(df)
+            digests = []
+            for start, stop in self._bounds(row_hashes):
+                digest = hashlib.blake2b(signature + row_hashes[start:stop].tobytes(), digest_size=16).hexdigest()
+                size = self._write_block(df.iloc[start:stop], digest)
+                written += size
+                blocks_new += size > 0
+                digests.append(digest)
+            blocks_total += len(digests)
+            manifest['tables'][table] = {'rows': len(df), 'schema': schema, 'blocks': digests}
+            if report:
+                report(step / len(tables), f"{table} : {len(digests)} blocs")
+        manifest.update(bytes_written=written, blocks=blocks_total, new_blocks=blocks_new)
+        path = os.path.join(self.directory, 'manifests', created.strftime("%Y%m%dT%H%M%S%f") + '.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle)
+        os.replace(path + '.tmp', path)
+        self.prune()
+        return {'sauvegarde': manifest['created'], 'blocs': blocks_total, 'nouveaux_blocs': blocks_new,
+                'ecrit_mo': round(written / 1e6, 2)}
+
+    def _manifests(self):
+        return sorted(os.listdir(os.path.join(self.directory, 'manifests')))
+
+    def _load_manifest(self, name):
+        with open(os.path.join(self.directory, 'manifests', name), encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def snapshots(self):
+        """Sauvegardes disponibles, les plus récentes d'abord"""
+        rows = []
+        for name in reversed(self._manifests()):
+            manifest = self._load_manifest(name)
+            rows.append({
+                'sauvegarde': manifest['created'],
+                'lignes': sum(t['rows'] for t in manifest['tables'].values()),
+                'tables': ', '.join(manifest['tables']),
+                'blocs': manifest['blocks'],
+                'nouveaux_blocs': manifest['new_blocks'],
+                'ecrit_mo': round(manifest['bytes_written'] / 1e6, 2)
+            })
+        return pd.DataFrame(rows, columns=['sauvegarde', 'lignes', 'tables', 'blocs', 'nouveaux_blocs', 'ecrit_mo'])
+
+    def restore(self, at=None, tables=None, report=None):
+        """Tables de la dernière sauvegarde antérieure ou égale à `at`"""
+        at = pd.Timestamp(at).to_pydatetime().isoformat(timespec='seconds') if at is not None else None
+        candidates = [self._load_manifest(name) for name in self._manifests()]
+        candidates = [m for m in candidates if at is None or m['created'] <= at]
+        if not candidates:
+            raise ValueError(f"Aucune sauvegarde antérieure à {at}")
+        manifest = candidates[-1]
+        selected = [table for table in manifest['tables'] if tables is None or table in tables]
+        restored = {}
+        for step, table in enumerate(selected, 1):
+            entry = manifest['tables'][table]
+            if pq is not None:
+                parts = [pd.read_parquet(self._block_path(digest)) for digest in entry['blocks']]
+            else:
+                parts = [pd.read_csv(self._block_path(digest)) for digest in entry['blocks']]
+            columns = [col for col, _ in entry['schema']]
+            df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+            if pq is None or not parts:
+                df = df.astype(dict(entry['schema']))
+            restored[table] = df[columns]
+            if report:
+                report(step / len(selected), f"{table} relue")
+        return manifest['created'], restored
+
+    def prune(self, keep=SNAPSHOT_KEEP):
+        """Ne garder que les `keep` dernières sauvegardes et supprimer les blocs orphelins"""
+        with self._lock:
+            names = self._manifests()
+            for name in names[:-keep] if keep else []:
+                os.remove(os.path.join(self.directory, 'manifests', name))
+            referenced = {digest for name in self._manifests()
+                          for entry in self._load_manifest(name)['tables'].values()
+                          for digest in entry['blocks']}
+            removed = 0
+            for root, _, files in os.walk(os.path.join(self.directory, 'blocks')):
+                for file in files:
+                    if file.split('.')[0] not in referenced and not file.endswith('.tmp'):
+                        os.remove(os.path.join(root, file))
+                        removed += 1
+            return removed
+
+    def size_bytes(self):
+        return sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(self.directory) for f in files)
+
+# Tâches de maintenance en arrière-plan
+JOB_WORKERS = int(os.environ.get('UNIVERSITY_JOB_WORKERS', 2))
+
+class JobRunner:
+    """Exécuter les tâches de maintenance en arrière-plan"""
+
+    ACTIVE = ('en attente', 'en cours')
+
+    def __init__(self, path=None, workers=JOB_WORKERS):
+        # path=None : état en mémoire (stockage 'memory', tests)
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        with self.conn:
+            if path:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, name TEXT, label TEXT, user TEXT, "
+                "status TEXT, progress REAL, message TEXT, result TEXT, created TEXT, started TEXT, finished TEXT)"
+            )
+            self.conn.execute("UPDATE jobs SET status = 'interrompue', finished = ? WHERE status IN (?, ?)",
+                              (self._now(), *self.ACTIVE))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='maintenance')
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _update(self, job_id, **fields):
+        with self._lock, self.conn:
+            assignments = ', '.join(f"{column} = ?" for column in fields)
+            self.conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, name, label, func, user=None):
+        """Lancer func(report) en arrière-plan ; renvoie l'identifiant de la tâche"""
+        with self._lock, self.conn:
+            active = self.conn.execute("SELECT id FROM jobs WHERE name = ? AND status IN (?, ?)",
+                                       (name, *self.ACTIVE)).fetchone()
+            if active:
+                return active[0]
+            job_id = uuid.uuid4().hex[:8]
+            self.conn.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, 'en attente', 0, '', NULL, ?, NULL, NULL)",
+                              (job_id, name, label, user, self._now()))
+        self._executor.submit(self._run, job_id, func)
+        return job_id
+
+    def _run(self, job_id, func):
+        self._update(job_id, status='en cours', started=self._now())
+
+        def report(fraction, message=None):
+            fields = {'progress': float(min(max(fraction, 0.0), 1.0))}
+            if message:
+                fields['message'] = message
+            self._update(job_id, **fields)
+
+        try:
+            result = func(report)
+        except Exception as error:
+            self._update(job_id, status='échec', message=str(error), finished=self._now())
+        else:
+            self._update(job_id, status='terminée', progress=1.0, finished=self._now(),
+                         result=json.dumps(result, ensure_ascii=False, default=str))
+
+    def get(self, job_id):
+        """État d'une tâche (dictionnaire, résultat décodé) ou None"""
+        jobs = self.jobs(job_id=job_id)
+        return jobs.iloc[0].to_dict() if len(jobs) else None
+
+    def jobs(self, limit=20, job_id=None):
+        """Dernières tâches, les plus récentes d'abord"""
+        where, params = ("WHERE id = ?", (job_id,)) if job_id else ("", ())
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT * FROM jobs {where} ORDER BY created DESC, rowid DESC LIMIT {int(limit)}",
+                                   self.conn, params=params)
+        df['result'] = [json.loads(value) if isinstance(value, str) else None for value in df['result']]
+        return df
+
+    def active(self):
+        """Au moins une tâche en attente ou en cours"""
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", self.ACTIVE).fetchone() is not None
+
+class MaintenanceJobs:
+    """Tâches de maintenance exécutées par le JobRunner"""
+
+    def __init__(self, manager, figures=None, snapshots=None, audit=None):
+        self.manager = manager
+        self.figures = figures
+        self.snapshots = snapshots
+        self.audit = audit
+
+    def backup(self, report):
+        tables = self.manager.snapshot_tables()
+        if self.audit is not None:
+            tables['audit'] = self.audit.frame()
+        result = self.snapshots.create(tables, report)
+        result['stockage_total_mo'] = round(self.snapshots.size_bytes() / 1e6, 2)
+        return result
+
+    def restore(self, at, tables, report):
+        created, restored = self.snapshots.restore(at, tables, report)
+        for table, df in restored.items():
+            if table == 'audit':
+                self.audit.replace(df)
+            else:
+                self.manager.replace_table(table, df)
+        if self.figures is not None:
+            self.figures.clear()
+        return {'sauvegarde': created, 'tables': {table: len(df) for table, df in restored.items()}}
+
+    def optimize(self, report):
+        before = self.manager.storage.size_bytes()
+        self.manager.storage.optimize(report)
+        return {'avant_mo': round(before / 1e6, 2), 'apres_mo': round(self.manager.storage.size_bytes() / 1e6, 2)}
+
+    def check(self, report):
+        problems = self.manager.storage.check()
+        report(0.3, "Stockage vérifié")
+        controls = self.manager.integrity().report()
+        return {'stockage': problems, 'anomalies': int(controls['anomalies'].sum()),
+                'controles': controls.to_dict('records')}
+
+    def reindex(self, report):
+        fixed = self.manager.repair_integrity(report)
+        report(0.5, "Intégrité réparée")
+        result = self._rebuild_indexes(lambda fraction, message=None: report(0.5 + 0.5 * fraction, message))
+        return {'corrections': fixed, **result}
+
+    def _rebuild_indexes(self, report):
+        self.manager.storage.reindex()
+        report(0.1, "Index du stockage reconstruits")
+        rebuilt = self.manager.rebuild_indexes(lambda fraction, message=None: report(0.1 + 0.9 * fraction, message))
+        return {'tables_reindexees': rebuilt}
+
+    def clear_caches(self, report):
+        self.manager.clear_caches()
+        figures = len(self.figures) if self.figures is not None else 0
+        if self.figures is not None:
+            self.figures.clear()
+        return {'figures_supprimees': figures}
+
+    def restart(self, report):
+        # Redémarrage à chaud des services dérivés : caches vidés puis index reconstruits
+        result = self.clear_caches(report)
+        report(0.2, "Caches vidés")
+        result.update(self._rebuild_indexes(lambda fraction, message=None: report(0.2 + 0.8 * fraction, message)))
+        return result
+
 # Initialisation des systèmes
-auth_system = AuthSystemPro()
-data_manager = DataManager()
+# Les systèmes sont construits une seule fois par processus et partagés par toutes
+# les sessions : un rerun Streamlit ne régénère plus les jeux de données.
+@st.cache_resource(show_spinner="Initialisation de l'authentification...")
+def get_auth_system():
+    """Système d'authentification partagé au niveau du processus"""
+    return AuthSystemPro()
+
+@st.cache_resource(show_spinner="Chargement des données universitaires...")
+def get_data_manager():
+    """Gestionnaire de données partagé au niveau du processus"""
+    return DataManager()
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache des figures partagé au niveau du processus"""
+    return FigureCache()
+
+@st.cache_resource
+def get_snapshot_store():
+    """Sauvegardes incrémentales partagées au niveau du processus"""
+    return SnapshotStore(os.path.join(tempfile.gettempdir(), 'university-snapshots')
+                         if STORAGE_BACKEND == 'memory' else SNAPSHOT_DIR)
+
+@st.cache_resource
+def get_job_runner():
+    """Exécuteur des tâches de maintenance partagé au niveau du processus"""
+    return JobRunner(None if STORAGE_BACKEND == 'memory' else os.path.join(DATA_DIR, 'jobs.db'))
+
+def invalidate_data_layer():
+    """Invalider la couche de données partagée (rechargée au prochain accès)"""
+    get_data_manager.clear()
+    get_figure_cache().clear()
+
+def bind_session_tables():
+    """Faire pointer les tables de session vers l'état partagé courant (aucune copie)"""
+    for table in DATA_TABLES:
+        st.session_state[table] = getattr(data_manager, table)
+
+auth_system = get_auth_system()
+data_manager = get_data_manager()
+figure_cache = get_figure_cache()
+job_runner = get_job_runner()
+snapshot_store = get_snapshot_store()
 
 # Session state
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
 if 'user_info' not in st.session_state:
     st.session_state.user_info = None
-if 'students' not in st.session_state:
-    st.session_state.students = data_manager.students
-if 'professors' not in st.session_state:
-    st.session_state.professors = data_manager.professors
-if 'employees' not in st.session_state:
-    st.session_state.employees = data_manager.employees
-if 'grades' not in st.session_state:
-    st.session_state.grades = data_manager.grades
-if 'timetable' not in st.session_state:
-    st.session_state.timetable = data_manager.timetable
+# Les mutations passent par le DataManager : chaque rerun relit l'état partagé
+bind_session_tables()
 if 'selected_student_id' not in st.session_state:
     st.session_state.selected_student_id = None
 if 'selected_professor_id' not in st.session_state:
@@ -660,37 +3913,23 @@ def show_crud_students():
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            search_term = st.text_input("Rechercher (nom, prénom, CNE)")
+            search_term = st.text_input("Rechercher (nom, prénom, CNE)", help="Insensible aux accents et à la casse")
         
         with col2:
             filiere_filter = st.multiselect("Filière", 
-                                          st.session_state.students['specialite'].unique())
+                                          data_manager.distinct_values('students', 'specialite'))
         
         with col3:
             niveau_filter = st.multiselect("Niveau", 
-                                         st.session_state.students['niveau'].unique())
+                                         data_manager.distinct_values('students', 'niveau'))
         
         with col4:
             statut_filter = st.multiselect("Statut", 
-                                         st.session_state.students['statut'].unique())
-        
-        # Appliquer les filtres
-        filtered_students = st.session_state.students.copy()
-        
-        if search_term:
-            mask = (filtered_students['nom'].str.contains(search_term, case=False) | 
-                   filtered_students['prenom'].str.contains(search_term, case=False) |
-                   filtered_students['cne'].str.contains(search_term, case=False))
-            filtered_students = filtered_students[mask]
+                                         data_manager.distinct_values('students', 'statut'))
         
-        if filiere_filter:
-            filtered_students = filtered_students[filtered_students['specialite'].isin(filiere_filter)]
-        
-        if niveau_filter:
-            filtered_students = filtered_students[filtered_students['niveau'].isin(niveau_filter)]
-        
-        if statut_filter:
-            filtered_students = filtered_students[filtered_students['statut'].isin(statut_filter)]
+        # Filtres résolus par l'index de la table (aucune copie)
+        filters = {'specialite': filiere_filter, 'niveau': niveau_filter, 'statut': statut_filter}
+        within = data_manager.search('students', search_term)
         
         # Actions sur la liste
         col1, col2, col3 = st.columns(3)
@@ -700,25 +3939,23 @@ def show_crud_students():
                 show_import_csv('students')
         
         with col2:
-            if st.button("📤 Exporter CSV", use_container_width=True):
-                show_export_csv(filtered_students, 'etudiants')
+            with st.expander("📤 Exporter"):
+                show_export(lambda: data_manager.query('students', filters, within=within), 'etudiants')
         
         with col3:
             if st.button("🖨️ Générer Rapport", use_container_width=True):
-                show_students_report(filtered_students)
+                show_students_report(data_manager.query('students', filters, within=within))
         
         # Affichage des étudiants
-        st.subheader(f"📋 Liste des Étudiants ({len(filtered_students)} résultats)")
+        results_header = st.empty()
         
         # Sélection des colonnes à afficher
         display_cols = ['cne', 'nom', 'prenom', 'sexe', 'specialite', 'niveau', 'classe', 
                        'ville', 'statut', 'moyenne_generale', 'taux_absence']
         
-        # Affichage du tableau avec actions
-        st.dataframe(
-            filtered_students[display_cols],
-            use_container_width=True,
-            height=400,
+        # Affichage du tableau (page courante uniquement)
+        filtered_students, total = show_paginated_table(
+            'students', display_cols, filters, within, key="students_list",
             column_config={
                 "cne": st.column_config.TextColumn("CNE", width="small"),
                 "nom": st.column_config.TextColumn("Nom", width="medium"),
@@ -745,11 +3982,12 @@ def show_crud_students():
                 )
             }
         )
+        results_header.subheader(f"📋 Liste des Étudiants ({total} résultats)")
         
         # Actions sur les lignes sélectionnées
         if not filtered_students.empty:
             selected_index = st.number_input(
-                "Sélectionner l'index de l'étudiant à modifier/supprimer",
+                "Sélectionner l'index (dans la page) de l'étudiant à modifier/supprimer",
                 min_value=0,
                 max_value=len(filtered_students)-1,
                 value=0
@@ -768,8 +4006,8 @@ def show_crud_students():
             with col2:
                 if st.button("❌ Supprimer cet étudiant", type="secondary", use_container_width=True):
                     if st.checkbox("Confirmer la suppression"):
-                        delete_student(selected_student['id'])
-                        st.success("Étudiant supprimé avec succès !")
+                        counts = delete_student(selected_student['id'])
+                        st.success(f"Étudiant supprimé avec succès ({counts.get('grades', 0)} notes supprimées) !")
                         st.rerun()
     
     with tab2:
@@ -857,8 +4095,8 @@ def show_add_student_form():
                 }
                 
                 # Ajouter à la liste
-                new_df = pd.DataFrame([new_student])
-                st.session_state.students = pd.concat([st.session_state.students, new_df], ignore_index=True)
+                data_manager.add_record('students', new_student)
+                bind_session_tables()
                 
                 # Journaliser l'action
                 auth_system.log_action(
@@ -915,14 +4153,15 @@ def show_edit_student_form(student_id):
         col1, col2 = st.columns(2)
         
         with col1:
-            moyenne_generale = st.number_input("Moyenne générale", 
-                                             value=float(student['moyenne_generale']))
+            # Champs dérivés des notes : en lecture seule, recalculés à chaque saisie de notes
+            st.number_input("Moyenne générale", value=float(student['moyenne_generale']), disabled=True,
+                            help="Calculée à partir des notes")
             taux_absence = st.number_input("Taux d'absence (%)", 
                                          value=float(student['taux_absence']))
         
         with col2:
-            credits_obtenus = st.number_input("Crédits obtenus", 
-                                            value=int(student['credits_obtenus']))
+            st.number_input("Crédits obtenus", value=int(student['credits_obtenus']), disabled=True,
+                            help="Calculés à partir des modules validés")
             date_inscription = st.date_input("Date d'inscription", 
                                            value=datetime.strptime(student['date_inscription'], '%Y-%m-%d'))
         
@@ -968,19 +4207,14 @@ def show_edit_student_form(student_id):
                     'niveau': niveau,
                     'annee_universitaire': annee_universitaire,
                     'statut': statut,
-                    'moyenne_generale': moyenne_generale,
                     'taux_absence': taux_absence,
-                    'credits_obtenus': credits_obtenus,
                     'credits_totaux': 180,
-                    'date_inscription': date_inscription.strftime('%Y-%m-%d'),
-                    'valide': moyenne_generale >= 10
+                    'date_inscription': date_inscription.strftime('%Y-%m-%d')
                 }
                 
                 # Mettre à jour dans le DataFrame
-                idx = st.session_state.students[st.session_state.students['id'] == student_id].index
-                if not idx.empty:
-                    for key, value in updated_student.items():
-                        st.session_state.students.at[idx[0], key] = value
+                data_manager.update_record('students', student_id, updated_student)
+                bind_session_tables()
                 
                 # Journaliser l'action
                 auth_system.log_action(
@@ -996,15 +4230,17 @@ def show_edit_student_form(student_id):
                 st.rerun()
 
 def delete_student(student_id):
-    """Supprimer un étudiant"""
-    st.session_state.students = st.session_state.students[st.session_state.students['id'] != student_id]
+    """Supprimer un étudiant et ses notes (suppression en cascade)"""
+    counts = data_manager.delete_record('students', student_id)
+    bind_session_tables()
     
     # Journaliser l'action
     auth_system.log_action(
         st.session_state.user_info['username'],
         "Suppression étudiant",
-        f"Étudiant supprimé: ID {student_id}"
+        f"Étudiant supprimé: ID {student_id} ({counts.get('grades', 0)} notes supprimées)"
     )
+    return counts
 
 def show_import_csv(data_type):
     """Afficher l'interface d'import CSV"""
@@ -1017,35 +4253,24 @@ def show_import_csv(data_type):
     
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            importer = ChunkedImporter(uploaded_file, uploaded_file.name)
+            preview = importer.preview()
             
-            st.success(f"Fichier chargé avec succès ({len(df)} enregistrements)")
+            st.success(f"Fichier chargé avec succès ({uploaded_file.size / 1e6:.1f} Mo)")
             
             # Aperçu des données
             st.subheader("Aperçu des données")
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(preview, use_container_width=True)
             
             # Mapping des colonnes
             st.subheader("Mapping des colonnes")
             
             # Déterminer les colonnes attendues selon le type de données
-            if data_type == 'students':
-                expected_columns = ['cne', 'nom', 'prenom', 'sexe', 'date_naissance', 
-                                  'ville', 'email', 'telephone', 'specialite', 'classe', 
-                                  'niveau', 'annee_universitaire', 'statut']
-            elif data_type == 'professors':
-                expected_columns = ['nom', 'prenom', 'sexe', 'specialite', 'matieres',
-                                  'experience', 'email', 'telephone', 'ville', 'statut']
-            else:  # employees
-                expected_columns = ['nom', 'prenom', 'sexe', 'poste', 'service',
-                                  'date_recrutement', 'salaire', 'email', 'telephone', 'statut']
+            expected_columns = IMPORT_COLUMNS[data_type]
             
             col_mapping = {}
             for expected_col in expected_columns:
-                available_cols = ['---'] + list(df.columns)
+                available_cols = ['---'] + list(preview.columns)
                 selected_col = st.selectbox(
                     f"Colonne pour '{expected_col}'",
                     available_cols,
@@ -1054,73 +4279,223 @@ def show_import_csv(data_type):
                 if selected_col != '---':
                     col_mapping[expected_col] = selected_col
             
-            if st.button("✅ Confirmer l'import", use_container_width=True):
-                # Vérifier que les colonnes obligatoires sont mappées
-                required_cols = expected_columns[:5]  # Premières colonnes sont obligatoires
-                missing_cols = [col for col in required_cols if col not in col_mapping]
-                
-                if missing_cols:
-                    st.error(f"Colonnes obligatoires non mappées: {', '.join(missing_cols)}")
-                else:
-                    # Préparer les données
-                    imported_data = []
+            natural_key = NATURAL_KEYS[data_type]
+            mode = st.radio(
+                "Mode d'import",
+                [f"🔄 Fusionner sur '{natural_key}' (mise à jour + ajout)", "➕ Ajouter toutes les lignes"],
+                horizontal=True,
+                key=f"import_mode_{data_type}"
+            )
+            merge_mode = mode.startswith("🔄")
+            plan_key = f"import_plan_{data_type}"
+            
+            # Vérifier que les colonnes obligatoires sont mappées
+            required_cols = expected_columns[:5]  # Premières colonnes sont obligatoires
+            if merge_mode and natural_key not in required_cols:
+                required_cols = required_cols + [natural_key]
+            missing_cols = [col for col in required_cols if col not in col_mapping]
+            
+            if merge_mode:
+                # Plan lié au fichier et au mapping : il est abandonné si l'un d'eux change
+                source = (uploaded_file.name, uploaded_file.size)
+                plan = st.session_state.get(plan_key)
+                if plan is not None and (plan['source'] != source or plan['mapping'] != col_mapping):
+                    del st.session_state[plan_key]
+                
+                if st.button("🔍 Analyser les différences", use_container_width=True):
+                    if missing_cols:
+                        st.error(f"Colonnes obligatoires non mappées: {', '.join(missing_cols)}")
+                    else:
+                        # Version lue avant la table : une modification concurrente invalide le plan
+                        version = data_manager.versions[data_type]
+                        merger = UpsertMerger(getattr(data_manager, data_type), data_type, list(col_mapping))
+                        progress_bar = st.progress(0.0, text="Analyse en cours...")
+                        for chunk in importer.chunks():
+                            merger.add(ChunkedImporter.map_chunk(chunk, data_type, col_mapping))
+                            progress_bar.progress(importer.progress, text=f"{merger.rows} lignes analysées...")
+                        progress_bar.empty()
+                        merger.existing = None
+                        st.session_state[plan_key] = {'merger': merger, 'version': version,
+                                                      'source': source, 'mapping': dict(col_mapping)}
+                
+                plan = st.session_state.get(plan_key)
+                if plan is not None:
+                    merger = plan['merger']
+                    summary = merger.summary()
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("➕ Nouveaux", summary['insertions'])
+                    col2.metric("✏️ Modifiés", summary['mises_a_jour'])
+                    col3.metric("⏸️ Inchangés", summary['inchanges'])
+                    col4.metric("⚠️ Conflits", summary['conflits'])
                     
-                    for _, row in df.iterrows():
-                        record = {}
-                        for target_col, source_col in col_mapping.items():
-                            if source_col in df.columns:
-                                record[target_col] = row[source_col]
-                            else:
-                                record[target_col] = None
-                        
-                        # Ajouter un ID unique
-                        record['id'] = str(uuid.uuid4())[:8]
+                    diff = merger.diff()
+                    if not diff.empty:
+                        st.subheader("✏️ Modifications")
+                        st.dataframe(diff.head(500), use_container_width=True)
+                        if len(diff) > 500:
+                            st.caption(f"{len(diff)} modifications au total (500 premières affichées)")
+                    
+                    conflicts = merger.conflict_report()
+                    if not conflicts.empty:
+                        st.subheader("⚠️ Conflits (lignes ignorées)")
+                        st.dataframe(conflicts.head(500), use_container_width=True)
+                    
+                    if st.button("✅ Appliquer la fusion", use_container_width=True):
+                        inserts = pd.concat(merger.inserts, ignore_index=True) if merger.inserts else pd.DataFrame()
+                        applied = data_manager.merge_records(data_type, inserts, merger.updates, plan['version'])
+                        del st.session_state[plan_key]
+                        if not applied:
+                            st.error("❌ La table a été modifiée depuis l'analyse : relancez l'analyse")
+                            return
+                        bind_session_tables()
                         
-                        # Ajouter des champs supplémentaires selon le type
-                        if data_type == 'students':
-                            record['moyenne_generale'] = 10.0
-                            record['taux_absence'] = 0.0
-                            record['credits_obtenus'] = 0
-                            record['credits_totaux'] = 180
-                            record['date_inscription'] = datetime.now().strftime('%Y-%m-%d')
-                            record['valide'] = True
+                        # Journaliser l'action
+                        auth_system.log_action(
+                            st.session_state.user_info['username'],
+                            f"Import {data_type}",
+                            f"Fusion : {summary['insertions']} ajoutés, {summary['mises_a_jour']} mis à jour, "
+                            f"{summary['conflits']} conflits"
+                        )
                         
-                        imported_data.append(record)
+                        st.success(f"✅ Fusion appliquée : {summary['insertions']} ajoutés, "
+                                   f"{summary['mises_a_jour']} mis à jour")
+                        st.balloons()
+            
+            elif st.button("✅ Confirmer l'import", use_container_width=True):
+                if missing_cols:
+                    st.error(f"Colonnes obligatoires non mappées: {', '.join(missing_cols)}")
+                else:
+                    # Chaque bloc est enregistré dès qu'il est lu ; une erreur en cours de
+                    # fichier annule les blocs déjà écrits
+                    progress_bar = st.progress(0.0, text="Import en cours...")
                     
-                    # Fusionner avec les données existantes
-                    imported_df = pd.DataFrame(imported_data)
+                    def mapped_chunks():
+                        for chunk in importer.chunks():
+                            yield ChunkedImporter.map_chunk(chunk, data_type, col_mapping)
+                            progress_bar.progress(importer.progress, text=f"{importer.rows_read} enregistrements importés...")
                     
-                    if data_type == 'students':
-                        st.session_state.students = pd.concat([st.session_state.students, imported_df], ignore_index=True)
-                    elif data_type == 'professors':
-                        st.session_state.professors = pd.concat([st.session_state.professors, imported_df], ignore_index=True)
-                    else:
-                        st.session_state.employees = pd.concat([st.session_state.employees, imported_df], ignore_index=True)
+                    try:
+                        imported = data_manager.append_chunks(data_type, mapped_chunks())
+                    except Exception as e:
+                        bind_session_tables()
+                        st.error(f"❌ Import annulé ({importer.rows_read} lignes lues) : {e}")
+                        return
+                    progress_bar.progress(1.0, text=f"{imported} enregistrements importés")
+                    bind_session_tables()
                     
                     # Journaliser l'action
                     auth_system.log_action(
                         st.session_state.user_info['username'],
                         f"Import {data_type}",
-                        f"{len(imported_data)} enregistrements importés"
+                        f"{imported} enregistrements importés"
                     )
                     
-                    st.success(f"✅ {len(imported_data)} enregistrements importés avec succès !")
+                    st.success(f"✅ {imported} enregistrements importés avec succès !")
                     st.balloons()
                     
         except Exception as e:
             st.error(f"Erreur lors du chargement du fichier: {str(e)}")
 
-def show_export_csv(df, filename):
-    """Exporter des données en CSV"""
-    csv = df.to_csv(index=False).encode('utf-8')
+def show_export(data, filename, key=None):
+    """Exporter des données (DataFrame ou fonction qui le renvoie)"""
+    key = key or f"export_{filename}"
+    fmt = st.selectbox("Format", DataExporter.available_formats(), key=f"{key}_format")
+    compression = st.selectbox("Compression", list(EXPORT_COMPRESSIONS), key=f"{key}_compression",
+                               disabled=(fmt == 'Excel'))
+    
+    if st.button("⚙️ Préparer l'export", key=f"{key}_prepare", use_container_width=True):
+        exporter = DataExporter(fmt, compression)
+        base = f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        with st.spinner("Préparation de l'export..."):
+            content = exporter.to_bytes(data() if callable(data) else data, base)
+        st.download_button(
+            label=f"📥 Télécharger ({fmt}, {len(content) / 1e6:.2f} Mo)",
+            data=content,
+            file_name=exporter.file_name(base),
+            mime=exporter.mime,
+            key=f"{key}_download",
+            use_container_width=True
+        )
+
+def start_maintenance_job(name, label, *args):
+    """Lancer une tâche de maintenance en arrière-plan et la journaliser"""
+    jobs = MaintenanceJobs(data_manager, figure_cache, snapshot_store, auth_system.audit)
+    user = st.session_state.user_info['username']
+    job_id = job_runner.submit(name, label, partial(getattr(jobs, name), *args), user)
+    auth_system.log_action(user, f"Tâche de maintenance : {label}", f"Tâche {job_id}")
+    st.toast(f"⏳ {label} lancée en arrière-plan")
+
+def show_maintenance_jobs():
+    """Suivi des tâches de maintenance (à appeler en dernier dans la page)"""
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        auto_refresh = st.checkbox("Actualisation automatique", value=True, key="jobs_auto_refresh")
+    with col2:
+        st.button("🔄 Actualiser", key="jobs_refresh", use_container_width=True)
+    
+    jobs = job_runner.jobs(limit=10)
+    if jobs.empty:
+        st.caption("Aucune tâche lancée")
+        return
+    for job in jobs.to_dict('records'):
+        icon = {'terminée': '✅', 'échec': '❌', 'interrompue': '⚠️'}.get(job['status'], '⏳')
+        st.markdown(f"{icon} **{job['label']}** — {job['status']} · {job['created']} · {job['user']}")
+        if job['status'] in JobRunner.ACTIVE:
+            st.progress(job['progress'], text=job['message'] or None)
+        elif job['status'] == 'terminée' and job['result']:
+            st.json(job['result'], expanded=False)
+        elif job['message']:
+            st.caption(job['message'])
+    
+    # Les tâches tournent dans leurs propres threads : seule cette session attend
+    if auto_refresh and job_runner.active():
+        time.sleep(2)
+        st.rerun()
+
+def show_cached_chart(chart_id, build, tables, params=()):
+    """Afficher un graphique Plotly mis en cache"""
+    key = (chart_id, params, tuple(data_manager.versions[table] for table in tables))
+    st.plotly_chart(figure_cache.figure(key, build), use_container_width=True)
+
+def show_paginated_table(table, display_cols, filters=None, within=None, key="", column_config=None, style=None):
+    """Afficher une table page par page ; renvoie la page et le nombre de lignes"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        sort_by = st.selectbox("Trier par", ["(aucun)"] + display_cols, key=f"{key}_sort")
+    
+    with col2:
+        ordre = st.radio("Ordre", ["Croissant", "Décroissant"], horizontal=True, key=f"{key}_order")
     
-    st.download_button(
-        label="📥 Télécharger le fichier CSV",
-        data=csv,
-        file_name=f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-        use_container_width=True
+    with col3:
+        page_size = st.selectbox("Éléments par page", [10, 25, 50, 100], index=1, key=f"{key}_page_size")
+    
+    sort_column = None if sort_by == "(aucun)" else sort_by
+    page = st.session_state.get(f"{key}_page", 1)
+    page_df, total = data_manager.query_page(table, page, page_size, sort_column,
+                                             ordre == "Croissant", filters, within)
+    total_pages = max(1, -(-total // page_size))
+    if page > total_pages:
+        page = st.session_state[f"{key}_page"] = total_pages
+        page_df, total = data_manager.query_page(table, page, page_size, sort_column,
+                                                 ordre == "Croissant", filters, within)
+    
+    display_df = page_df[display_cols]
+    st.dataframe(
+        style(display_df) if style else display_df,
+        use_container_width=True,
+        height=400,
+        column_config=column_config
     )
+    
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=total_pages, value=page, key=f"{key}_page")
+    with col2:
+        start = (page - 1) * page_size
+        st.caption(f"Affichage {min(start + 1, total)} à {start + len(page_df)} sur {total} ({total_pages} pages)")
+    
+    return page_df, total
 
 def show_students_report(df):
     """Générer un rapport des étudiants"""
@@ -1173,23 +4548,24 @@ def show_students_statistics():
     st.subheader("📊 Statistiques Globales des Étudiants")
     
     # KPIs
+    student_kpis = data_manager.kpis('students')
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total = len(st.session_state.students)
+        total = student_kpis.count
         st.metric("Total étudiants", total)
     
     with col2:
-        validated = st.session_state.students['valide'].sum()
+        validated = int(student_kpis.total('valide'))
         rate = (validated / total * 100) if total > 0 else 0
         st.metric("Validés", validated, f"{rate:.1f}%")
     
     with col3:
-        avg_grade = st.session_state.students['moyenne_generale'].mean()
+        avg_grade = student_kpis.mean('moyenne_generale')
         st.metric("Moyenne générale", f"{avg_grade:.2f}/20")
     
     with col4:
-        avg_absence = st.session_state.students['taux_absence'].mean()
+        avg_absence = student_kpis.mean('taux_absence')
         st.metric("Absence moyenne", f"{avg_absence:.1f}%")
     
     # Graphiques avancés
@@ -1197,23 +4573,27 @@ def show_students_statistics():
     
     with col1:
         # Distribution des moyennes
-        fig = px.histogram(st.session_state.students, x='moyenne_generale', nbins=20,
-                          title="Distribution des moyennes",
-                          color_discrete_sequence=['#3498db'])
-        fig.add_vline(x=10, line_dash="dash", line_color="red", annotation_text="Seuil validation")
-        st.plotly_chart(fig, use_container_width=True)
+        def build_figure():
+            fig = histogram_chart(st.session_state.students['moyenne_generale'], nbins=20,
+                                  title="Distribution des moyennes", color='#3498db')
+            fig.add_vline(x=10, line_dash="dash", line_color="red", annotation_text="Seuil validation")
+            return fig
+        show_cached_chart('students_stats_moyennes', build_figure, ['students'])
     
     with col2:
         # Corrélation absence/moyenne
-        fig = px.scatter(st.session_state.students, x='taux_absence', y='moyenne_generale',
-                        color='specialite', hover_data=['nom', 'prenom', 'classe'],
-                        title="Corrélation absence ↔ moyenne")
-        st.plotly_chart(fig, use_container_width=True)
+        def build_figure():
+            fig = scatter_chart(st.session_state.students, x='taux_absence', y='moyenne_generale',
+                                color='specialite', hover_data=['nom', 'prenom', 'classe'],
+                                title="Corrélation absence ↔ moyenne")
+            return fig
+        show_cached_chart('students_stats_absences', build_figure, ['students'])
     
     # Top 10 des étudiants
     st.subheader("🏆 Top 10 des Étudiants")
     
-    top_students = st.session_state.students.nlargest(10, 'moyenne_generale')[['cne', 'nom', 'prenom', 'specialite', 'niveau', 'moyenne_generale']]
+    top_students = data_manager.records('students', student_kpis.top('moyenne_generale', 10))[
+        ['cne', 'nom', 'prenom', 'specialite', 'niveau', 'moyenne_generale']]
     top_students['Classement'] = range(1, len(top_students) + 1)
     
     st.dataframe(top_students, use_container_width=True)
@@ -1234,26 +4614,15 @@ def show_crud_professors():
         
         with col2:
             specialite_filter = st.multiselect("Spécialité", 
-                                             st.session_state.professors['specialite'].unique())
+                                             data_manager.distinct_values('professors', 'specialite'))
         
         with col3:
             statut_filter = st.multiselect("Statut", 
-                                         st.session_state.professors['statut'].unique())
-        
-        # Appliquer les filtres
-        filtered_professors = st.session_state.professors.copy()
-        
-        if search_term:
-            mask = (filtered_professors['nom'].str.contains(search_term, case=False) | 
-                   filtered_professors['prenom'].str.contains(search_term, case=False) |
-                   filtered_professors['specialite'].str.contains(search_term, case=False))
-            filtered_professors = filtered_professors[mask]
+                                         data_manager.distinct_values('professors', 'statut'))
         
-        if specialite_filter:
-            filtered_professors = filtered_professors[filtered_professors['specialite'].isin(specialite_filter)]
-        
-        if statut_filter:
-            filtered_professors = filtered_professors[filtered_professors['statut'].isin(statut_filter)]
+        # Filtres résolus par l'index de la table (aucune copie)
+        filters = {'specialite': specialite_filter, 'statut': statut_filter}
+        within = data_manager.search('professors', search_term)
         
         # Actions sur la liste
         col1, col2, col3 = st.columns(3)
@@ -1263,25 +4632,23 @@ def show_crud_professors():
                 show_import_csv('professors')
         
         with col2:
-            if st.button("📤 Exporter CSV", use_container_width=True, key="prof_export"):
-                show_export_csv(filtered_professors, 'professeurs')
+            with st.expander("📤 Exporter"):
+                show_export(lambda: data_manager.query('professors', filters, within=within), 'professeurs')
         
         with col3:
             if st.button("🖨️ Générer Rapport", use_container_width=True, key="prof_report"):
-                show_professors_report(filtered_professors)
+                show_professors_report(data_manager.query('professors', filters, within=within))
         
         # Affichage des professeurs
-        st.subheader(f"📋 Liste des Professeurs ({len(filtered_professors)} résultats)")
+        results_header = st.empty()
         
         # Sélection des colonnes à afficher
         display_cols = ['nom', 'prenom', 'sexe', 'specialite', 'matieres', 'experience', 
                        'statut', 'heures_semaine', 'classes_assigned', 'taux_presence']
         
-        # Affichage du tableau avec actions
-        st.dataframe(
-            filtered_professors[display_cols],
-            use_container_width=True,
-            height=400,
+        # Affichage du tableau (page courante uniquement)
+        filtered_professors, total = show_paginated_table(
+            'professors', display_cols, filters, within, key="professors_list",
             column_config={
                 "nom": st.column_config.TextColumn("Nom", width="medium"),
                 "prenom": st.column_config.TextColumn("Prénom", width="medium"),
@@ -1299,11 +4666,12 @@ def show_crud_professors():
                 "taux_presence": st.column_config.NumberColumn("Présence %", format="%.1f", width="small")
             }
         )
+        results_header.subheader(f"📋 Liste des Professeurs ({total} résultats)")
         
         # Actions sur les lignes sélectionnées
         if not filtered_professors.empty:
             selected_index = st.number_input(
-                "Sélectionner l'index du professeur à modifier/supprimer",
+                "Sélectionner l'index (dans la page) du professeur à modifier/supprimer",
                 min_value=0,
                 max_value=len(filtered_professors)-1,
                 value=0,
@@ -1320,10 +4688,13 @@ def show_crud_professors():
                     st.rerun()
             
             with col2:
+                seances = st.radio("Séances du professeur", ["Conserver « À définir »", "Supprimer"],
+                                   horizontal=True, key="prof_delete_seances")
                 if st.button("❌ Supprimer ce professeur", type="secondary", use_container_width=True, key="prof_delete"):
                     if st.checkbox("Confirmer la suppression", key="prof_delete_confirm"):
-                        delete_professor(selected_professor['id'])
-                        st.success("Professeur supprimé avec succès !")
+                        counts = delete_professor(selected_professor['id'],
+                                                  'cascade' if seances == "Supprimer" else None)
+                        st.success(f"Professeur supprimé avec succès ({counts.get('timetable', 0)} séances) !")
                         st.rerun()
     
     with tab2:
@@ -1404,8 +4775,8 @@ def show_add_professor_form():
                 }
                 
                 # Ajouter à la liste
-                new_df = pd.DataFrame([new_professor])
-                st.session_state.professors = pd.concat([st.session_state.professors, new_df], ignore_index=True)
+                data_manager.add_record('professors', new_professor)
+                bind_session_tables()
                 
                 # Journaliser l'action
                 auth_system.log_action(
@@ -1517,10 +4888,8 @@ def show_edit_professor_form(professor_id):
                 }
                 
                 # Mettre à jour dans le DataFrame
-                idx = st.session_state.professors[st.session_state.professors['id'] == professor_id].index
-                if not idx.empty:
-                    for key, value in updated_professor.items():
-                        st.session_state.professors.at[idx[0], key] = value
+                data_manager.update_record('professors', professor_id, updated_professor)
+                bind_session_tables()
                 
                 # Journaliser l'action
                 auth_system.log_action(
@@ -1534,16 +4903,19 @@ def show_edit_professor_form(professor_id):
                 st.session_state.selected_professor_id = None
                 st.rerun()
 
-def delete_professor(professor_id):
-    """Supprimer un professeur"""
-    st.session_state.professors = st.session_state.professors[st.session_state.professors['id'] != professor_id]
+def delete_professor(professor_id, on_delete=None):
+    """Supprimer un professeur (séances « À définir » ou supprimées)"""
+    counts = data_manager.delete_record('professors', professor_id, on_delete)
+    bind_session_tables()
     
     # Journaliser l'action
     auth_system.log_action(
         st.session_state.user_info['username'],
         "Suppression professeur",
-        f"Professeur supprimé: ID {professor_id}"
+        f"Professeur supprimé: ID {professor_id} ({counts.get('timetable', 0)} séances "
+        f"{'supprimées' if on_delete == 'cascade' else 'à réaffecter'})"
     )
+    return counts
 
 def show_professors_report(df):
     """Générer un rapport des professeurs"""
@@ -1642,26 +5014,15 @@ def show_crud_employees():
         
         with col2:
             service_filter = st.multiselect("Service", 
-                                          st.session_state.employees['service'].unique())
+                                          data_manager.distinct_values('employees', 'service'))
         
         with col3:
             statut_filter = st.multiselect("Statut", 
-                                         st.session_state.employees['statut'].unique())
-        
-        # Appliquer les filtres
-        filtered_employees = st.session_state.employees.copy()
-        
-        if search_term:
-            mask = (filtered_employees['nom'].str.contains(search_term, case=False) | 
-                   filtered_employees['prenom'].str.contains(search_term, case=False) |
-                   filtered_employees['poste'].str.contains(search_term, case=False))
-            filtered_employees = filtered_employees[mask]
+                                         data_manager.distinct_values('employees', 'statut'))
         
-        if service_filter:
-            filtered_employees = filtered_employees[filtered_employees['service'].isin(service_filter)]
-        
-        if statut_filter:
-            filtered_employees = filtered_employees[filtered_employees['statut'].isin(statut_filter)]
+        # Filtres résolus par l'index de la table (aucune copie)
+        filters = {'service': service_filter, 'statut': statut_filter}
+        within = data_manager.search('employees', search_term)
         
         # Actions sur la liste
         col1, col2, col3 = st.columns(3)
@@ -1671,25 +5032,23 @@ def show_crud_employees():
                 show_import_csv('employees')
         
         with col2:
-            if st.button("📤 Exporter CSV", use_container_width=True, key="emp_export"):
-                show_export_csv(filtered_employees, 'employes')
+            with st.expander("📤 Exporter"):
+                show_export(lambda: data_manager.query('employees', filters, within=within), 'employes')
         
         with col3:
             if st.button("🖨️ Générer Rapport", use_container_width=True, key="emp_report"):
-                show_employees_report(filtered_employees)
+                show_employees_report(data_manager.query('employees', filters, within=within))
         
         # Affichage des employés
-        st.subheader(f"📋 Liste des Employés ({len(filtered_employees)} résultats)")
+        results_header = st.empty()
         
         # Sélection des colonnes à afficher
         display_cols = ['nom', 'prenom', 'sexe', 'poste', 'service', 'date_recrutement', 
                        'experience', 'salaire', 'statut', 'taux_presence']
         
-        # Affichage du tableau avec actions
-        st.dataframe(
-            filtered_employees[display_cols],
-            use_container_width=True,
-            height=400,
+        # Affichage du tableau (page courante uniquement)
+        filtered_employees, total = show_paginated_table(
+            'employees', display_cols, filters, within, key="employees_list",
             column_config={
                 "nom": st.column_config.TextColumn("Nom", width="medium"),
                 "prenom": st.column_config.TextColumn("Prénom", width="medium"),
@@ -1707,11 +5066,12 @@ def show_crud_employees():
                 "taux_presence": st.column_config.NumberColumn("Présence %", format="%.1f", width="small")
             }
         )
+        results_header.subheader(f"📋 Liste des Employés ({total} résultats)")
         
         # Actions sur les lignes sélectionnées
         if not filtered_employees.empty:
             selected_index = st.number_input(
-                "Sélectionner l'index de l'employé à modifier/supprimer",
+                "Sélectionner l'index (dans la page) de l'employé à modifier/supprimer",
                 min_value=0,
                 max_value=len(filtered_employees)-1,
                 value=0,
@@ -1807,8 +5167,8 @@ def show_add_employee_form():
                 }
                 
                 # Ajouter à la liste
-                new_df = pd.DataFrame([new_employee])
-                st.session_state.employees = pd.concat([st.session_state.employees, new_df], ignore_index=True)
+                data_manager.add_record('employees', new_employee)
+                bind_session_tables()
                 
                 # Journaliser l'action
                 auth_system.log_action(
@@ -1910,10 +5270,8 @@ def show_edit_employee_form(employee_id):
                 }
                 
                 # Mettre à jour dans le DataFrame
-                idx = st.session_state.employees[st.session_state.employees['id'] == employee_id].index
-                if not idx.empty:
-                    for key, value in updated_employee.items():
-                        st.session_state.employees.at[idx[0], key] = value
+                data_manager.update_record('employees', employee_id, updated_employee)
+                bind_session_tables()
                 
                 # Journaliser l'action
                 auth_system.log_action(
@@ -1929,7 +5287,8 @@ def show_edit_employee_form(employee_id):
 
 def delete_employee(employee_id):
     """Supprimer un employé"""
-    st.session_state.employees = st.session_state.employees[st.session_state.employees['id'] != employee_id]
+    data_manager.delete_record('employees', employee_id)
+    bind_session_tables()
     
     # Journaliser l'action
     auth_system.log_action(
@@ -1984,10 +5343,11 @@ def show_employees_dashboard():
     st.subheader("📊 Dashboard Employés - Administration")
     
     # KPIs
+    employee_kpis = data_manager.kpis('employees')
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total = len(st.session_state.employees)
+        total = employee_kpis.count
         st.markdown(f"""
         <div class='kpi-card-employee'>
             <div class='kpi-title'>TOTAL EMPLOYÉS</div>
@@ -1997,7 +5357,7 @@ def show_employees_dashboard():
         """, unsafe_allow_html=True)
     
     with col2:
-        active = len(st.session_state.employees[st.session_state.employees['statut'] == 'Actif'])
+        active = employee_kpis.count_of('statut', 'Actif')
         rate = (active / total * 100) if total > 0 else 0
         st.markdown(f"""
         <div class='kpi-card'>
@@ -2008,7 +5368,7 @@ def show_employees_dashboard():
         """, unsafe_allow_html=True)
     
     with col3:
-        avg_salary = st.session_state.employees['salaire'].mean()
+        avg_salary = employee_kpis.mean('salaire')
         st.markdown(f"""
         <div class='kpi-card-secondary'>
             <div class='kpi-title'>SALAIRE MOYEN</div>
@@ -2018,7 +5378,7 @@ def show_employees_dashboard():
         """, unsafe_allow_html=True)
     
     with col4:
-        avg_experience = st.session_state.employees['experience'].mean()
+        avg_experience = employee_kpis.mean('experience')
         st.markdown(f"""
         <div class='kpi-card-tertiary'>
             <div class='kpi-title'>ANCIENNETÉ MOYENNE</div>
@@ -2034,20 +5394,23 @@ def show_employees_dashboard():
     
     with col1:
         # Distribution des salaires
-        fig = px.histogram(st.session_state.employees, x='salaire', nbins=15,
-                          title="Distribution des salaires",
-                          color_discrete_sequence=['#43e97b'])
-        st.plotly_chart(fig, use_container_width=True)
+        def build_figure():
+            fig = histogram_chart(st.session_state.employees['salaire'], nbins=15,
+                                  title="Distribution des salaires", color='#43e97b')
+            return fig
+        show_cached_chart('employees_salaires', build_figure, ['employees'])
     
     with col2:
         # Présence par service
-        presence_by_service = st.session_state.employees.groupby('service')['taux_presence'].mean().reset_index()
-        fig = px.bar(presence_by_service.sort_values('taux_presence', ascending=False),
-                    x='service', y='taux_presence',
-                    title="Taux de présence moyen par service",
-                    color='taux_presence',
-                    color_continuous_scale='RdYlGn')
-        st.plotly_chart(fig, use_container_width=True)
+        def build_figure():
+            presence_by_service = st.session_state.employees.groupby('service')['taux_presence'].mean().reset_index()
+            fig = px.bar(presence_by_service.sort_values('taux_presence', ascending=False),
+                        x='service', y='taux_presence',
+                        title="Taux de présence moyen par service",
+                        color='taux_presence',
+                        color_continuous_scale='RdYlGn')
+            return fig
+        show_cached_chart('employees_presence', build_figure, ['employees'])
     
     # Tableau de bord avancé
     st.subheader("🏢 Vue par Service")
@@ -2086,9 +5449,14 @@ def show_admin_global_dashboard():
     
     col1, col2, col3, col4 = st.columns(4)
     
+    # Indicateurs lus dans le magasin de KPI (aucun parcours des tables)
+    student_kpis = data_manager.kpis('students')
+    professor_kpis = data_manager.kpis('professors')
+    employee_kpis = data_manager.kpis('employees')
+    
     with col1:
-        total_students = len(st.session_state.students)
-        active_students = len(st.session_state.students[st.session_state.students['statut'] == 'Actif'])
+        total_students = student_kpis.count
+        active_students = student_kpis.count_of('statut', 'Actif')
         st.markdown(f"""
         <div class='kpi-card'>
             <div class='kpi-title'>ÉTUDIANTS</div>
@@ -2098,8 +5466,8 @@ def show_admin_global_dashboard():
         """, unsafe_allow_html=True)
     
     with col2:
-        total_professors = len(st.session_state.professors)
-        permanent_prof = len(st.session_state.professors[st.session_state.professors['statut'] == 'Permanent'])
+        total_professors = professor_kpis.count
+        permanent_prof = professor_kpis.count_of('statut', 'Permanent')
         st.markdown(f"""
         <div class='kpi-card-secondary'>
             <div class='kpi-title'>PROFESSEURS</div>
@@ -2109,8 +5477,8 @@ def show_admin_global_dashboard():
         """, unsafe_allow_html=True)
     
     with col3:
-        total_employees = len(st.session_state.employees)
-        active_employees = len(st.session_state.employees[st.session_state.employees['statut'] == 'Actif'])
+        total_employees = employee_kpis.count
+        active_employees = employee_kpis.count_of('statut', 'Actif')
         st.markdown(f"""
         <div class='kpi-card-tertiary'>
             <div class='kpi-title'>EMPLOYÉS</div>
@@ -2136,20 +5504,20 @@ def show_admin_global_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        validated = st.session_state.students['valide'].sum()
+        validated = int(student_kpis.total('valide'))
         rate = (validated / total_students * 100) if total_students > 0 else 0
         st.metric("Taux validation", f"{rate:.1f}%", f"{validated}/{total_students}")
     
     with col2:
-        avg_grade = st.session_state.students['moyenne_generale'].mean()
+        avg_grade = student_kpis.mean('moyenne_generale')
         st.metric("Moyenne générale", f"{avg_grade:.2f}/20")
     
     with col3:
-        avg_absence = st.session_state.students['taux_absence'].mean()
+        avg_absence = student_kpis.mean('taux_absence')
         st.metric("Absence moyenne", f"{avg_absence:.1f}%")
     
     with col4:
-        best_grade = st.session_state.students['moyenne_generale'].max()
+        best_grade = student_kpis.max('moyenne_generale')
         st.metric("Meilleure note", f"{best_grade:.2f}/20")
     
     # Section Professeurs
@@ -2158,19 +5526,19 @@ def show_admin_global_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_hours = st.session_state.professors['heures_semaine'].sum()
+        total_hours = int(professor_kpis.total('heures_semaine'))
         st.metric("Heures totales", f"{total_hours}h/sem")
     
     with col2:
-        avg_experience = st.session_state.professors['experience'].mean()
+        avg_experience = professor_kpis.mean('experience')
         st.metric("Expérience moyenne", f"{avg_experience:.1f} ans")
     
     with col3:
-        avg_presence = st.session_state.professors['taux_presence'].mean()
+        avg_presence = professor_kpis.mean('taux_presence')
         st.metric("Présence moyenne", f"{avg_presence:.1f}%")
     
     with col4:
-        avg_evaluation = st.session_state.professors['derniere_evaluation'].mean()
+        avg_evaluation = professor_kpis.mean('derniere_evaluation')
         st.metric("Évaluation moyenne", f"{avg_evaluation:.1f}/5")
     
     # Section Employés
@@ -2179,24 +5547,27 @@ def show_admin_global_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_salary = st.session_state.employees['salaire'].sum()
+        total_salary = employee_kpis.total('salaire')
         st.metric("Masse salariale", f"{total_salary:,.0f}€/mois")
     
     with col2:
-        avg_emp_experience = st.session_state.employees['experience'].mean()
+        avg_emp_experience = employee_kpis.mean('experience')
         st.metric("Ancienneté moyenne", f"{avg_emp_experience:.1f} ans")
     
     with col3:
-        avg_emp_presence = st.session_state.employees['taux_presence'].mean()
+        avg_emp_presence = employee_kpis.mean('taux_presence')
         st.metric("Présence employés", f"{avg_emp_presence:.1f}%")
     
     with col4:
-        avg_emp_evaluation = st.session_state.employees['evaluation'].mean()
+        avg_emp_evaluation = employee_kpis.mean('evaluation')
         st.metric("Évaluation employés", f"{avg_emp_evaluation:.1f}/5")
     
     # Graphiques comparatifs
     st.subheader("📈 Analyses Comparatives")
     
+    # Agrégats par spécialité partagés par les graphiques et les alertes
+    specialites = data_manager.specialite_analytics()
+    
     tab1, tab2, tab3 = st.tabs(["📊 Répartition Globale", "📈 Performance Académique", "💰 Coûts & Budgets"])
     
     with tab1:
@@ -2204,154 +5575,121 @@ def show_admin_global_dashboard():
         
         with col1:
             # Répartition population universitaire
-            categories = ['Étudiants', 'Professeurs', 'Employés']
-            values = [total_students, total_professors, total_employees]
+            def build_figure():
+                categories = ['Étudiants', 'Professeurs', 'Employés']
+                values = [total_students, total_professors, total_employees]
             
-            fig = px.pie(values=values, names=categories,
-                        title="Répartition de la population universitaire",
-                        color_discrete_sequence=['#3498db', '#e74c3c', '#2ecc71'])
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.pie(values=values, names=categories,
+                            title="Répartition de la population universitaire",
+                            color_discrete_sequence=['#3498db', '#e74c3c', '#2ecc71'])
+                return fig
+            show_cached_chart('admin_population', build_figure, ['students', 'professors', 'employees'])
         
         with col2:
             # Ratio étudiants/professeurs par spécialité
-            ratio_data = []
-            for specialite in st.session_state.students['specialite'].unique():
-                nb_students = len(st.session_state.students[st.session_state.students['specialite'] == specialite])
-                nb_professors = len(st.session_state.professors[st.session_state.professors['specialite'] == specialite])
-                ratio = nb_students / nb_professors if nb_professors > 0 else 0
-                ratio_data.append({
-                    'Spécialité': specialite,
-                    'Ratio': ratio,
-                    'Étudiants': nb_students,
-                    'Professeurs': nb_professors
+            def build_figure():
+                ratio_df = specialites[specialites['etudiants'] > 0].rename(columns={
+                    'specialite': 'Spécialité',
+                    'ratio': 'Ratio',
+                    'etudiants': 'Étudiants',
+                    'professeurs': 'Professeurs'
                 })
             
-            ratio_df = pd.DataFrame(ratio_data)
-            
-            fig = px.bar(ratio_df.sort_values('Ratio', ascending=False),
-                        x='Spécialité', y='Ratio',
-                        title="Ratio étudiants/professeurs par spécialité",
-                        color='Ratio',
-                        color_continuous_scale='RdYlGn_r')
-            fig.add_hline(y=20, line_dash="dash", line_color="red", annotation_text="Seuil idéal")
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.bar(ratio_df.sort_values('Ratio', ascending=False),
+                            x='Spécialité', y='Ratio',
+                            title="Ratio étudiants/professeurs par spécialité",
+                            color='Ratio',
+                            color_continuous_scale='RdYlGn_r')
+                fig.add_hline(y=20, line_dash="dash", line_color="red", annotation_text="Seuil idéal")
+                return fig
+            show_cached_chart('admin_ratio', build_figure, ['students', 'professors'])
     
     with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
             # Taux de validation par spécialité
-            validation_by_specialite = st.session_state.students.groupby('specialite').agg({
-                'id': 'count',
-                'valide': 'sum'
-            }).reset_index()
-            
-            validation_by_specialite['taux_validation'] = (validation_by_specialite['valide'] / validation_by_specialite['id'] * 100).round(1)
+            def build_figure():
+                validation_by_specialite = specialites[specialites['etudiants'] > 0]
             
-            fig = px.bar(validation_by_specialite.sort_values('taux_validation', ascending=False),
-                        x='specialite', y='taux_validation',
-                        title="Taux de validation par spécialité",
-                        color='taux_validation',
-                        color_continuous_scale='RdYlGn')
-            fig.add_hline(y=70, line_dash="dash", line_color="orange", annotation_text="Objectif")
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.bar(validation_by_specialite.sort_values('taux_validation', ascending=False),
+                            x='specialite', y='taux_validation',
+                            title="Taux de validation par spécialité",
+                            color='taux_validation',
+                            color_continuous_scale='RdYlGn')
+                fig.add_hline(y=70, line_dash="dash", line_color="orange", annotation_text="Objectif")
+                return fig
+            show_cached_chart('admin_validation', build_figure, ['students', 'professors'])
         
         with col2:
             # Corrélation expérience prof / réussite étudiants
-            # Simulation de données pour l'exemple
-            correlation_data = []
-            for specialite in st.session_state.professors['specialite'].unique():
-                prof_exp = st.session_state.professors[
-                    st.session_state.professors['specialite'] == specialite
-                ]['experience'].mean()
-                
-                student_success = st.session_state.students[
-                    st.session_state.students['specialite'] == specialite
-                ]['moyenne_generale'].mean()
-                
-                correlation_data.append({
-                    'Spécialité': specialite,
-                    'Expérience moyenne profs': prof_exp,
-                    'Moyenne étudiants': student_success
+            def build_figure():
+                correlation_df = specialites.dropna(subset=['experience_profs', 'moyenne_etudiants']).rename(columns={
+                    'specialite': 'Spécialité',
+                    'experience_profs': 'Expérience moyenne profs',
+                    'moyenne_etudiants': 'Moyenne étudiants'
                 })
             
-            correlation_df = pd.DataFrame(correlation_data)
-            
-            fig = px.scatter(correlation_df, 
-                           x='Expérience moyenne profs', y='Moyenne étudiants',
-                           size='Moyenne étudiants', color='Spécialité',
-                           hover_name='Spécialité',
-                           title="Corrélation expérience profs ↔ réussite étudiants")
-            
-            # Ligne de tendance
-            if len(correlation_df) > 1:
-                z = np.polyfit(correlation_df['Expérience moyenne profs'], 
-                             correlation_df['Moyenne étudiants'], 1)
-                p = np.poly1d(z)
-                x_line = np.linspace(correlation_df['Expérience moyenne profs'].min(), 
-                                   correlation_df['Expérience moyenne profs'].max(), 100)
-                y_line = p(x_line)
-                
-                fig.add_trace(go.Scatter(x=x_line, y=y_line, mode='lines', 
-                                       name='Tendance', line=dict(color='red', dash='dash')))
-            
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.scatter(correlation_df, 
+                               x='Expérience moyenne profs', y='Moyenne étudiants',
+                               size='Moyenne étudiants', color='Spécialité',
+                               hover_name='Spécialité',
+                               title="Corrélation expérience profs ↔ réussite étudiants")
+            
+                # Ligne de tendance
+                if len(correlation_df) > 1:
+                    z = np.polyfit(correlation_df['Expérience moyenne profs'], 
+                                 correlation_df['Moyenne étudiants'], 1)
+                    p = np.poly1d(z)
+                    x_line = np.linspace(correlation_df['Expérience moyenne profs'].min(), 
+                                       correlation_df['Expérience moyenne profs'].max(), 100)
+                    y_line = p(x_line)
+                
+                    fig.add_trace(go.Scatter(x=x_line, y=y_line, mode='lines', 
+                                           name='Tendance', line=dict(color='red', dash='dash')))
+                return fig
+            show_cached_chart('admin_correlation', build_figure, ['students', 'professors'])
     
     with tab3:
         col1, col2 = st.columns(2)
         
         with col1:
             # Coûts salariaux par service
-            salary_by_service = st.session_state.employees.groupby('service').agg({
-                'salaire': 'sum',
-                'id': 'count'
-            }).reset_index()
-            
-            salary_by_service.columns = ['Service', 'Masse salariale', 'Nombre employés']
-            salary_by_service['Coût moyen'] = (salary_by_service['Masse salariale'] / salary_by_service['Nombre employés']).round(0)
-            
-            fig = px.bar(salary_by_service.sort_values('Masse salariale', ascending=False),
-                        x='Service', y='Masse salariale',
-                        title="Masse salariale par service",
-                        color='Coût moyen',
-                        color_continuous_scale='Blues')
-            st.plotly_chart(fig, use_container_width=True)
+            def build_figure():
+                salary_by_service = st.session_state.employees.groupby('service').agg({
+                    'salaire': 'sum',
+                    'id': 'count'
+                }).reset_index()
+            
+                salary_by_service.columns = ['Service', 'Masse salariale', 'Nombre employés']
+                salary_by_service['Coût moyen'] = (salary_by_service['Masse salariale'] / salary_by_service['Nombre employés']).round(0)
+            
+                fig = px.bar(salary_by_service.sort_values('Masse salariale', ascending=False),
+                            x='Service', y='Masse salariale',
+                            title="Masse salariale par service",
+                            color='Coût moyen',
+                            color_continuous_scale='Blues')
+                return fig
+            show_cached_chart('admin_salaires', build_figure, ['employees'])
         
         with col2:
             # Coût par étudiant par spécialité (simulation)
-            cost_data = []
-            for specialite in st.session_state.students['specialite'].unique():
-                nb_students = len(st.session_state.students[st.session_state.students['specialite'] == specialite])
-                
-                # Coût estimé (simulation)
-                base_cost = {
-                    'Informatique': 8000,
-                    'Mathématiques': 6000,
-                    'Physique': 7500,
-                    'Chimie': 7000,
-                    'Biologie': 6500,
-                    'Économie': 5500,
-                    'Droit': 5000
-                }.get(specialite, 6000)
-                
-                total_cost = nb_students * base_cost
-                cost_per_student = total_cost / nb_students if nb_students > 0 else 0
-                
-                cost_data.append({
-                    'Spécialité': specialite,
-                    'Nombre étudiants': nb_students,
-                    'Coût total (k€)': total_cost / 1000,
-                    'Coût/étudiant (€)': cost_per_student
+            def build_figure():
+                cost_df = specialites[specialites['etudiants'] > 0]
+                cost_df = pd.DataFrame({
+                    'Spécialité': cost_df['specialite'],
+                    'Nombre étudiants': cost_df['etudiants'],
+                    'Coût total (k€)': cost_df['cout_total'] / 1000,
+                    'Coût/étudiant (€)': cost_df['cout_etudiant']
                 })
             
-            cost_df = pd.DataFrame(cost_data)
-            
-            fig = px.bar(cost_df.sort_values('Coût/étudiant (€)', ascending=False),
-                        x='Spécialité', y='Coût/étudiant (€)',
-                        title="Coût moyen par étudiant par spécialité",
-                        color='Coût total (k€)',
-                        color_continuous_scale='Viridis')
-            st.plotly_chart(fig, use_container_width=True)
+                fig = px.bar(cost_df.sort_values('Coût/étudiant (€)', ascending=False),
+                            x='Spécialité', y='Coût/étudiant (€)',
+                            title="Coût moyen par étudiant par spécialité",
+                            color='Coût total (k€)',
+                            color_continuous_scale='Viridis')
+                return fig
+            show_cached_chart('admin_couts', build_figure, ['students', 'professors'])
     
     # Alertes administratives
     st.subheader("⚠️ Alertes Administratives")
@@ -2359,38 +5697,32 @@ def show_admin_global_dashboard():
     alerts = []
     
     # Vérifier les ratios étudiants/professeurs
-    for specialite in st.session_state.students['specialite'].unique():
-        nb_students = len(st.session_state.students[st.session_state.students['specialite'] == specialite])
-        nb_professors = len(st.session_state.professors[st.session_state.professors['specialite'] == specialite])
-        
-        if nb_professors > 0:
-            ratio = nb_students / nb_professors
-            if ratio > 25:
-                alerts.append({
-                    "type": "danger",
-                    "message": f"⚠️ Ratio élevé en {specialite}: {ratio:.1f} étudiants/professeur"
-                })
-            elif ratio > 20:
-                alerts.append({
-                    "type": "warning",
-                    "message": f"⚠️ Ratio élevé en {specialite}: {ratio:.1f} étudiants/professeur"
-                })
+    for specialite, ratio in specialites.loc[(specialites['etudiants'] > 0) & (specialites['professeurs'] > 0),
+                                             ['specialite', 'ratio']].itertuples(index=False):
+        if ratio > 25:
+            alerts.append({
+                "type": "danger",
+                "message": f"⚠️ Ratio élevé en {specialite}: {ratio:.1f} étudiants/professeur"
+            })
+        elif ratio > 20:
+            alerts.append({
+                "type": "warning",
+                "message": f"⚠️ Ratio élevé en {specialite}: {ratio:.1f} étudiants/professeur"
+            })
     
     # Vérifier les taux de validation bas
-    for specialite in st.session_state.students['specialite'].unique():
-        specialite_students = st.session_state.students[st.session_state.students['specialite'] == specialite]
-        if len(specialite_students) > 0:
-            validation_rate = (specialite_students['valide'].sum() / len(specialite_students) * 100)
-            if validation_rate < 60:
-                alerts.append({
-                    "type": "danger",
-                    "message": f"🎓 Taux de validation bas en {specialite}: {validation_rate:.1f}%"
-                })
-            elif validation_rate < 70:
-                alerts.append({
-                    "type": "warning",
-                    "message": f"🎓 Taux de validation faible en {specialite}: {validation_rate:.1f}%"
-                })
+    for specialite, validation_rate in specialites.loc[specialites['etudiants'] > 0,
+                                                       ['specialite', 'taux_validation']].itertuples(index=False):
+        if validation_rate < 60:
+            alerts.append({
+                "type": "danger",
+                "message": f"🎓 Taux de validation bas en {specialite}: {validation_rate:.1f}%"
+            })
+        elif validation_rate < 70:
+            alerts.append({
+                "type": "warning",
+                "message": f"🎓 Taux de validation faible en {specialite}: {validation_rate:.1f}%"
+            })
     
     # Vérifier les professeurs surchargés
     overloaded_profs = st.session_state.professors[st.session_state.professors['heures_semaine'] > 22]
@@ -2671,29 +6003,28 @@ def show_system_administration():
     with tab2:
         st.subheader("📊 Journaux d'Activité du Système")
         
+        # Période : seuls les segments journaliers concernés sont lus
+        audit = auth_system.audit
+        today = datetime.now().date()
+        period = st.date_input("Période", value=(today - timedelta(days=7), today), key="audit_period")
+        start, end = (period[0], period[-1]) if isinstance(period, (tuple, list)) and period else (period, period)
+        
         # Afficher les logs
-        if auth_system.actions_log:
-            logs_df = pd.DataFrame(auth_system.actions_log)
-            
+        users_in_period = audit.counts('user', start=start, end=end)
+        if not users_in_period.empty:
             # Filtres
             col1, col2 = st.columns(2)
             
             with col1:
                 user_filter = st.multiselect("Filtrer par utilisateur", 
-                                           logs_df['user'].unique())
+                                           sorted(users_in_period.index))
             
             with col2:
                 action_filter = st.multiselect("Filtrer par action", 
-                                             logs_df['action'].unique())
-            
-            # Appliquer filtres
-            filtered_logs = logs_df.copy()
+                                             sorted(audit.counts('action', start=start, end=end).index))
             
-            if user_filter:
-                filtered_logs = filtered_logs[filtered_logs['user'].isin(user_filter)]
-            
-            if action_filter:
-                filtered_logs = filtered_logs[filtered_logs['action'].isin(action_filter)]
+            # Filtres appliqués par SQLite sur les index utilisateur/action
+            filtered_logs = audit.query('action', start, end, user_filter, action_filter)
             
             # Afficher les logs
             st.dataframe(filtered_logs, use_container_width=True, height=400)
@@ -2705,7 +6036,7 @@ def show_system_administration():
             
             with col1:
                 # Actions par utilisateur
-                actions_by_user = filtered_logs['user'].value_counts()
+                actions_by_user = audit.counts('user', start=start, end=end, users=user_filter, actions=action_filter)
                 fig = px.bar(x=actions_by_user.index, y=actions_by_user.values,
                             title="Nombre d'actions par utilisateur",
                             color=actions_by_user.values,
@@ -2714,24 +6045,16 @@ def show_system_administration():
             
             with col2:
                 # Répartition des types d'actions
-                action_types = filtered_logs['action'].value_counts()
+                action_types = audit.counts('action', start=start, end=end, users=user_filter, actions=action_filter)
                 fig = px.pie(values=action_types.values, names=action_types.index,
                             title="Répartition des types d'actions")
                 st.plotly_chart(fig, use_container_width=True)
             
             # Export des logs
-            if st.button("📤 Exporter les journaux", use_container_width=True):
-                csv = filtered_logs.to_csv(index=False).encode('utf-8')
-                
-                st.download_button(
-                    label="📥 Télécharger les journaux",
-                    data=csv,
-                    file_name=f"journaux_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
+            with st.expander("📤 Exporter les journaux"):
+                show_export(filtered_logs, 'journaux')
         else:
-            st.info("Aucun journal d'activité disponible")
+            st.info("Aucun journal d'activité sur cette période")
     
     with tab3:
         st.subheader("⚙️ Configuration du Système")
@@ -2802,22 +6125,33 @@ def show_system_administration():
             st.markdown("### 🗃️ Base de Données")
             
             if st.button("🔄 Optimiser la base", use_container_width=True):
-                with st.spinner("Optimisation en cours..."):
-                    time.sleep(2)
-                    st.success("Base de données optimisée")
+                start_maintenance_job('optimize', "Optimisation de la base")
             
             if st.button("💾 Sauvegarde", use_container_width=True):
-                with st.spinner("Sauvegarde en cours..."):
-                    time.sleep(3)
-                    st.success("Sauvegarde complète effectuée")
-            
+                start_maintenance_job('backup', "Sauvegarde complète")
+
+            if st.button("♻️ Recharger les données", use_container_width=True):
+                invalidate_data_layer()
+
+                # Journaliser l'action
+                auth_system.log_action(
+                    st.session_state.user_info['username'],
+                    "Rechargement des données",
+                    "Couche de données partagée invalidée"
+                )
+
+                st.success("Données rechargées pour toutes les sessions")
+                time.sleep(1)
+                st.rerun()
+
             if st.button("📊 Statistiques", use_container_width=True):
-                st.info("""
-                **Statistiques DB:**
-                - Étudiants: 150
-                - Professeurs: 15
-                - Employés: 30
-                - Taille totale: 45 MB
+                st.info(f"""
+                **Statistiques DB ({data_manager.storage.name}):**
+                - Étudiants: {len(st.session_state.students)}
+                - Professeurs: {len(st.session_state.professors)}
+                - Employés: {len(st.session_state.employees)}
+                - Notes: {len(st.session_state.grades)}
+                - Taille totale: {data_manager.storage.size_bytes() / 1024 / 1024:.1f} MB
                 """)
         
         with col2:
@@ -2826,10 +6160,11 @@ def show_system_administration():
             retention_days = st.slider("Conserver les données (jours)", 30, 365, 90)
             
             if st.button("🗑️ Nettoyer logs anciens", use_container_width=True):
-                st.success(f"Logs de plus de {retention_days} jours nettoyés")
+                removed = auth_system.audit.purge(retention_days)
+                st.success(f"Logs de plus de {retention_days} jours nettoyés ({removed} entrées supprimées)")
             
             if st.button("🧽 Cache système", use_container_width=True):
-                st.success("Cache système nettoyé")
+                start_maintenance_job('clear_caches', "Nettoyage du cache système")
             
             if st.button("📉 Purger temporaires", use_container_width=True):
                 st.success("Fichiers temporaires purgés")
@@ -2838,12 +6173,10 @@ def show_system_administration():
             st.markdown("### 🔧 Réparation")
             
             if st.button("🔍 Vérifier intégrité", use_container_width=True):
-                with st.spinner("Vérification en cours..."):
-                    time.sleep(2)
-                    st.success("✅ Système vérifié - Aucune erreur")
+                start_maintenance_job('check', "Vérification d'intégrité")
             
             if st.button("🛠️ Réparer index", use_container_width=True):
-                st.success("Index de la base réparés")
+                start_maintenance_job('reindex', "Réparation de l'intégrité et des index")
             
             if st.button("📋 État système", use_container_width=True):
                 st.info("""
@@ -2861,9 +6194,7 @@ def show_system_administration():
         
         with col1:
             if st.button("🔄 Redémarrer services", type="secondary", use_container_width=True):
-                st.warning("Redémarrage des services...")
-                time.sleep(2)
-                st.success("Services redémarrés")
+                start_maintenance_job('restart', "Redémarrage des services")
         
         with col2:
             if st.button("⚡ Mode maintenance", type="secondary", use_container_width=True):
@@ -2874,6 +6205,41 @@ def show_system_administration():
                 st.error("⚠️ ARRÊT D'URGENCE - Confirmer ?")
                 if st.checkbox("Je confirme l'arrêt d'urgence"):
                     st.stop()
+        
+        # Sauvegardes incrémentales et restauration à un instant donné
+        st.markdown("### 🕰️ Sauvegardes et restauration")
+        snapshots = snapshot_store.snapshots()
+        if snapshots.empty:
+            st.caption("Aucune sauvegarde disponible : lancez « 💾 Sauvegarde »")
+        else:
+            st.dataframe(snapshots, use_container_width=True, hide_index=True, height=200)
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                restore_date = st.date_input("Restaurer l'état au", value=datetime.now().date(), key="restore_date")
+            
+            with col2:
+                restore_time = st.time_input("Heure", value=datetime.max.time().replace(microsecond=0), key="restore_time")
+            
+            with col3:
+                restore_tables = st.multiselect("Tables à restaurer", DATA_TABLES + ['audit'],
+                                                default=DATA_TABLES, key="restore_tables")
+            
+            restore_at = datetime.combine(restore_date, restore_time)
+            eligible = snapshots[snapshots['sauvegarde'] <= restore_at.isoformat(timespec='seconds')]
+            if eligible.empty:
+                st.warning("Aucune sauvegarde antérieure à cette date")
+            else:
+                st.caption(f"Sauvegarde utilisée : {eligible.iloc[0]['sauvegarde']}")
+                confirm = st.checkbox("Je confirme le remplacement des tables sélectionnées", key="restore_confirm")
+                if st.button("♻️ Restaurer", disabled=not (confirm and restore_tables), use_container_width=True):
+                    start_maintenance_job('restore', f"Restauration au {restore_at:%d/%m/%Y %H:%M}",
+                                          restore_at, restore_tables)
+        
+        # Suivi des tâches lancées (toutes sessions confondues)
+        st.markdown("### 📋 Tâches de maintenance")
+        show_maintenance_jobs()
 
 # Page Dashboard Principal
 def show_main_dashboard():
@@ -2898,9 +6264,13 @@ def show_admin_main_dashboard():
     
     col1, col2, col3, col4 = st.columns(4)
     
+    student_kpis = data_manager.kpis('students')
+    professor_kpis = data_manager.kpis('professors')
+    employee_kpis = data_manager.kpis('employees')
+    
     with col1:
-        total_students = len(st.session_state.students)
-        validated = st.session_state.students['valide'].sum()
+        total_students = student_kpis.count
+        validated = student_kpis.total('valide')
         validation_rate = (validated / total_students * 100) if total_students > 0 else 0
         
         st.markdown(f"""
@@ -2912,8 +6282,8 @@ def show_admin_main_dashboard():
         """, unsafe_allow_html=True)
     
     with col2:
-        total_professors = len(st.session_state.professors)
-        avg_experience = st.session_state.professors['experience'].mean()
+        total_professors = professor_kpis.count
+        avg_experience = professor_kpis.mean('experience')
         
         st.markdown(f"""
         <div class='kpi-card-secondary'>
@@ -2924,8 +6294,8 @@ def show_admin_main_dashboard():
         """, unsafe_allow_html=True)
     
     with col3:
-        total_employees = len(st.session_state.employees)
-        active_employees = len(st.session_state.employees[st.session_state.employees['statut'] == 'Actif'])
+        total_employees = employee_kpis.count
+        active_employees = employee_kpis.count_of('statut', 'Actif')
         
         st.markdown(f"""
         <div class='kpi-card-tertiary'>
@@ -2936,8 +6306,8 @@ def show_admin_main_dashboard():
         """, unsafe_allow_html=True)
     
     with col4:
-        total_hours = st.session_state.professors['heures_semaine'].sum()
-        total_salary = st.session_state.employees['salaire'].sum()
+        total_hours = int(professor_kpis.total('heures_semaine'))
+        total_salary = employee_kpis.total('salaire')
         
         st.markdown(f"""
         <div class='kpi-card-employee'>
@@ -3224,121 +6594,82 @@ def show_students_management():
             search_cne = st.text_input("Recherche par CNE")
         
         with col3:
-            filiere_options = ["Toutes"] + st.session_state.students['specialite'].unique().tolist()
+            filiere_options = ["Toutes"] + data_manager.distinct_values('students', 'specialite')
             selected_filiere = st.selectbox("Filière", filiere_options)
         
         with col4:
-            niveau_options = ["Tous"] + st.session_state.students['niveau'].unique().tolist()
+            niveau_options = ["Tous"] + data_manager.distinct_values('students', 'niveau')
             selected_niveau = st.selectbox("Niveau", niveau_options)
         
         # Filtres supplémentaires
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            ville_options = ["Toutes"] + st.session_state.students['ville'].unique().tolist()
+            ville_options = ["Toutes"] + data_manager.distinct_values('students', 'ville')
             selected_ville = st.selectbox("Ville", ville_options)
         
         with col2:
-            statut_options = ["Tous"] + st.session_state.students['statut'].unique().tolist()
+            statut_options = ["Tous"] + data_manager.distinct_values('students', 'statut')
             selected_statut = st.selectbox("Statut", statut_options)
         
         with col3:
             min_moyenne = st.slider("Moyenne minimale", 0.0, 20.0, 0.0, 0.5)
         
-        # Appliquer les filtres
-        filtered_df = st.session_state.students.copy()
-        
-        if search_nom:
-            filtered_df = filtered_df[filtered_df['nom'].str.contains(search_nom, case=False, na=False)]
-        
-        if search_cne:
-            filtered_df = filtered_df[filtered_df['cne'].str.contains(search_cne, case=False, na=False)]
-        
-        if selected_filiere != "Toutes":
-            filtered_df = filtered_df[filtered_df['specialite'] == selected_filiere]
-        
-        if selected_niveau != "Tous":
-            filtered_df = filtered_df[filtered_df['niveau'] == selected_niveau]
+        # Filtres résolus par l'index de la table (aucune copie)
+        filters = {
+            'specialite': [] if selected_filiere == "Toutes" else [selected_filiere],
+            'niveau': [] if selected_niveau == "Tous" else [selected_niveau],
+            'ville': [] if selected_ville == "Toutes" else [selected_ville],
+            'statut': [] if selected_statut == "Tous" else [selected_statut],
+            'moyenne_generale': (min_moyenne, None)
+        }
+        within = data_manager.search('students', search_nom, fields=['nom'])
+        cne_matches = data_manager.search('students', search_cne, fields=['cne'])
+        if cne_matches is not None:
+            within = cne_matches if within is None else within[np.isin(within, cne_matches)]
         
-        if selected_ville != "Toutes":
-            filtered_df = filtered_df[filtered_df['ville'] == selected_ville]
+        students = st.session_state.students
         
-        if selected_statut != "Tous":
-            filtered_df = filtered_df[filtered_df['statut'] == selected_statut]
+        # Affichage des résultats
+        results_header = st.empty()
         
-        filtered_df = filtered_df[filtered_df['moyenne_generale'] >= min_moyenne]
+        # Sélection des colonnes
+        default_cols = ['cne', 'nom', 'prenom', 'specialite', 'niveau', 'ville', 
+                       'moyenne_generale', 'taux_absence', 'statut']
         
-        # Affichage des résultats
-        st.subheader(f"📋 Résultats de la recherche ({len(filtered_df)} étudiants)")
+        selected_cols = st.multiselect("Colonnes à afficher", 
+                                     students.columns.tolist(),
+                                     default=default_cols)
         
-        if not filtered_df.empty:
-            # Sélection des colonnes
-            default_cols = ['cne', 'nom', 'prenom', 'specialite', 'niveau', 'ville', 
-                           'moyenne_generale', 'taux_absence', 'statut']
+        if selected_cols:
+            # Affichage avec style conditionnel
+            def highlight_low_grades(val):
+                return 'background-color: #ffcccc' if val < 10 else ''
             
-            selected_cols = st.multiselect("Colonnes à afficher", 
-                                         filtered_df.columns.tolist(),
-                                         default=default_cols)
+            def highlight_high_absence(val):
+                return 'background-color: #ffebcc' if val > 20 else ''
             
-            if selected_cols:
-                # Pagination
-                page_size = st.selectbox("Éléments par page", [10, 25, 50, 100], index=1)
-                total_pages = max(1, len(filtered_df) // page_size + (1 if len(filtered_df) % page_size > 0 else 0))
-                
-                page = st.number_input("Page", min_value=1, max_value=total_pages, value=1)
-                start_idx = (page - 1) * page_size
-                end_idx = min(page * page_size, len(filtered_df))
-                
-                st.write(f"Affichage {start_idx + 1} à {end_idx} sur {len(filtered_df)} étudiants")
-                
-                # Affichage avec style conditionnel
-                def highlight_low_grades(val):
-                    return 'background-color: #ffcccc' if val < 10 else ''
-                
-                def highlight_high_absence(val):
-                    return 'background-color: #ffebcc' if val > 20 else ''
-                
-                display_df = filtered_df.iloc[start_idx:end_idx][selected_cols]
-                
+            def style_page(display_df):
                 if 'moyenne_generale' in selected_cols and 'taux_absence' in selected_cols:
-                    styled_df = display_df.style.applymap(
+                    return display_df.style.map(
                         highlight_low_grades, subset=['moyenne_generale']
-                    ).applymap(
+                    ).map(
                         highlight_high_absence, subset=['taux_absence']
                     )
-                    st.dataframe(styled_df, use_container_width=True, height=400)
-                else:
-                    st.dataframe(display_df, use_container_width=True, height=400)
-                
-                # Export des résultats
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if st.button("📤 Exporter en CSV", use_container_width=True):
-                        csv = filtered_df.to_csv(index=False).encode('utf-8')
-                        st.download_button(
-                            label="📥 Télécharger CSV",
-                            data=csv,
-                            file_name=f"etudiants_recherche_{datetime.now().strftime('%Y%m%d')}.csv",
-                            mime="text/csv"
-                        )
-                
-                with col2:
-                    if st.button("📊 Exporter en Excel", use_container_width=True):
-                        # Créer un fichier Excel
-                        output = BytesIO()
-                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                            filtered_df.to_excel(writer, index=False, sheet_name='Étudiants')
-                        output.seek(0)
-                        
-                        st.download_button(
-                            label="📥 Télécharger Excel",
-                            data=output,
-                            file_name=f"etudiants_recherche_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
-        else:
-            st.warning("Aucun étudiant ne correspond aux critères de recherche")
+                return display_df
+            
+            # Pagination : seule la page courante est extraite
+            _, total = show_paginated_table('students', selected_cols, filters, within,
+                                            key="students_search", style=style_page)
+            results_header.subheader(f"📋 Résultats de la recherche ({total} étudiants)")
+            
+            if total == 0:
+                st.warning("Aucun étudiant ne correspond aux critères de recherche")
+            else:
+                # Export des résultats (CSV, Excel, Parquet ou Feather)
+                with st.expander("📤 Exporter les résultats"):
+                    show_export(lambda: data_manager.query('students', filters, within=within),
+                                "etudiants_recherche", key="students_search_export")
     
     with tab2:
         st.subheader("📊 Analytics Avancés")
@@ -3367,21 +6698,21 @@ def show_students_management():
         
         with col1:
             # Distribution des notes avec densité
-            fig = px.histogram(st.session_state.students, x='moyenne_generale', 
-                              nbins=20, marginal='rug',
-                              title="Distribution des moyennes avec densité",
-                              color_discrete_sequence=['#3498db'])
-            
-            # Ajouter une courbe de densité
-            import plotly.figure_factory as ff
-            hist_data = [st.session_state.students['moyenne_generale'].dropna()]
-            group_labels = ['Moyennes']
-            
-            fig2 = ff.create_distplot(hist_data, group_labels, show_hist=False, show_rug=False)
-            fig.add_trace(fig2.data[0])
-            
-            fig.add_vline(x=10, line_dash="dash", line_color="red", annotation_text="Seuil")
-            st.plotly_chart(fig, use_container_width=True)
+            def build_figure():
+                moyennes = st.session_state.students['moyenne_generale'].dropna()
+                fig = histogram_chart(moyennes, nbins=20,
+                                      title="Distribution des moyennes avec densité", color='#3498db')
+                
+                # Courbe de densité (mise en cache par version), ramenée à l'échelle des effectifs
+                x, densite = data_manager.density('students', 'moyenne_generale')
+                if len(x):
+                    bin_width = (moyennes.max() - moyennes.min()) / 20 or 1
+                    fig.add_trace(go.Scatter(x=x, y=densite * len(moyennes) * bin_width,
+                                             mode='lines', name='Moyennes', line=dict(color='#e67e22')))
+                
+                fig.add_vline(x=10, line_dash="dash", line_color="red", annotation_text="Seuil")
+                return fig
+            show_cached_chart('students_analytics_distribution', build_figure, ['students'])
         
         with col2:
             # Heatmap de corrélation
@@ -3666,36 +6997,37 @@ def show_grades_system():
                 valid_notes = [g for g in grades_data if not g['absent']]
                 
                 if len(valid_notes) > 0:
-                    # Enregistrer les notes
-                    for grade in grades_data:
-                        if not grade['absent']:
-                            new_grade = {
-                                'student_id': grade['student_id'],
-                                'cne': grade['cne'],
-                                'nom': grade['nom'],
-                                'prenom': grade['prenom'],
-                                'module': selected_matiere,
-                                'examen': selected_type,
-                                'note': grade['note'],
-                                'coefficient': coefficient,
-                                'date': date_evaluation.strftime('%Y-%m-%d'),
-                                'professeur': prof_name,
-                                'valide': grade['note'] >= 10,
-                                'commentaire': commentaire
-                            }
-                            
-                            # Ajouter à la liste des notes
-                            new_df = pd.DataFrame([new_grade])
-                            st.session_state.grades = pd.concat([st.session_state.grades, new_df], ignore_index=True)
+                    # Enregistrer les notes en un seul lot
+                    new_grades = []
+                    for grade in valid_notes:
+                        new_grades.append({
+                            'student_id': grade['student_id'],
+                            'cne': grade['cne'],
+                            'nom': grade['nom'],
+                            'prenom': grade['prenom'],
+                            'module': selected_matiere,
+                            'examen': selected_type,
+                            'note': grade['note'],
+                            'coefficient': coefficient,
+                            'date': date_evaluation.strftime('%Y-%m-%d'),
+                            'professeur': prof_name,
+                            'valide': grade['note'] >= 10,
+                            'commentaire': commentaire
+                        })
+                    
+                    # Une note déjà saisie pour ce module et cet examen est remplacée
+                    replaced = data_manager.replace_records('grades', GRADE_KEY, new_grades)
+                    bind_session_tables()
                     
                     # Journaliser l'action
                     auth_system.log_action(
                         st.session_state.user_info['username'],
                         "Saisie de notes",
-                        f"{len(valid_notes)} notes saisies pour {selected_matiere}"
+                        f"{len(valid_notes)} notes saisies pour {selected_matiere} ({replaced} remplacées)"
                     )
                     
-                    st.success(f"✅ {len(valid_notes)} notes enregistrées avec succès !")
+                    st.success(f"✅ {len(valid_notes)} notes enregistrées avec succès !"
+                               + (f" ({replaced} notes existantes remplacées)" if replaced else ""))
                     
                     if notification:
                         st.info(f"📧 Notifications envoyées à {len(valid_notes)} étudiants")
@@ -3712,28 +7044,16 @@ def show_grades_system():
         selected_class = st.selectbox("Sélectionner une classe", classes)
         
         if selected_class:
-            class_students = st.session_state.students[
-                st.session_state.students['classe'] == selected_class
-            ]
-            
             # Calculer les moyennes par matière
             st.subheader(f"📊 Moyennes pour la classe {selected_class}")
             
-            # Récupérer les notes de la classe
-            student_ids = class_students['id'].tolist()
-            class_grades = st.session_state.grades[
-                st.session_state.grades['student_id'].isin(student_ids)
-            ]
+            grade_engine = data_manager.grade_engine()
+            moyennes_classe = grade_engine.averages('module', classe=selected_class)
             
-            if not class_grades.empty:
+            if not moyennes_classe.empty:
                 # Calculer les moyennes par matière
-                matieres_moyennes = class_grades.groupby('module').agg({
-                    'note': ['mean', 'std', 'count'],
-                    'valide': 'mean'
-                }).round(2)
-                
-                matieres_moyennes.columns = ['Moyenne', 'Écart-type', 'Nombre notes', 'Taux validation']
-                matieres_moyennes['Taux validation'] = (matieres_moyennes['Taux validation'] * 100).round(1)
+                matieres_moyennes = moyennes_classe[['moyenne', 'ecart_type', 'notes', 'taux_validation', 'moyenne_ponderee']]
+                matieres_moyennes.columns = ['Moyenne', 'Écart-type', 'Nombre notes', 'Taux validation', 'Moyenne pondérée']
                 
                 st.dataframe(matieres_moyennes, use_container_width=True)
                 
@@ -3749,14 +7069,9 @@ def show_grades_system():
                 # Classement des étudiants
                 st.subheader("🏆 Classement de la classe")
                 
-                # Calculer la moyenne générale de chaque étudiant
-                student_avg = class_grades.groupby(['student_id', 'nom', 'prenom']).apply(
-                    lambda x: (x['note'] * x['coefficient']).sum() / x['coefficient'].sum()
-                ).reset_index()
-                
-                student_avg.columns = ['student_id', 'nom', 'prenom', 'moyenne_generale']
-                student_avg = student_avg.sort_values('moyenne_generale', ascending=False)
-                student_avg['classement'] = range(1, len(student_avg) + 1)
+                # Moyenne générale pondérée de chaque étudiant, classement dense (ex aequo)
+                student_avg = grade_engine.ranking(classe=selected_class).rename(
+                    columns={'moyenne_ponderee': 'moyenne_generale'})
                 
                 st.dataframe(student_avg[['classement', 'nom', 'prenom', 'moyenne_generale']], 
                             use_container_width=True)
@@ -3893,7 +7208,9 @@ def show_grades_system():
         if selected_student:
             cne = selected_student.split(" - ")[0]
             student = st.session_state.students[st.session_state.students['cne'] == cne].iloc[0]
-            student_grades = st.session_state.grades[st.session_state.grades['cne'] == cne]
+            # Notes de l'étudiant lues via l'index de la table (pas de parcours complet)
+            grade_positions = data_manager.table_index('grades').values('student_id').get(student['id'], [])
+            student_grades = st.session_state.grades.iloc[grade_positions]
             
             # Aperçu du relevé
             st.subheader(f"📋 Relevé de notes - {student['nom']} {student['prenom']}")
@@ -3917,12 +7234,9 @@ def show_grades_system():
             if not student_grades.empty:
                 st.subheader("📊 Détail des notes par matière")
                 
-                # Calculer la moyenne par matière
-                matieres_detail = student_grades.groupby('module').agg({
-                    'note': ['mean', 'count'],
-                    'coefficient': 'sum'
-                }).round(2)
-                
+                # Calculer la moyenne par matière (même moteur que l'onglet des moyennes)
+                matieres_detail = data_manager.grade_engine().averages('module', student_id=student['id'])
+                matieres_detail = matieres_detail[['moyenne_ponderee', 'notes', 'coefficients']]
                 matieres_detail.columns = ['Moyenne matière', 'Nombre notes', 'Coefficient total']
                 
                 st.dataframe(matieres_detail, use_container_width=True)
@@ -3986,28 +7300,19 @@ def show_timetable_system():
             professeur_selection = st.selectbox("Professeur", 
                                               ["Tous"] + st.session_state.timetable['professeur'].unique().tolist())
         
-        # Appliquer les filtres
-        filtered_timetable = st.session_state.timetable.copy()
-        
-        if jour_selection != "Tous":
-            filtered_timetable = filtered_timetable[filtered_timetable['jour'] == jour_selection]
-        
-        if classe_selection != "Toutes":
-            filtered_timetable = filtered_timetable[filtered_timetable['classe'] == classe_selection]
-        
-        if professeur_selection != "Tous":
-            filtered_timetable = filtered_timetable[filtered_timetable['professeur'] == professeur_selection]
+        # Appliquer les filtres (un seul masque, une seule vue)
+        filtered_timetable = (FilterPipeline(st.session_state.timetable)
+                              .equals('jour', jour_selection, "Tous")
+                              .equals('classe', classe_selection, "Toutes")
+                              .equals('professeur', professeur_selection, "Tous")
+                              .apply())
         
         # Vue planning
         st.subheader("🗓️ Vue Planning")
         
         if not filtered_timetable.empty:
             # Organiser par jour et heure
-            jours = filtered_timetable['jour'].unique()
-            
-            for jour in sorted(jours):
-                jour_data = filtered_timetable[filtered_timetable['jour'] == jour]
-                
+            for jour, jour_data in filtered_timetable.groupby('jour', sort=True):
                 st.markdown(f"### 📅 {jour}")
                 
                 for _, seance in jour_data.sort_values('heure').iterrows():
@@ -4070,14 +7375,7 @@ def show_timetable_system():
         st.subheader("🏫 Gestion des Salles et Ressources")
         
         # Liste des salles avec capacités
-        salles_info = {
-            'A101': {'Capacité': 30, 'Type': 'Salle de cours', 'Équipement': 'Vidéoprojecteur, Tableau'},
-            'A102': {'Capacité': 30, 'Type': 'Salle de cours', 'Équipement': 'Vidéoprojecteur, Tableau'},
-            'A201': {'Capacité': 50, 'Type': 'Amphithéâtre', 'Équipement': 'Vidéoprojecteur, Micro'},
-            'A202': {'Capacité': 50, 'Type': 'Amphithéâtre', 'Équipement': 'Vidéoprojecteur, Micro'},
-            'B101': {'Capacité': 20, 'Type': 'Salle TP', 'Équipement': 'Ordinateurs, Tableau'},
-            'B102': {'Capacité': 20, 'Type': 'Salle TP', 'Équipement': 'Ordinateurs, Tableau'}
-        }
+        salles_info = SALLES_INFO
         
         # Affichage des salles
         col1, col2 = st.columns(2)
@@ -4133,35 +7431,39 @@ def show_timetable_system():
                 jour_reservation = st.selectbox("Jour", 
                                               ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi'])
                 heure_reservation = st.selectbox("Heure", 
-                                               ['08:00-10:00', '10:15-12:15', '14:00-16:00', '16:15-18:15'])
+                                               ['08:00-10:00', '10:15-12:15', '14:00-16:00', '16:15-18:15',
+                                                '08:00-12:15', '14:00-18:15'])
             
             with col3:
                 module_reservation = st.text_input("Module")
                 professeur_reservation = st.text_input("Professeur")
-                effectif_prev
                 effectif_prev = st.number_input("Effectif prévu", min_value=1, max_value=100, value=25)
             
-            # Vérifier la disponibilité
-            conflits = st.session_state.timetable[
-                (st.session_state.timetable['salle'] == nouvelle_salle) &
-                (st.session_state.timetable['jour'] == jour_reservation) &
-                (st.session_state.timetable['heure'] == heure_reservation)
-            ]
+            # Vérifier la disponibilité (consultation des index du moteur de conflits)
+            conflits = data_manager.conflict_engine.find_conflicts({
+                'salle': nouvelle_salle,
+                'jour': jour_reservation,
+                'heure': heure_reservation,
+                'professeur': professeur_reservation
+            })
             
-            if not conflits.empty:
-                st.error(f"⚠️ Salle déjà occupée par: {conflits.iloc[0]['module']} ({conflits.iloc[0]['professeur']})")
+            if 'Salle double' in conflits:
+                occupant = conflits['Salle double'][0]
+                st.error(f"⚠️ Salle déjà occupée par: {occupant['module']} ({occupant['professeur']})")
+            elif 'Professeur double' in conflits:
+                st.error(f"⚠️ {professeur_reservation} enseigne déjà {conflits['Professeur double'][0]['module']} sur ce créneau")
             elif effectif_prev > salles_info[nouvelle_salle]['Capacité']:
                 st.error(f"⚠️ Effectif trop important! Capacité max: {salles_info[nouvelle_salle]['Capacité']}")
             else:
                 st.success("✅ Salle disponible")
             
             if st.form_submit_button("✅ Réserver la salle"):
-                if not conflits.empty:
+                if conflits:
                     st.warning("Impossible de réserver - Conflit détecté")
                 else:
                     # Ajouter la réservation
                     new_seance = {
-                        'id': f"SE{len(st.session_state.timetable):04d}",
+                        'id': next_seance_id(data_manager.timetable),
                         'jour': jour_reservation,
                         'heure': heure_reservation,
                         'salle': nouvelle_salle,
@@ -4176,8 +7478,8 @@ def show_timetable_system():
                         'taux_presence': 0.0
                     }
                     
-                    new_df = pd.DataFrame([new_seance])
-                    st.session_state.timetable = pd.concat([st.session_state.timetable, new_df], ignore_index=True)
+                    data_manager.add_record('timetable', new_seance)
+                    bind_session_tables()
                     
                     st.success(f"✅ Salle {nouvelle_salle} réservée avec succès!")
                     st.balloons()
@@ -4185,84 +7487,179 @@ def show_timetable_system():
     with tab3:
         st.subheader("⚠️ Détection des Conflits")
         
-        # Détecter les conflits
-        conflits_data = []
-        
-        # Conflits salle/heure
-        for _, seance in st.session_state.timetable.iterrows():
-            autres_seances = st.session_state.timetable[
-                (st.session_state.timetable['salle'] == seance['salle']) &
-                (st.session_state.timetable['jour'] == seance['jour']) &
-                (st.session_state.timetable['heure'] == seance['heure']) &
-                (st.session_state.timetable['id'] != seance['id'])
-            ]
-            
-            if not autres_seances.empty:
-                for _, autre in autres_seances.iterrows():
-                    conflits_data.append({
-                        'Type': 'Salle double',
-                        'Conflit': f"{seance['professeur']} et {autre['professeur']}",
-                        'Détails': f"Salle {seance['salle']} - {seance['jour']} {seance['heure']}",
-                        'Sévérité': 'Haute'
-                    })
-        
-        # Conflits professeur/heure
-        for _, seance in st.session_state.timetable.iterrows():
-            autres_cours = st.session_state.timetable[
-                (st.session_state.timetable['professeur'] == seance['professeur']) &
-                (st.session_state.timetable['jour'] == seance['jour']) &
-                (st.session_state.timetable['heure'] == seance['heure']) &
-                (st.session_state.timetable['id'] != seance['id'])
-            ]
-            
-            if not autres_cours.empty:
-                for _, autre in autres_cours.iterrows():
-                    conflits_data.append({
-                        'Type': 'Professeur double',
-                        'Conflit': f"{seance['professeur']}",
-                        'Détails': f"Deux cours en même temps: {seance['module']} et {autre['module']}",
-                        'Sévérité': 'Moyenne'
-                    })
+        # Détecter les conflits (un seul parcours des index salle, professeur et groupe)
+        conflits_df = data_manager.conflict_engine.conflicts()
         
         # Afficher les conflits
-        if conflits_data:
-            conflits_df = pd.DataFrame(conflits_data).drop_duplicates()
-            
+        if not conflits_df.empty:
             st.subheader(f"⚠️ {len(conflits_df)} Conflits Détectés")
             st.dataframe(conflits_df, use_container_width=True)
             
             # Graphique des conflits
-            fig = px.bar(conflits_df['Type'].value_counts().reset_index(),
-                        x='index', y='Type',
+            repartition = conflits_df.groupby('Type').size().reset_index(name='Nombre')
+            fig = px.bar(repartition, x='Type', y='Nombre',
                         title="Répartition des types de conflits",
-                        labels={'index': 'Type de conflit', 'Type': 'Nombre'})
+                        labels={'Type': 'Type de conflit'})
             st.plotly_chart(fig, use_container_width=True)
             
             # Résolution des conflits
             st.subheader("🔄 Résolution des Conflits")
             
-            for idx, conflit in conflits_df.iterrows():
+            if len(conflits_df) > 50:
+                st.caption(f"Affichage des 50 premiers conflits sur {len(conflits_df)}")
+            
+            for _, conflit in conflits_df.head(50).iterrows():
+                # La dernière séance du groupe en conflit est celle que l'on corrige
+                seance_id = conflit['Séances'].split(", ")[-1]
+                cle = f"{conflit['Type']}_{conflit['Séances']}"
                 with st.expander(f"{conflit['Type']}: {conflit['Conflit']}"):
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         st.write(f"**Détails:** {conflit['Détails']}")
                         st.write(f"**Sévérité:** {conflit['Sévérité']}")
+                        st.write(f"**Séance concernée:** {seance_id}")
                     
                     with col2:
                         action = st.selectbox("Action corrective", 
                                             ["Ignorer", "Déplacer", "Supprimer", "Réaffecter"],
-                                            key=f"action_{idx}")
+                                            key=f"action_{cle}")
                         
-                        if st.button("Appliquer", key=f"apply_{idx}"):
+                        if st.button("Appliquer", key=f"apply_{cle}"):
                             if action == "Déplacer":
-                                st.info("Fonctionnalité de déplacement à implémenter")
+                                nouveau_creneau = TimetableSolver().relocate(
+                                    st.session_state.timetable, seance_id, st.session_state.professors)
+                                if nouveau_creneau:
+                                    data_manager.update_record('timetable', seance_id, nouveau_creneau)
+                                    bind_session_tables()
+                                    auth_system.log_action(
+                                        st.session_state.user_info['username'],
+                                        "Déplacement séance",
+                                        f"Séance {seance_id} déplacée: {nouveau_creneau['jour']} "
+                                        f"{nouveau_creneau['heure']} ({nouveau_creneau['salle']})"
+                                    )
+                                    st.success("✅ Séance déplacée")
+                                    st.rerun()
+                                else:
+                                    st.error("Aucun créneau libre pour cette séance")
                             elif action == "Supprimer":
+                                data_manager.delete_record('timetable', seance_id)
+                                bind_session_tables()
+                                auth_system.log_action(
+                                    st.session_state.user_info['username'],
+                                    "Suppression séance",
+                                    f"Séance {seance_id} supprimée (conflit)"
+                                )
                                 st.warning("Séance supprimée")
+                                st.rerun()
                             elif action == "Réaffecter":
-                                st.info("Réaffectation en cours...")
+                                seance = data_manager.conflict_engine.seances[seance_id]
+                                slot = parse_time_slot(seance['heure'])
+                                charge = st.session_state.timetable['professeur'].value_counts()
+                                candidats = sorted(
+                                    (nom for nom in st.session_state.professors['prenom'] + ' ' +
+                                     st.session_state.professors['nom']
+                                     if nom != seance['professeur'] and data_manager.conflict_engine.is_free(
+                                         'Professeur double', (nom, seance['jour']), *slot)),
+                                    key=lambda nom: charge.get(nom, 0)
+                                ) if slot else []
+                                if candidats:
+                                    data_manager.update_record('timetable', seance_id, {'professeur': candidats[0]})
+                                    bind_session_tables()
+                                    auth_system.log_action(
+                                        st.session_state.user_info['username'],
+                                        "Réaffectation séance",
+                                        f"Séance {seance_id} réaffectée à {candidats[0]}"
+                                    )
+                                    st.success(f"✅ Séance réaffectée à {candidats[0]}")
+                                    st.rerun()
+                                else:
+                                    st.error("Aucun professeur disponible sur ce créneau")
         else:
             st.success("✅ Aucun conflit détecté dans l'emploi du temps")
+        
+        # Génération automatique d'un emploi du temps sans conflit
+        st.subheader("🧮 Génération Automatique de l'Emploi du Temps")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            budget = st.slider("Temps de calcul (secondes)", 1, 60, 5)
+        with col2:
+            workers = st.number_input("Processus de calcul", min_value=1, max_value=os.cpu_count() or 1, value=1)
+        
+        if st.button("🧮 Calculer un emploi du temps"):
+            progress_bar = st.progress(0.0)
+            status = st.empty()
+            
+            def on_progress(fraction, message):
+                progress_bar.progress(fraction)
+                status.text(message)
+            
+            # Version de la table au moment du calcul : la solution n'est appliquée que si
+            # l'emploi du temps n'a pas été modifié entre-temps
+            version = data_manager.versions['timetable']
+            solver = TimetableSolver()
+            if workers > 1:
+                solution = solver.solve_parallel(data_manager.timetable, st.session_state.professors,
+                                                 budget, int(workers), on_progress)
+            else:
+                solution = solver.solve(data_manager.timetable, st.session_state.professors,
+                                        budget, on_progress)
+            # Les séances non placées gardent leur créneau : conflits de la solution complète
+            st.session_state.timetable_solution = solution
+            st.session_state.timetable_solution_conflicts = TimetableConflictEngine(solution[0]).conflicts()
+            st.session_state.timetable_solution_version = version
+        
+        if 'timetable_solution' in st.session_state:
+            solution_df, rapport = st.session_state.timetable_solution
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Séances placées", rapport['placees'])
+            with col2:
+                st.metric("Non placées", len(rapport['non_placees']))
+            with col3:
+                st.metric("Durée", f"{rapport['duree']} s")
+            
+            conflits = st.session_state.get('timetable_solution_conflicts', pd.DataFrame())
+            confirmed = True
+            if rapport['non_placees']:
+                st.warning(f"{len(rapport['non_placees'])} séance(s) sans créneau compatible (capacité ou "
+                           f"disponibilités insuffisantes) : elles resteraient sur leur créneau actuel")
+                st.dataframe(solution_df.loc[solution_df['id'].isin(rapport['non_placees']),
+                                             ['id', 'jour', 'heure', 'salle', 'module', 'professeur', 'classe']],
+                             use_container_width=True, hide_index=True)
+            if not conflits.empty:
+                st.error(f"⚠️ L'emploi du temps proposé contient {len(conflits)} conflit(s) "
+                         f"entre les séances non placées et les séances replacées")
+                st.dataframe(conflits, use_container_width=True, hide_index=True)
+            if rapport['non_placees']:
+                label = "Appliquer en conservant ces séances sur leur créneau actuel"
+                if not conflits.empty:
+                    label += f" (malgré {len(conflits)} conflit(s))"
+                confirmed = st.checkbox(label)
+            if rapport['surcharges']:
+                st.info("Professeurs au-delà de leur volume hebdomadaire: " +
+                        ", ".join(f"{prof} ({h}h)" for prof, h in rapport['surcharges'].items()))
+            
+            if st.button("✅ Appliquer cet emploi du temps", disabled=not confirmed):
+                # Refusé si des séances ont été ajoutées, modifiées ou supprimées depuis le calcul
+                if not data_manager.replace_table('timetable', solution_df,
+                                                  version=st.session_state.get('timetable_solution_version', -1)):
+                    del st.session_state.timetable_solution
+                    st.session_state.pop('timetable_solution_conflicts', None)
+                    st.error("❌ L'emploi du temps a été modifié depuis le calcul : relancez le calcul")
+                else:
+                    bind_session_tables()
+                    del st.session_state.timetable_solution
+                    st.session_state.pop('timetable_solution_conflicts', None)
+                    auth_system.log_action(
+                        st.session_state.user_info['username'],
+                        "Génération emploi du temps",
+                        f"{rapport['placees']} séances replacées, {len(rapport['non_placees'])} non placées"
+                    )
+                    st.success("✅ Emploi du temps appliqué")
+                    st.rerun()
     
     with tab4:
         st.subheader("📤 Export des Emplois du Temps")
@@ -4327,26 +7724,15 @@ END:VCALENDAR"""
                 )
         
         with col2:
+            # Classeur produit au clic : une feuille par classe, professeur ou salle
+            feuilles = st.selectbox("Feuilles Excel",
+                                    ["Une seule feuille", "Par classe", "Par professeur", "Par salle"],
+                                    key="timetable_excel_split")
+            split_column = {"Par classe": 'classe', "Par professeur": 'professeur', "Par salle": 'salle'}.get(feuilles)
             if st.button("📊 Export Excel", use_container_width=True):
-                # Créer un fichier Excel
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    data_export.to_excel(writer, index=False, sheet_name='Emploi du temps')
-                    
-                    # Ajouter un résumé
-                    summary = pd.DataFrame({
-                        'Statistique': ['Nombre de séances', 'Nombre de classes', 'Nombre de professeurs'],
-                        'Valeur': [len(data_export), 
-                                  data_export['classe'].nunique(), 
-                                  data_export['professeur'].nunique()]
-                    })
-                    summary.to_excel(writer, index=False, sheet_name='Résumé')
-                
-                output.seek(0)
-                
                 st.download_button(
                     label="📥 Télécharger Excel",
-                    data=output,
+                    data=timetable_workbook(data_export, split_column),
                     file_name=f"emploi_du_temps_{export_type.lower()}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
@@ -5638,54 +9024,55 @@ def show_advanced_statistics():
         ))
         
         # Visualisation
-        fig = go.Figure()
-        
-        fig.add_trace(go.Indicator(
-            mode="gauge+number",
-            value=prediction,
-            title={'text': "Situation actuelle"},
-            domain={'x': [0, 0.45], 'y': [0, 1]},
-            gauge={
-                'axis': {'range': [0, 20]},
-                'bar': {'color': "#3498db"},
-                'steps': [
-                    {'range': [0, 10], 'color': "lightgray"},
-                    {'range': [10, 20], 'color': "lightgreen"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 10
+        def build_figure():
+            fig = go.Figure()
+        
+            fig.add_trace(go.Indicator(
+                mode="gauge+number",
+                value=prediction,
+                title={'text': "Situation actuelle"},
+                domain={'x': [0, 0.45], 'y': [0, 1]},
+                gauge={
+                    'axis': {'range': [0, 20]},
+                    'bar': {'color': "#3498db"},
+                    'steps': [
+                        {'range': [0, 10], 'color': "lightgray"},
+                        {'range': [10, 20], 'color': "lightgreen"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 10
+                    }
                 }
-            }
-        ))
-        
-        fig.add_trace(go.Indicator(
-            mode="gauge+number",
-            value=nouvelle_prediction,
-            title={'text': "Avec efforts"},
-            domain={'x': [0.55, 1], 'y': [0, 1]},
-            gauge={
-                'axis': {'range': [0, 20]},
-                'bar': {'color': "#2ecc71"},
-                'steps': [
-                    {'range': [0, 10], 'color': "lightgray"},
-                    {'range': [10, 20], 'color': "lightgreen"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 10
+            ))
+        
+            fig.add_trace(go.Indicator(
+                mode="gauge+number",
+                value=nouvelle_prediction,
+                title={'text': "Avec efforts"},
+                domain={'x': [0.55, 1], 'y': [0, 1]},
+                gauge={
+                    'axis': {'range': [0, 20]},
+                    'bar': {'color': "#2ecc71"},
+                    'steps': [
+                        {'range': [0, 10], 'color': "lightgray"},
+                        {'range': [10, 20], 'color': "lightgreen"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 10
+                    }
                 }
-            }
-        ))
-        
-        fig.update_layout(
-            title="Impact des efforts sur la prédiction",
-            height=300
-        )
+            ))
         
-        st.plotly_chart(fig, use_container_width=True)
+            fig.update_layout(
+                title="Impact des efforts sur la prédiction",
+                height=300
+            )
+            return fig
+        show_cached_chart('advanced_prediction', build_figure, [], params=(prediction, nouvelle_prediction))
     
     with tab2:
         st.subheader("👥 Segmentation des Étudiants")
@@ -5693,8 +9080,9 @@ def show_advanced_statistics():
         # Clustering des étudiants
         st.markdown("### 🎯 Segmentation par profils académiques")
         
-        # Créer des clusters simulés
-        students_cluster = st.session_state.students.copy()
+        # Créer des clusters simulés (projection sur les seules colonnes utilisées)
+        students_cluster = FilterPipeline(st.session_state.students).apply(
+            ['id', 'nom', 'prenom', 'specialite', 'niveau', 'moyenne_generale', 'taux_absence', 'credits_obtenus'])
         
         # Définir les clusters basés sur moyenne et absence
         conditions = [
@@ -5711,29 +9099,30 @@ def show_advanced_statistics():
         students_cluster['Couleur'] = np.select(conditions, colors, default='gray')
         
         # Visualisation
-        fig = px.scatter(students_cluster,
-                        x='moyenne_generale',
-                        y='taux_absence',
-                        color='Cluster',
-                        color_discrete_sequence=colors,
-                        hover_data=['nom', 'prenom', 'specialite', 'niveau'],
-                        title="Segmentation des étudiants par performance",
-                        labels={
-                            'moyenne_generale': 'Moyenne générale (/20)',
-                            'taux_absence': 'Taux d\'absence (%)'
-                        })
-        
-        # Ajouter des zones
-        fig.add_hrect(y0=30, y1=100, line_width=0, fillcolor="red", opacity=0.1)
-        fig.add_hrect(y0=20, y1=30, line_width=0, fillcolor="orange", opacity=0.1)
-        fig.add_hrect(y0=0, y1=20, line_width=0, fillcolor="green", opacity=0.1)
-        
-        fig.add_vrect(x0=0, x1=10, line_width=0, fillcolor="red", opacity=0.1)
-        fig.add_vrect(x0=10, x1=12, line_width=0, fillcolor="orange", opacity=0.1)
-        fig.add_vrect(x0=12, x1=15, line_width=0, fillcolor="lightgreen", opacity=0.1)
-        fig.add_vrect(x0=15, x1=20, line_width=0, fillcolor="green", opacity=0.1)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        def build_figure():
+            fig = scatter_chart(students_cluster,
+                            x='moyenne_generale',
+                            y='taux_absence',
+                            color='Cluster',
+                            color_discrete_sequence=colors,
+                            hover_data=['nom', 'prenom', 'specialite', 'niveau'],
+                            title="Segmentation des étudiants par performance",
+                            labels={
+                                'moyenne_generale': 'Moyenne générale (/20)',
+                                'taux_absence': 'Taux d\'absence (%)'
+                            })
+        
+            # Ajouter des zones
+            fig.add_hrect(y0=30, y1=100, line_width=0, fillcolor="red", opacity=0.1)
+            fig.add_hrect(y0=20, y1=30, line_width=0, fillcolor="orange", opacity=0.1)
+            fig.add_hrect(y0=0, y1=20, line_width=0, fillcolor="green", opacity=0.1)
+        
+            fig.add_vrect(x0=0, x1=10, line_width=0, fillcolor="red", opacity=0.1)
+            fig.add_vrect(x0=10, x1=12, line_width=0, fillcolor="orange", opacity=0.1)
+            fig.add_vrect(x0=12, x1=15, line_width=0, fillcolor="lightgreen", opacity=0.1)
+            fig.add_vrect(x0=15, x1=20, line_width=0, fillcolor="green", opacity=0.1)
+            return fig
+        show_cached_chart('advanced_segmentation', build_figure, ['students'])
         
         # Statistiques par cluster
         st.markdown("### 📊 Caractéristiques des clusters")
@@ -5776,8 +9165,9 @@ def show_advanced_statistics():
             ]
         }
         
+        cluster_counts = students_cluster['Cluster'].value_counts()
         for cluster, actions in strategies.items():
-            with st.expander(f"{cluster} - {len(students_cluster[students_cluster['Cluster']==cluster])} étudiants"):
+            with st.expander(f"{cluster} - {cluster_counts.get(cluster, 0)} étudiants"):
                 for action in actions:
                     st.checkbox(action)
 
@@ -0,0 +1,274 @@
+"""Mesures de performance des traitements de données de app.py.
+
+Usage : python benchmarks.py [nom ...] [--rows N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Stockage en mémoire : l'import de l'application ne doit rien écrire sur disque
+os.environ.setdefault('UNIVERSITY_STORAGE', 'memory')
+
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def measure(func, repeat=5):
+    """Durée médiane (ms) et pic mémoire Python/NumPy (Mo) d'un appel
+    (les tampons Arrow des colonnes texte ne sont pas suivis par tracemalloc)"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, float(np.median(durations)), peak / 1e6
+
+
+def report(name, rows):
+    print(f"\n== {name}")
+    print(f"{'variante':<28}{'durée (ms)':>12}{'pic (Mo)':>12}")
+    for label, duration, peak in rows:
+        print(f"{label:<28}{duration:>12.1f}{peak:>12.1f}")
+
+
+# Filtres des pages (copie défensive puis filtres successifs, ou masque unique)
+def bench_filters(n_rows):
+    students = app.SyntheticDataGenerator(seed=0).students(n_rows)
+    specialites = ['Informatique', 'Mathématiques']
+    niveaux = ['Licence 3', 'Master 1', 'Master 2']
+
+    def copy_then_filter():
+        df = students.copy()
+        df = df[df['nom'].str.contains('an', case=False)]
+        df = df[df['specialite'].isin(specialites)]
+        df = df[df['niveau'].isin(niveaux)]
+        df = df[df['statut'] == 'Actif']
+        df = df[df['moyenne_generale'] >= 10]
+        return df
+
+    def pipeline():
+        return (app.FilterPipeline(students)
+                .contains(['nom'], 'an')
+                .isin('specialite', specialites)
+                .isin('niveau', niveaux)
+                .equals('statut', 'Actif')
+                .between('moyenne_generale', 10)
+                .apply())
+
+    before, t_before, m_before = measure(copy_then_filter)
+    after, t_after, m_after = measure(pipeline)
+    assert before.index.equals(after.index)
+    report(f"Filtres ({n_rows} lignes, {len(after)} retenues)", [
+        ("copie + filtres successifs", t_before, m_before),
+        ("FilterPipeline", t_after, m_after)
+    ])
+
+
+# Analyse par spécialité du dashboard administratif (boucles de filtres ou groupby unique)
+def count_passes(func, tables):
+    """Nombre de parcours de chaque table : groupby et comparaisons sur une colonne complète"""
+    sizes = {len(df): name for name, df in tables.items()}
+    passes = {name: 0 for name in tables}
+    original_groupby, original_eq = pd.DataFrame.groupby, pd.Series.__eq__
+
+    def groupby(self, *args, **kwargs):
+        if len(self) in sizes:
+            passes[sizes[len(self)]] += 1
+        return original_groupby(self, *args, **kwargs)
+
+    def eq(self, other):
+        if len(self) in sizes:
+            passes[sizes[len(self)]] += 1
+        return original_eq(self, other)
+
+    pd.DataFrame.groupby, pd.Series.__eq__ = groupby, eq
+    try:
+        func()
+    finally:
+        pd.DataFrame.groupby, pd.Series.__eq__ = original_groupby, original_eq
+    return passes
+
+
+def bench_specialites(n_rows):
+    generator = app.SyntheticDataGenerator(seed=0)
+    students = generator.students(n_rows)
+    professors = generator.professors(max(15, n_rows // 20))
+
+    def loops_per_section():
+        # Ratio, corrélation, coût et alertes : chaque section refiltre les deux tables
+        for _ in range(2):
+            for specialite in students['specialite'].unique():
+                len(students[students['specialite'] == specialite])
+                len(professors[professors['specialite'] == specialite])
+        for specialite in professors['specialite'].unique():
+            professors[professors['specialite'] == specialite]['experience'].mean()
+            students[students['specialite'] == specialite]['moyenne_generale'].mean()
+        for specialite in students['specialite'].unique():
+            len(students[students['specialite'] == specialite])
+            specialite_students = students[students['specialite'] == specialite]
+            specialite_students['valide'].sum() / len(specialite_students)
+
+    def single_aggregation():
+        return app.compute_specialite_analytics(students, professors)
+
+    tables = {'students': students, 'professors': professors}
+    _, t_before, m_before = measure(loops_per_section)
+    _, t_after, m_after = measure(single_aggregation)
+    report(f"Analyse par spécialité ({n_rows} étudiants)", [
+        ("boucles par section", t_before, m_before),
+        ("agrégation unique", t_after, m_after)
+    ])
+    for label, func in [("boucles par section", loops_per_section), ("agrégation unique", single_aggregation)]:
+        passes = count_passes(func, tables)
+        print(f"{label:<28}parcours : " + ", ".join(f"{name}={count}" for name, count in passes.items()))
+    assert count_passes(single_aggregation, tables) == {'students': 1, 'professors': 1}
+
+
+# Classement d'une classe (apply Python par étudiant ou sommes vectorisées)
+def bench_grades(n_rows):
+    generator = app.SyntheticDataGenerator(seed=0)
+    students = generator.students(max(100, n_rows // 20))
+    grades = generator.grades(students)
+    while len(grades) < n_rows:
+        grades = pd.concat([grades, grades], ignore_index=True)
+    classe = students['classe'].mode()[0]
+    class_ids = students.loc[students['classe'] == classe, 'id']
+
+    def apply_per_student():
+        class_grades = grades[grades['student_id'].isin(class_ids)]
+        return class_grades.groupby('student_id').apply(
+            lambda x: (x['note'] * x['coefficient']).sum() / x['coefficient'].sum()
+        ).sort_values(ascending=False)
+
+    def vectorized_sums():
+        return app.GradeEngine(grades, students).ranking(classe=classe)
+
+    before, t_before, m_before = measure(apply_per_student, repeat=3)
+    after, t_after, m_after = measure(vectorized_sums, repeat=3)
+    expected = before.round(2).sort_index()
+    assert np.allclose(after.set_index('student_id')['moyenne_ponderee'].sort_index(), expected, atol=0.011)
+    report(f"Classement ({len(grades)} notes, classe {classe})", [
+        ("apply par étudiant", t_before, m_before),
+        ("GradeEngine", t_after, m_after)
+    ])
+
+
+# Export Excel (ExcelWriter classique ou classeur en écriture seule)
+def bench_excel(n_rows):
+    # openpyxl reste lent par cellule : on mesure sur un cinquième de la taille demandée
+    students = app.SyntheticDataGenerator(seed=0).students(max(1000, n_rows // 5))
+
+    def excel_writer():
+        output = app.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            students.to_excel(writer, index=False, sheet_name='Étudiants')
+        return output.getvalue()
+
+    def write_only():
+        output = app.BytesIO()
+        workbook = app.StreamingWorkbook()
+        workbook.add_sheet('Étudiants', students)
+        workbook.save(output)
+        return output.getvalue()
+
+    _, t_before, m_before = measure(excel_writer, repeat=1)
+    after, t_after, m_after = measure(write_only, repeat=1)
+    assert len(pd.read_excel(app.BytesIO(after))) == len(students)
+    report(f"Export Excel ({len(students)} lignes)", [
+        ("ExcelWriter", t_before, m_before),
+        ("StreamingWorkbook", t_after, m_after)
+    ])
+
+
+# Sauvegarde nocturne (copie Parquet complète ou blocs incrémentaux adressés par contenu)
+def bench_snapshots(n_rows):
+    generator = app.SyntheticDataGenerator(seed=0)
+    tables = generator.generate(n_students=max(100, n_rows // 10), n_professors=max(15, n_rows // 200),
+                                n_employees=max(30, n_rows // 100), n_timetable=max(100, n_rows // 10))
+    directory = tempfile.mkdtemp()
+    store = app.SnapshotStore(directory)
+    store.create(tables)
+    # Journée type : nouvelles notes en fin de table, quelques étudiants modifiés
+    grades = tables['grades']
+    students = tables['students'].copy()
+    students.loc[students.index[:10], 'statut'] = 'Diplômé'
+    nightly = dict(tables, grades=pd.concat([grades, grades.tail(len(grades) // 100)], ignore_index=True),
+                   students=students)
+
+    def full_copy():
+        return sum(len(df.to_parquet(compression='zstd', index=False)) for df in nightly.values())
+
+    def incremental():
+        return store.create(nightly)['ecrit_mo'] * 1e6
+
+    full_bytes, t_before, m_before = measure(full_copy, repeat=1)
+    incremental_bytes, t_after, m_after = measure(incremental, repeat=1)
+    created, restored = store.restore()
+    for table, df in nightly.items():
+        pd.testing.assert_frame_equal(restored[table], df.reset_index(drop=True))
+    report(f"Sauvegarde ({sum(len(df) for df in nightly.values())} lignes)", [
+        ("copie complète", t_before, m_before),
+        ("SnapshotStore incrémental", t_after, m_after)
+    ])
+    print(f"{'octets écrits':<28}copie complète={full_bytes / 1e6:.1f} Mo, incrémental={incremental_bytes / 1e6:.1f} Mo")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+# Contrôle d'intégrité (isin/duplicated pandas ou anti-jointures pyarrow et codes combinés)
+def bench_integrity(n_rows):
+    tables = app.SyntheticDataGenerator(seed=0).generate(
+        n_students=max(100, n_rows // 10), n_professors=max(15, n_rows // 200),
+        n_employees=max(30, n_rows // 100), n_timetable=max(100, n_rows // 10))
+    # Orphelins : notes d'étudiants supprimés sans cascade
+    tables['students'] = tables['students'].iloc[10:].reset_index(drop=True)
+
+    def pandas_checks():
+        orphans = (~tables['grades']['student_id'].isin(tables['students']['id'])).sum()
+        duplicates = tables['grades'].duplicated(['student_id', 'module', 'examen']).sum()
+        return int(orphans), int(duplicates)
+
+    def integrity_engine():
+        engine = app.IntegrityEngine(tables)
+        return (int(engine.orphan_mask('grades', 'student_id').sum()),
+                int(engine.duplicate_mask('grades', ['student_id', 'module', 'examen']).sum()))
+
+    before, t_before, m_before = measure(pandas_checks, repeat=3)
+    after, t_after, m_after = measure(integrity_engine, repeat=3)
+    assert before == after
+    report(f"Intégrité ({len(tables['grades'])} notes, {after[0]} orphelines)", [
+        ("isin + duplicated", t_before, m_before),
+        ("IntegrityEngine", t_after, m_after)
+    ])
+
+
+BENCHMARKS = {
+    'filters': bench_filters,
+    'specialites': bench_specialites,
+    'grades': bench_grades,
+    'excel': bench_excel,
+    'snapshots': bench_snapshots,
+    'integrity': bench_integrity
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', choices=[[]] + list(BENCHMARKS), help="mesures à lancer (toutes par défaut)")
+    parser.add_argument('--rows', type=int, default=100_000, help="taille de la table générée")
+    args = parser.parse_args(argv)
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args.rows)
+
+
+if __name__ == '__main__':
+    sys.exit(main())